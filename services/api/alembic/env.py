@@ -66,9 +66,10 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
-    # Override the sqlalchemy.url with our database URL
+    # Override the sqlalchemy.url with our database URL before the section
+    # is read, so the ini placeholders are never interpolated
+    config.set_main_option("sqlalchemy.url", get_database_url().replace("%", "%%"))
     configuration = config.get_section(config.config_ini_section)
-    configuration["sqlalchemy.url"] = get_database_url()
     
     connectable = engine_from_config(
         configuration,
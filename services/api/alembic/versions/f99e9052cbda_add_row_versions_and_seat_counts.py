@@ -0,0 +1,63 @@
+"""add row versions, permission versions and seat counts
+
+Columns and indexes added to tables that ``create_all`` already created on
+existing deployments; it never alters a table, so without this the first
+query naming them fails. Every step is IF NOT EXISTS, so databases built
+by a newer ``create_all`` upgrade cleanly too. The unique indexes fail if
+a user still has two active applications to one program, or an
+application two active beneficiaries; deactivate the extras first.
+
+New tables (refresh_tokens, barangay_stats, cohort_stats, idempotency_keys)
+are created by ``create_all`` at startup. Fill barangay_stats afterwards
+with POST /api/v1/analytics/barangays/rebuild.
+
+Revision ID: f99e9052cbda
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f99e9052cbda'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE applications ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1")
+    op.execute("ALTER TABLE beneficiaries ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1")
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS permissions_version INTEGER NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS tin VARCHAR(20)")
+    op.execute("ALTER TABLE programs ADD COLUMN IF NOT EXISTS seats_reserved INTEGER NOT NULL DEFAULT 0")
+
+    # Seats held by the pending and approved applications already on file
+    op.execute("""
+        UPDATE programs p
+        SET seats_reserved = (
+            SELECT count(*) FROM applications a
+            WHERE a.program_id = p.id AND a.is_active AND a.status IN ('pending', 'approved')
+        )
+    """)
+
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_applications_active_user_program "
+        "ON applications (user_id, program_id) WHERE is_active"
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_beneficiaries_active_application "
+        "ON beneficiaries (application_id) WHERE is_active"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_beneficiaries_active_application", table_name="beneficiaries")
+    op.drop_index("uq_applications_active_user_program", table_name="applications")
+    op.drop_column("programs", "seats_reserved")
+    op.drop_column("users", "tin")
+    op.drop_column("users", "permissions_version")
+    op.drop_column("beneficiaries", "version")
+    op.drop_column("applications", "version")
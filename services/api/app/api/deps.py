@@ -1,14 +1,20 @@
-from typing import AsyncGenerator, Optional
-from fastapi import Depends, HTTPException, status, Header
+from typing import AsyncGenerator, Optional, Union
+from fastapi import Depends, HTTPException, status, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError
 from pydantic import ValidationError
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core import security
 from app.core.config import settings
-from app.core.database import AsyncSessionLocal, get_db as get_async_db
+from app.core.permissions import Permission, Principal
+from app.core.database import AsyncSessionLocal, SessionLocal, get_db as get_async_db
+from app.core.rate_limit import rate_limiter
+from app.core.token_store import token_store
+from app.core.waiting_room import waiting_room
 from app.crud.crud_user import user
 from app.models.user import User
 from app.schemas.auth import TokenData
@@ -29,17 +35,34 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+def get_token_payload(token: str = Depends(reusable_oauth2)) -> dict:
+    """Decode the bearer access token, rejecting expired and revoked tokens"""
+    try:
+        payload = security.decode_access_token(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    
+    if token_store.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return payload
+
+
 async def get_current_user(
     db: AsyncSession = Depends(get_db), 
-    token: str = Depends(reusable_oauth2)
+    payload: dict = Depends(get_token_payload)
 ) -> User:
     """Get current authenticated user"""
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
         token_data = TokenData(email=payload.get("sub"))
-    except (JWTError, ValidationError):
+    except ValidationError:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
@@ -51,7 +74,8 @@ async def get_current_user(
             detail="Could not validate credentials",
         )
     
-    user_obj = await user.get_by_email(db, email=token_data.email)
+    result = await db.execute(select(User).where(User.email == token_data.email))
+    user_obj = result.scalar_one_or_none()
     if not user_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
@@ -91,28 +115,124 @@ async def get_current_active_superuser(
     return current_user
 
 
+async def get_current_principal(
+    db: AsyncSession = Depends(get_db),
+    payload: dict = Depends(get_token_payload)
+) -> Principal:
+    """
+    Get the caller from the role and permission claims of the access token.
+    The user is loaded when the claims are missing, predate the user's
+    current permissions version (role or status changed), or that version
+    is not known yet to Redis or this worker; the load records it.
+    """
+    if "perms" in payload and "uid" in payload:
+        current_version = await run_in_threadpool(token_store.get_permissions_version, payload["uid"])
+        if current_version is not None and current_version == payload.get("pv"):
+            return Principal.from_claims(payload)
+    
+    user_obj = await get_current_user(db=db, payload=payload)
+    await run_in_threadpool(token_store.remember_permissions_version, user_obj.id, user_obj.permissions_version or 0)
+    return Principal.from_user(user_obj)
+
+
+def get_principal_from_token(token: str) -> Optional[Principal]:
+    """
+    Caller of a bearer token from its claims, for code running before
+    dependencies (middleware). None when the token is invalid, revoked or
+    its claims are outdated. Blocking, call it from a thread: the user is
+    loaded when Redis and this worker don't know its permissions version.
+    """
+    try:
+        payload = security.decode_access_token(token)
+    except JWTError:
+        return None
+    if token_store.is_revoked(payload) or "perms" not in payload or "uid" not in payload:
+        return None
+    current_version = token_store.get_permissions_version(payload["uid"])
+    if current_version is None:
+        db = SessionLocal()
+        try:
+            user_obj = db.get(User, payload["uid"])
+        finally:
+            db.close()
+        if not user_obj or not user_obj.is_active:
+            return None
+        current_version = user_obj.permissions_version or 0
+        token_store.remember_permissions_version(user_obj.id, current_version)
+    if current_version != payload.get("pv"):
+        return None
+    return Principal.from_claims(payload)
+
+
+def require_permission(permission: Permission):
+    """Dependency requiring every bit of ``permission``, decided from token claims"""
+    async def permission_checker(
+        principal: Principal = Depends(get_current_principal)
+    ) -> Principal:
+        if not principal.has(permission):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+        return principal
+    return permission_checker
+
+
+def require_admission(
+    program_id: int,
+    principal: Principal = Depends(get_current_principal),
+    waiting_room_token: Optional[str] = Header(None, alias="X-Waiting-Room-Token"),
+) -> None:
+    """
+    Dependency keeping callers out of a program's write path until its
+    waiting room admits them. Decided without touching the database, so
+    list it before dependencies that load the user. Sync, so its Redis
+    calls run in the threadpool.
+    """
+    waiting_room.check_admission(program_id, principal.id, waiting_room_token)
+
+
+def get_if_match(if_match: Optional[str] = Header(None, alias="If-Match")) -> Optional[int]:
+    """
+    Row version the client expects, taken from an If-Match header holding
+    the ETag of an earlier read. None when the header is absent or ``*``.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    value = value.strip('"')
+    if not value.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match does not match the current version"
+        )
+    return int(value)
+
+
 async def get_current_admin_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    principal: Principal = Depends(get_current_principal),
+) -> Principal:
     """Get current admin user"""
-    if current_user.role not in ["admin", "super_admin"]:
+    if not principal.has(Permission.MANAGE_USERS):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user
+    return principal
 
 
 async def get_current_staff_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    principal: Principal = Depends(get_current_principal),
+) -> Principal:
     """Get current staff user (admin or staff)"""
-    if current_user.role not in ["admin", "super_admin", "staff"]:
+    if not principal.has(Permission.REVIEW_APPLICATIONS):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user
+    return principal
 
 
 async def get_optional_current_user(
@@ -124,13 +244,14 @@ async def get_optional_current_user(
         return None
     
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
+        payload = security.decode_access_token(token)
         token_data = TokenData(email=payload.get("sub"))
     except (JWTError, ValidationError):
         return None
     
+    if token_store.is_revoked(payload):
+        return None
+    
     if not token_data.email:
         return None
     
@@ -144,9 +265,9 @@ async def get_optional_current_user(
 def verify_token(token: str) -> Optional[TokenData]:
     """Verify JWT token and return token data"""
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
+        payload = security.decode_access_token(token)
+        if token_store.is_revoked(payload):
+            return None
         email: str = payload.get("sub")
         if email is None:
             return None
@@ -168,7 +289,7 @@ async def get_user_from_token(db: AsyncSession, token: str) -> Optional[User]:
     return user_obj
 
 
-def check_user_permissions(current_user: User, required_roles: list) -> bool:
+def check_user_permissions(current_user: Union[User, Principal], required_roles: list) -> bool:
     """Check if user has required permissions"""
     if not current_user.is_active:
         return False
@@ -185,7 +306,7 @@ def check_user_permissions(current_user: User, required_roles: list) -> bool:
 
 def require_permissions(required_roles: list):
     """Decorator to require specific permissions"""
-    async def permission_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def permission_checker(current_user: Principal = Depends(get_current_principal)) -> Principal:
         if not check_user_permissions(current_user, required_roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -201,6 +322,25 @@ require_staff = require_permissions(["admin", "super_admin", "staff"])
 require_beneficiary = require_permissions(["beneficiary", "admin", "super_admin", "staff"])
 
 
+def get_client_ip(request: Request) -> str:
+    """Get the client IP, honouring X-Forwarded-For only when behind a trusted proxy"""
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(scope: str):
+    """
+    Dependency enforcing the per-IP limit configured as RATE_LIMIT_<SCOPE>.
+    Use in the route decorator so rejected requests never reach the handler.
+    """
+    def limiter(request: Request) -> None:
+        rate_limiter.check(scope, get_client_ip(request))
+    return limiter
+
+
 def get_current_firebase_user(
     authorization: Optional[str] = Header(None)
 ) -> Optional[dict]:
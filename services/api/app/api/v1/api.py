@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, programs, applications, admin, oauth
+from app.api.v1.endpoints import auth, users, programs, applications, beneficiaries, admin, oauth, uploads, imports, exports, analytics, reports, jobs
 
 api_router = APIRouter()
 
@@ -14,8 +14,15 @@ async def api_v1_root():
             "users": "/users", 
             "programs": "/programs",
             "applications": "/applications",
+            "beneficiaries": "/beneficiaries",
             "admin": "/admin",
-            "oauth": "/oauth"
+            "oauth": "/oauth",
+            "uploads": "/uploads",
+            "imports": "/imports",
+            "exports": "/exports",
+            "analytics": "/analytics",
+            "reports": "/reports",
+            "jobs": "/jobs"
         }
     }
 
@@ -23,5 +30,12 @@ api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(programs.router, prefix="/programs", tags=["programs"])
 api_router.include_router(applications.router, prefix="/applications", tags=["applications"])
+api_router.include_router(beneficiaries.router, prefix="/beneficiaries", tags=["beneficiaries"])
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
-api_router.include_router(oauth.router, prefix="/oauth", tags=["oauth"])
\ No newline at end of file
+api_router.include_router(oauth.router, prefix="/oauth", tags=["oauth"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
+api_router.include_router(imports.router, prefix="/imports", tags=["imports"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
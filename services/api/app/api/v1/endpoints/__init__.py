@@ -1,4 +1,4 @@
 """API Endpoints Package"""
-from . import auth, users, programs, applications, beneficiaries, admin
+from . import auth, users, programs, applications, beneficiaries, admin, uploads, imports, exports, analytics, reports
 
-__all__ = ["auth", "users", "programs", "applications", "beneficiaries", "admin"]
\ No newline at end of file
+__all__ = ["auth", "users", "programs", "applications", "beneficiaries", "admin", "uploads", "imports", "exports", "analytics", "reports"]
\ No newline at end of file
@@ -1,11 +1,14 @@
 from typing import Any, List, Dict
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, text
 from datetime import datetime, timedelta
 
 from app.api import deps
 from app.core.config import settings
+from app.core.security import get_password_hash_stats
+from app.core.permissions import commit_permission_change
 from app.models.user import User
 from app.models.program import Program
 from app.models.application import Application
@@ -15,10 +18,15 @@ from app.schemas.user import UserRead
 from app.schemas.program import ProgramRead
 from app.schemas.application import ApplicationRead
 from app.schemas.common import ResponseModel
+from app.schemas.profiles import Profile
 from app.services.user_service import user_service
 from app.services.program_service import program_service
 from app.services.application_service import application_service
 from app.services.audit_service import audit_service
+from app.services.analytics_service import analytics_service
+from app.services.upload_service import upload_service
+from app.services.token_service import token_service
+from app.services.profile_service import profile_service
 
 router = APIRouter()
 
@@ -83,17 +91,9 @@ def get_admin_dashboard(
     ).group_by(Program.category).all()
     
     # Applications by status over time (last 30 days)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    application_trends = db.query(
-        func.date(Application.applied_at).label("date"),
-        Application.status,
-        func.count(Application.id).label("count")
-    ).filter(
-        Application.applied_at >= thirty_days_ago
-    ).group_by(
-        func.date(Application.applied_at),
-        Application.status
-    ).all()
+    application_trends = analytics_service.get_trends(
+        db, "applications", bucket="day", dimension="status"
+    )
     
     return {
         "users": {
@@ -118,11 +118,12 @@ def get_admin_dashboard(
             "recent": recent_applications,
             "trends": [
                 {
-                    "date": str(date),
+                    "date": point["bucket"],
                     "status": status,
                     "count": count
                 }
-                for date, status, count in application_trends
+                for point in application_trends["series"]
+                for status, count in point["breakdown"].items()
             ]
         },
         "beneficiaries": {
@@ -217,7 +218,7 @@ def promote_user(
     
     # Update user role
     user.role = new_role
-    db.commit()
+    commit_permission_change(db, user)
     
     # Log audit trail
     audit_service.log_action(
@@ -270,7 +271,7 @@ def demote_user(
     
     old_role = user.role
     user.role = "user"
-    db.commit()
+    commit_permission_change(db, user)
     
     # Log audit trail
     audit_service.log_action(
@@ -295,7 +296,8 @@ def get_audit_logs(
     """
     Get audit logs with filtering.
     """
-    query = db.query(AuditLog)
+    # Users come from the same query; a lookup per row was an N+1
+    query = db.query(AuditLog, User.email, User.name).outerjoin(User, User.id == AuditLog.user_id)
     
     # Apply filters
     if action:
@@ -304,24 +306,23 @@ def get_audit_logs(
         query = query.filter(AuditLog.user_id == user_id)
     
     # Get logs with pagination
-    logs = query.order_by(
+    rows = query.order_by(
         AuditLog.created_at.desc()
     ).offset(skip).limit(limit).all()
     
     # Format response
     formatted_logs = []
-    for log in logs:
-        user = db.query(User).filter(User.id == log.user_id).first()
+    for log, email, name in rows:
         formatted_logs.append({
             "id": log.id,
             "action": log.action,
-            "details": log.details,
+            "details": log.description,
             "created_at": log.created_at,
             "user": {
-                "id": user.id if user else None,
-                "email": user.email if user else "Unknown",
-                "name": f"{user.first_name} {user.last_name}" if user else "Unknown"
-            } if user else None
+                "id": log.user_id,
+                "email": email,
+                "name": name
+            } if email is not None else None
         })
     
     return formatted_logs
@@ -377,6 +378,7 @@ def get_system_health(
         "database": db_status,
         "timestamp": datetime.utcnow(),
         "total_records": total_records,
+        "password_hashing": get_password_hash_stats(),
         "version": "1.0.0"
     }
 
@@ -409,4 +411,87 @@ def cleanup_old_data(
     
     return ResponseModel(
         message=f"Cleanup completed. Removed {deleted_logs} old audit logs."
-    )
\ No newline at end of file
+    )
+
+
+@router.post("/maintenance/uploads/cleanup", response_model=ResponseModel)
+def cleanup_stale_uploads(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Remove abandoned partial uploads past their expiry window.
+    """
+    expired_uploads = upload_service.expire_stale_uploads()
+    
+    audit_service.log_action(
+        db=db,
+        user_id=current_user.id,
+        action="UPLOADS_CLEANUP",
+        resource_type="System",
+        description=f"Removed {expired_uploads} expired partial uploads"
+    )
+    
+    return ResponseModel(
+        message=f"Cleanup completed. Removed {expired_uploads} expired partial uploads."
+    )
+
+
+@router.post("/maintenance/tokens/cleanup", response_model=ResponseModel)
+def cleanup_expired_refresh_tokens(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Delete expired refresh tokens.
+    """
+    deleted_tokens = token_service.purge_expired(db)
+    
+    audit_service.log_action(
+        db=db,
+        user_id=current_user.id,
+        action="TOKENS_CLEANUP",
+        resource_type="System",
+        description=f"Deleted {deleted_tokens} expired refresh tokens"
+    )
+    
+    return ResponseModel(
+        message=f"Cleanup completed. Deleted {deleted_tokens} expired refresh tokens."
+    )
+
+
+@router.get("/profiles", response_model=List[Profile])
+def list_profiles(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    List captured request profiles, newest first. Send "X-Profile: 1" with
+    any request as an admin to capture one.
+    """
+    return profile_service.list_profiles()
+
+
+@router.get("/profiles/{profile_id}", response_model=Profile)
+def get_profile(
+    profile_id: str,
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Get a captured request profile.
+    """
+    return profile_service.get_profile(profile_id)
+
+
+@router.get("/profiles/{profile_id}/download")
+def download_profile(
+    profile_id: str,
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Download a profile as folded stacks, for flamegraph.pl or speedscope.
+    """
+    return FileResponse(
+        profile_service.get_folded_path(profile_id),
+        media_type="text/plain",
+        filename=f"profile-{profile_id}.folded"
+    )
@@ -0,0 +1,173 @@
+"""Reporting Analytics Endpoints"""
+from datetime import date
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.permissions import Permission, Principal
+from app.schemas.common import ResponseModel
+from app.services.analytics_service import analytics_service
+from app.services.barangay_stats_service import barangay_stats_service
+from app.services.cohort_service import cohort_service
+
+router = APIRouter()
+
+
+@router.get("/trends", response_model=Dict[str, Any])
+def get_trends(
+    *,
+    db: Session = Depends(deps.get_db),
+    metric: str = Query("applications", regex="^(applications|enrollments)$"),
+    bucket: str = Query("day", regex="^(day|week|month)$"),
+    start: Optional[date] = Query(None, description="Defaults to 30 days before end"),
+    end: Optional[date] = Query(None, description="Defaults to today"),
+    dimension: Optional[str] = Query(None, regex="^(status|program|category|barangay)$"),
+    program_id: Optional[int] = Query(None),
+    current_user: Principal = Depends(deps.require_permission(Permission.VIEW_REPORTS)),
+) -> Any:
+    """
+    Get application or enrollment counts per day, week or month (Staff/Admin only).
+    Buckets without activity are included with zero counts.
+    """
+    try:
+        return analytics_service.get_trends(
+            db,
+            metric,
+            bucket=bucket,
+            start=start,
+            end=end,
+            dimension=dimension,
+            program_id=program_id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/barangays", response_model=List[Dict[str, Any]])
+def get_barangay_statistics(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.require_permission(Permission.VIEW_REPORTS)),
+) -> Any:
+    """
+    Get beneficiary counts, approval rates and household income distribution
+    for every barangay (Staff/Admin only).
+    """
+    return barangay_stats_service.get_all_stats(db)
+
+
+@router.get("/barangays/{barangay}", response_model=Dict[str, Any])
+def get_barangay_statistics_by_name(
+    *,
+    db: Session = Depends(deps.get_db),
+    barangay: str,
+    current_user: Principal = Depends(deps.require_permission(Permission.VIEW_REPORTS)),
+) -> Any:
+    """
+    Get the statistics of one barangay (Staff/Admin only).
+    """
+    stats = barangay_stats_service.get_stats(db, barangay)
+    if not stats:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No statistics for this barangay"
+        )
+    return stats
+
+
+@router.post("/barangays/rebuild", response_model=ResponseModel)
+def rebuild_barangay_statistics(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Recompute the barangay rollup from applications and beneficiaries (Admin only).
+    """
+    barangay_stats_service.rebuild(db)
+    db.commit()
+    return ResponseModel(message="Barangay statistics rebuilt")
+
+
+@router.get("/programs", response_model=Dict[str, Any])
+def get_program_overview(
+    *,
+    db: Session = Depends(deps.get_db),
+    sort_by: str = Query("budget_utilization", description="Field to sort programs by"),
+    order: str = Query("desc", regex="^(asc|desc)$"),
+    category: Optional[str] = Query(None, description="Filter by program category"),
+    active_only: bool = Query(False, description="Only include active programs"),
+    current_user: Principal = Depends(deps.require_permission(Permission.VIEW_REPORTS)),
+) -> Any:
+    """
+    Get budget, utilization, fill rate and demand figures with ranks for all programs (Staff/Admin only).
+    """
+    try:
+        return analytics_service.get_program_overview(
+            db,
+            sort_by=sort_by,
+            descending=order == "desc",
+            category=category,
+            active_only=active_only
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/income", response_model=Dict[str, Any])
+def get_income_distribution(
+    *,
+    db: Session = Depends(deps.get_db),
+    group_by: Optional[str] = Query(None, regex="^(program|category|barangay)$"),
+    program_id: Optional[int] = Query(None),
+    current_user: Principal = Depends(deps.require_permission(Permission.VIEW_REPORTS)),
+) -> Any:
+    """
+    Get income quantiles, histograms, per-capita income and poverty-threshold
+    counts of active beneficiaries (Staff/Admin only).
+    """
+    try:
+        return analytics_service.get_income_distribution(db, group_by=group_by, program_id=program_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/cohorts", response_model=List[Dict[str, Any]])
+def get_cohorts(
+    *,
+    db: Session = Depends(deps.get_db),
+    program_id: Optional[int] = Query(None),
+    start: Optional[date] = Query(None, description="First cohort month"),
+    end: Optional[date] = Query(None, description="Last cohort month"),
+    current_user: Principal = Depends(deps.require_permission(Permission.VIEW_REPORTS)),
+) -> Any:
+    """
+    Get funnel drop-off rates and time-to-completion per monthly application
+    cohort (Staff/Admin only). Figures are refreshed nightly.
+    """
+    return cohort_service.get_cohorts(db, program_id=program_id, start=start, end=end)
+
+
+@router.post("/cohorts/refresh", response_model=ResponseModel)
+def refresh_cohorts(
+    *,
+    db: Session = Depends(deps.get_db),
+    full: bool = Query(False, description="Recompute every cohort instead of only stale ones"),
+    current_user: Principal = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Refresh cohort statistics now instead of waiting for the nightly run (Admin only).
+    """
+    refreshed = cohort_service.refresh(db, full=full)
+    db.commit()
+    return ResponseModel(message=f"Refreshed {refreshed} cohorts", data={"refreshed": refreshed})
@@ -1,19 +1,30 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Any, List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_
 
 from app.api import deps
 from app.core.config import settings
+from app.core.exceptions import ConflictError, NotFoundError, PreconditionFailedError
+from app.core.waiting_room import waiting_room
 from app.models.user import User
 from app.models.application import Application
 from app.models.program import Program
-from app.schemas.application import ApplicationRead, ApplicationCreate, ApplicationUpdate
+from app.schemas.application import (
+    ApplicationRead,
+    ApplicationCreate,
+    ApplicationUpdate,
+    ApplicationBulkReview,
+    ApplicationBulkReviewResult
+)
 from app.schemas.common import PaginatedResponse, ResponseModel
 from app.services.application_service import application_service
+from app.services.analytics_service import analytics_service
 from app.services.audit_service import audit_service
+from app.services.idempotency_service import idempotency_service
+from app.services.notification_service import notification_service
 from app.utils.validators import validate_application_notes
-from app.utils.formatters import format_date
+from app.utils.formatters import format_date, format_etag
 
 router = APIRouter()
 
@@ -49,7 +60,9 @@ def get_applications(
         items=applications,
         total=total,
         skip=skip,
-        limit=limit
+        limit=limit,
+        has_next=skip + len(applications) < total,
+        has_prev=skip > 0
     )
 
 
@@ -59,58 +72,45 @@ def create_application(
     db: Session = Depends(deps.get_db),
     application_in: ApplicationCreate,
     current_user: User = Depends(deps.get_current_active_user),
+    waiting_room_token: Optional[str] = Header(None, alias="X-Waiting-Room-Token"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ) -> Any:
     """
-    Create new application.
+    Create new application. Retries with the same Idempotency-Key get the
+    first response back instead of applying again.
     """
-    # Validate program exists and is active
-    program = db.query(Program).filter(Program.id == application_in.program_id).first()
-    if not program:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Program not found"
-        )
-    
-    if not program.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Program is not active"
-        )
-    
-    # Check if user already applied
-    existing_application = db.query(Application).filter(
-        Application.user_id == current_user.id,
-        Application.program_id == application_in.program_id
-    ).first()
-    
-    if existing_application:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have already applied to this program"
-        )
+    waiting_room.check_admission(application_in.program_id, current_user.id, waiting_room_token)
     
+    return idempotency_service.run(
+        db, current_user.id, idempotency_key, "POST /applications", application_in,
+        lambda: _create_application(db, application_in, current_user),
+        response_model=ApplicationRead
+    )
+
+
+def _create_application(db: Session, application_in: ApplicationCreate, current_user: User) -> Application:
     try:
         # Validate notes if provided
         if application_in.notes:
             validate_application_notes(application_in.notes)
         
-        # Create application using service
-        application = application_service.create_application(
+        # Program checks and the duplicate check happen in the service
+        return application_service.create_application(
             db=db,
             application_create=application_in,
             user_id=current_user.id
         )
         
-        # Log audit trail
-        audit_service.log_action(
-            db=db,
-            user_id=current_user.id,
-            action="APPLICATION_CREATED",
-            details=f"Application created for program {program.name}"
+    except NotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
         )
-        
-        return application
-        
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -128,10 +128,12 @@ def get_application(
     *,
     db: Session = Depends(deps.get_db),
     application_id: int,
+    response: Response,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Get application by ID.
+    Get application by ID. The ETag header carries the version to send
+    back in If-Match when updating.
     """
     application = application_service.get_application(db, application_id)
     if not application:
@@ -150,6 +152,7 @@ def get_application(
             detail="Not enough permissions"
         )
     
+    response.headers["ETag"] = format_etag(application.version)
     return application
 
 
@@ -159,10 +162,13 @@ def update_application(
     db: Session = Depends(deps.get_db),
     application_id: int,
     application_in: ApplicationUpdate,
+    response: Response,
+    if_match: Optional[int] = Depends(deps.get_if_match),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Update application.
+    Update application. Send the ETag from a previous read as If-Match;
+    if the application changed since, the update is rejected with 412.
     """
     application = application_service.get_application(db, application_id)
     if not application:
@@ -204,19 +210,15 @@ def update_application(
             db=db,
             application_id=application_id,
             application_update=application_in,
-            updated_by=current_user.id
+            updated_by=current_user.id,
+            expected_version=if_match
         )
         
-        # Log audit trail
-        audit_service.log_action(
-            db=db,
-            user_id=current_user.id,
-            action="APPLICATION_UPDATED",
-            details=f"Application {application_id} updated"
+    except PreconditionFailedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e)
         )
-        
-        return updated_application
-        
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -227,6 +229,15 @@ def update_application(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update application"
         )
+    
+    if not updated_application:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Application not found"
+        )
+    
+    response.headers["ETag"] = format_etag(updated_application.version)
+    return updated_application
 
 
 @router.delete("/{application_id}", response_model=ResponseModel)
@@ -373,6 +384,45 @@ def reject_application(
         )
 
 
+@router.post("/bulk-review", response_model=ApplicationBulkReviewResult)
+def bulk_review_applications(
+    *,
+    db: Session = Depends(deps.get_db),
+    review_in: ApplicationBulkReview,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(deps.get_current_staff_user),
+) -> Any:
+    """
+    Approve or reject many pending applications at once (Staff only).
+    Returns a result for every application ID; notification emails are sent
+    as one batch after the response.
+    """
+    if not validate_application_notes(review_in.notes):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid review notes"
+        )
+    
+    result = application_service.bulk_update_application_status(
+        db=db,
+        application_ids=review_in.application_ids,
+        status=review_in.status,
+        reviewed_by=current_user.id,
+        notes=review_in.notes
+    )
+    
+    if result["notifications"]:
+        background_tasks.add_task(
+            notification_service.send_application_decisions,
+            result["notifications"],
+            review_in.notes if review_in.status == "rejected" else None
+        )
+    if result["promotions"]:
+        background_tasks.add_task(notification_service.send_waitlist_promotions, result["promotions"])
+    
+    return result
+
+
 @router.get("/program/{program_id}", response_model=List[ApplicationRead])
 def get_program_applications(
     *,
@@ -449,18 +499,8 @@ def get_application_statistics(
         Application, Program.id == Application.program_id
     ).group_by(Program.name).all()
     
-    # Applications by status over time (last 30 days)
-    from datetime import datetime, timedelta
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    
-    recent_applications = db.query(
-        func.date(Application.applied_at).label("date"),
-        func.count(Application.id).label("count")
-    ).filter(
-        Application.applied_at >= thirty_days_ago
-    ).group_by(
-        func.date(Application.applied_at)
-    ).all()
+    # Applications over time (last 30 days)
+    recent_applications = analytics_service.get_trends(db, "applications", bucket="day")
     
     return {
         "total_applications": total_applications,
@@ -471,6 +511,6 @@ def get_application_statistics(
             name: count for name, count in program_stats
         },
         "recent_applications": {
-            str(date): count for date, count in recent_applications
+            point["bucket"]: point["total"] for point in recent_applications["series"]
         }
     }
\ No newline at end of file
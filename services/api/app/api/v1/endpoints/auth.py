@@ -1,19 +1,19 @@
-from datetime import timedelta
-from typing import Any
+from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.core import security
-from app.core.config import settings
+from app.core.rate_limit import rate_limiter
 from app.core.security import get_password_hash
 from app.crud.crud_user import user
 from app.models.user import User
-from app.schemas.auth import Token, Login, Register, PasswordReset, PasswordResetConfirm
+from app.schemas.auth import Token, Login, Register, PasswordReset, PasswordResetConfirm, RefreshToken
 from app.schemas.user import UserCreate, UserRead
 from app.schemas.common import MessageResponse
 from app.services.auth_service import auth_service
+from app.services.token_service import token_service
 from app.services.user_service import user_service
 from app.services.notification_service import notification_service
 from app.services.audit_service import audit_service
@@ -22,7 +22,7 @@ from app.utils.helpers import generate_otp
 
 router = APIRouter()
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(deps.rate_limit("login"))])
 def login_access_token(
     db: Session = Depends(deps.get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
@@ -30,6 +30,8 @@ def login_access_token(
     """
     OAuth2 compatible token login, get an access token for future requests
     """
+    rate_limiter.check("login_account", form_data.username.lower())
+    
     user_obj = auth_service.authenticate_user(
         db, email=form_data.username, password=form_data.password
     )
@@ -45,10 +47,7 @@ def login_access_token(
             detail="Inactive user"
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth_service.create_access_token(
-        data={"sub": user_obj.email}, expires_delta=access_token_expires
-    )
+    tokens = token_service.issue_tokens(db, user_obj)
     
     # Log successful login
     audit_service.log_user_login(
@@ -58,21 +57,9 @@ def login_access_token(
         user_agent=""   # TODO: Get from request
     )
     
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-        "user": {
-            "id": user_obj.id,
-            "email": user_obj.email,
-            "first_name": user_obj.first_name,
-            "last_name": user_obj.last_name,
-            "role": user_obj.role,
-            "is_active": user_obj.is_active
-        }
-    }
+    return tokens
 
-@router.post("/login/json", response_model=Token)
+@router.post("/login/json", response_model=Token, dependencies=[Depends(deps.rate_limit("login"))])
 def login_json(
     db: Session = Depends(deps.get_db),
     login_data: Login = Body(...)
@@ -86,6 +73,8 @@ def login_json(
             detail="Invalid email format"
         )
     
+    rate_limiter.check("login_account", login_data.email.lower())
+    
     user_obj = auth_service.authenticate_user(
         db, email=login_data.email, password=login_data.password
     )
@@ -100,10 +89,7 @@ def login_json(
             detail="Inactive user"
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth_service.create_access_token(
-        data={"sub": user_obj.email}, expires_delta=access_token_expires
-    )
+    tokens = token_service.issue_tokens(db, user_obj)
     
     # Log successful login
     audit_service.log_user_login(
@@ -113,21 +99,9 @@ def login_json(
         user_agent=""   # TODO: Get from request
     )
     
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-        "user": {
-            "id": user_obj.id,
-            "email": user_obj.email,
-            "first_name": user_obj.first_name,
-            "last_name": user_obj.last_name,
-            "role": user_obj.role,
-            "is_active": user_obj.is_active
-        }
-    }
+    return tokens
 
-@router.post("/register", response_model=UserRead)
+@router.post("/register", response_model=UserRead, dependencies=[Depends(deps.rate_limit("register"))])
 def register(
     *,
     db: Session = Depends(deps.get_db),
@@ -182,14 +156,32 @@ def register(
             detail=str(e)
         )
 
+@router.post("/refresh", response_model=Token)
+def refresh_access_token(
+    *,
+    db: Session = Depends(deps.get_db),
+    refresh_data: RefreshToken
+) -> Any:
+    """
+    Exchange a refresh token for a new access token and refresh token
+    """
+    user_obj, tokens = token_service.rotate_refresh_token(db, refresh_data.refresh_token)
+    return tokens
+
 @router.post("/logout", response_model=MessageResponse)
 def logout(
     current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(deps.get_db)
+    token_payload: dict = Depends(deps.get_token_payload),
+    db: Session = Depends(deps.get_db),
+    refresh_token: Optional[str] = Body(None, embed=True)
 ) -> Any:
     """
-    Logout current user
+    Logout current user, revoking the access token and the refresh token's session
     """
+    token_service.revoke_access_token(token_payload)
+    if refresh_token:
+        token_service.revoke_refresh_token(db, refresh_token, current_user.id)
+    
     # Log logout action
     audit_service.log_user_logout(
         db=db,
@@ -207,7 +199,7 @@ def test_token(current_user: User = Depends(deps.get_current_user)) -> Any:
     """
     return current_user
 
-@router.post("/password-reset", response_model=MessageResponse)
+@router.post("/password-reset", response_model=MessageResponse, dependencies=[Depends(deps.rate_limit("password_reset"))])
 def password_reset(
     *,
     db: Session = Depends(deps.get_db),
@@ -222,6 +214,8 @@ def password_reset(
             detail="Invalid email format"
         )
     
+    rate_limiter.check("password_reset_account", password_reset_data.email.lower())
+    
     user_obj = user.get_by_email(db, email=password_reset_data.email)
     if not user_obj:
         # Don't reveal if email exists or not for security
@@ -256,7 +250,7 @@ def password_reset(
     
     return {"message": "If the email exists, a password reset link has been sent"}
 
-@router.post("/password-reset/confirm", response_model=MessageResponse)
+@router.post("/password-reset/confirm", response_model=MessageResponse, dependencies=[Depends(deps.rate_limit("password_reset"))])
 def password_reset_confirm(
     *,
     db: Session = Depends(deps.get_db),
@@ -292,6 +286,9 @@ def password_reset_confirm(
     user_obj.password_reset_token = None  # Clear reset token
     db.commit()
     
+    # Sign out every existing session
+    token_service.revoke_all_for_user(db, user_obj.id)
+    
     # Log password change
     audit_service.log_password_change(
         db=db,
@@ -324,7 +321,7 @@ def change_password(
     Change password for authenticated user
     """
     # Verify current password
-    if not auth_service.verify_password(current_password, current_user.hashed_password):
+    if not security.verify_password(current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password"
@@ -345,6 +342,9 @@ def change_password(
     current_user.hashed_password = get_password_hash(new_password)
     db.commit()
     
+    # Sign out every existing session
+    token_service.revoke_all_for_user(db, current_user.id)
+    
     # Log password change
     audit_service.log_password_change(
         db=db,
@@ -409,10 +409,7 @@ def firebase_login(
             detail="Inactive user"
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth_service.create_access_token(
-        data={"sub": user_obj.email}, expires_delta=access_token_expires
-    )
+    tokens = token_service.issue_tokens(db, user_obj)
     
     # Log successful login
     audit_service.log_user_login(
@@ -422,16 +419,4 @@ def firebase_login(
         user_agent=""   # TODO: Get from request
     )
     
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-        "user": {
-            "id": user_obj.id,
-            "email": user_obj.email,
-            "first_name": user_obj.first_name,
-            "last_name": user_obj.last_name,
-            "role": user_obj.role,
-            "is_active": user_obj.is_active
-        }
-    }
\ No newline at end of file
+    return tokens
\ No newline at end of file
@@ -1,20 +1,29 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Any, List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.api import deps
 from app.core.config import settings
+from app.core.exceptions import ConflictError, NotFoundError, PreconditionFailedError
 from app.models.user import User
 from app.models.beneficiary import Beneficiary
 from app.models.program import Program
-from app.models.application import Application
-from app.schemas.beneficiary import Beneficiary as BeneficiaryRead, BeneficiaryCreate, BeneficiaryUpdate
+from app.schemas.beneficiary import (
+    Beneficiary as BeneficiaryRead,
+    BeneficiaryCreate,
+    BeneficiaryUpdate,
+    BeneficiaryBatchEnroll,
+    BeneficiaryBatchEnrollResult
+)
 from app.schemas.common import PaginatedResponse, ResponseModel
 from app.services.audit_service import audit_service
+from app.services.beneficiary_service import beneficiary_service
+from app.services.idempotency_service import idempotency_service
+from app.services.notification_service import notification_service
 from app.crud.beneficiary import beneficiary
-from app.utils.validators import validate_phone
-from app.utils.formatters import format_phone_number
+from app.utils.formatters import format_etag
 
 router = APIRouter()
 
@@ -48,67 +57,73 @@ def create_beneficiary(
     db: Session = Depends(deps.get_db),
     beneficiary_in: BeneficiaryCreate,
     current_user: User = Depends(deps.get_current_staff_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ) -> Any:
     """
-    Create new beneficiary (Staff only).
+    Create new beneficiary (Staff only). Retries with the same
+    Idempotency-Key get the first response back.
     """
-    # Validate program exists
-    program = db.query(Program).filter(Program.id == beneficiary_in.program_id).first()
-    if not program:
+    return idempotency_service.run(
+        db, current_user.id, idempotency_key, "POST /beneficiaries", beneficiary_in,
+        lambda: _create_beneficiary(db, beneficiary_in, current_user),
+        response_model=BeneficiaryRead
+    )
+
+
+def _create_beneficiary(db: Session, beneficiary_in: BeneficiaryCreate, current_user: User) -> Beneficiary:
+    try:
+        return beneficiary_service.create_beneficiary(db, beneficiary_in, created_by=current_user.id)
+    except NotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Program not found"
+            detail=str(e)
         )
-    
-    # Validate application exists and is approved
-    application = db.query(Application).filter(
-        Application.id == beneficiary_in.application_id,
-        Application.status == "approved"
-    ).first()
-    if not application:
+    except ConflictError as e:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Approved application not found"
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
         )
-    
-    # Check if beneficiary already exists for this application
-    existing_beneficiary = db.query(Beneficiary).filter(
-        Beneficiary.application_id == beneficiary_in.application_id
-    ).first()
-    if existing_beneficiary:
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Beneficiary already exists for this application"
+            detail=str(e)
         )
-    
-    # Validate phone number if provided
-    if beneficiary_in.emergency_contact_phone:
-        if not validate_phone(beneficiary_in.emergency_contact_phone):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid emergency contact phone number"
-            )
-        beneficiary_in.emergency_contact_phone = format_phone_number(beneficiary_in.emergency_contact_phone)
-    
+
+
+@router.post("/enroll-batch", response_model=BeneficiaryBatchEnrollResult)
+def enroll_beneficiaries_batch(
+    *,
+    db: Session = Depends(deps.get_db),
+    enroll_in: BeneficiaryBatchEnroll,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(deps.get_current_staff_user),
+) -> Any:
+    """
+    Enroll approved applicants as beneficiaries in bulk (Staff only).
+    Pass a program ID to enroll all of its approved applicants, or a list of
+    application IDs. Confirmation emails are sent as one batch after the response.
+    """
     try:
-        # Create beneficiary
-        new_beneficiary = beneficiary.create(db=db, obj_in=beneficiary_in)
-        
-        # Log audit trail
-        audit_service.log_action(
+        result = beneficiary_service.enroll_batch(
             db=db,
-            user_id=current_user.id,
-            action="BENEFICIARY_CREATED",
-            details=f"Beneficiary created for application {beneficiary_in.application_id}"
+            created_by=current_user.id,
+            program_id=enroll_in.program_id,
+            application_ids=enroll_in.application_ids,
+            enrollment_date=enroll_in.enrollment_date
         )
-        
-        return new_beneficiary
-        
-    except Exception as e:
+    except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to create beneficiary"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if result["notifications"]:
+        background_tasks.add_task(
+            notification_service.send_enrollment_confirmations,
+            result["notifications"]
         )
+    
+    return result
 
 
 @router.get("/{beneficiary_id}", response_model=BeneficiaryRead)
@@ -116,12 +131,14 @@ def get_beneficiary(
     *,
     db: Session = Depends(deps.get_db),
     beneficiary_id: int,
+    response: Response,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Get beneficiary by ID.
+    Get beneficiary by ID. The ETag header carries the version to send
+    back in If-Match when updating.
     """
-    beneficiary_obj = beneficiary.get(db=db, id=beneficiary_id)
+    beneficiary_obj = beneficiary_service.get_beneficiary(db, beneficiary_id)
     if not beneficiary_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -138,6 +155,7 @@ def get_beneficiary(
             detail="Not enough permissions"
         )
     
+    response.headers["ETag"] = format_etag(beneficiary_obj.version)
     return beneficiary_obj
 
 
@@ -147,44 +165,48 @@ def update_beneficiary(
     db: Session = Depends(deps.get_db),
     beneficiary_id: int,
     beneficiary_in: BeneficiaryUpdate,
+    response: Response,
+    if_match: Optional[int] = Depends(deps.get_if_match),
     current_user: User = Depends(deps.get_current_staff_user),
 ) -> Any:
     """
-    Update beneficiary (Staff only).
+    Update beneficiary (Staff only). Send the ETag from a previous read as
+    If-Match; if the beneficiary changed since, the update is rejected with 412.
     """
-    beneficiary_obj = beneficiary.get(db=db, id=beneficiary_id)
-    if not beneficiary_obj:
+    try:
+        updated_beneficiary = beneficiary_service.update_beneficiary(
+            db,
+            beneficiary_id,
+            beneficiary_in,
+            updated_by=current_user.id,
+            expected_version=if_match
+        )
+    except PreconditionFailedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if not updated_beneficiary:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Beneficiary not found"
         )
     
-    # Validate phone number if provided
-    if beneficiary_in.emergency_contact_phone:
-        if not validate_phone(beneficiary_in.emergency_contact_phone):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid emergency contact phone number"
-            )
-        beneficiary_in.emergency_contact_phone = format_phone_number(beneficiary_in.emergency_contact_phone)
-    
-    try:
-        updated_beneficiary = beneficiary.update(db=db, db_obj=beneficiary_obj, obj_in=beneficiary_in)
-        
-        # Log audit trail
-        audit_service.log_action(
-            db=db,
-            user_id=current_user.id,
-            action="BENEFICIARY_UPDATED",
-            details=f"Beneficiary {beneficiary_id} updated"
-        )
-        
-        return updated_beneficiary
-        
-    except Exception as e:
+    response.headers["ETag"] = format_etag(updated_beneficiary.version)
+    return updated_beneficiary
+
+
+def _check_version(beneficiary_obj: Beneficiary, if_match: Optional[int]) -> None:
+    if if_match is not None and beneficiary_obj.version != if_match:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to update beneficiary"
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Beneficiary was modified by another request"
         )
 
 
@@ -206,17 +228,8 @@ def delete_beneficiary(
         )
     
     try:
-        # Soft delete beneficiary
-        beneficiary_obj.is_active = False
-        db.commit()
-        
-        # Log audit trail
-        audit_service.log_action(
-            db=db,
-            user_id=current_user.id,
-            action="BENEFICIARY_DELETED",
-            details=f"Beneficiary {beneficiary_id} deleted"
-        )
+        # Soft delete, moving the participant count and barangay rollup with it
+        beneficiary_service.delete_beneficiary(db, beneficiary_id, deleted_by=current_user.id)
         
         return ResponseModel(
             success=True,
@@ -291,18 +304,22 @@ def complete_beneficiary(
     *,
     db: Session = Depends(deps.get_db),
     beneficiary_id: int,
+    response: Response,
+    if_match: Optional[int] = Depends(deps.get_if_match),
     current_user: User = Depends(deps.get_current_staff_user),
 ) -> Any:
     """
     Mark beneficiary as completed (Staff only).
     """
-    beneficiary_obj = beneficiary.get(db=db, id=beneficiary_id)
+    beneficiary_obj = beneficiary_service.get_beneficiary(db, beneficiary_id)
     if not beneficiary_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Beneficiary not found"
         )
     
+    _check_version(beneficiary_obj, if_match)
+    
     if beneficiary_obj.status == "completed":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -314,13 +331,16 @@ def complete_beneficiary(
         beneficiary_obj.status = "completed"
         beneficiary_obj.completion_date = func.now()
         db.commit()
+        response.headers["ETag"] = format_etag(beneficiary_obj.version)
         
         # Log audit trail
         audit_service.log_action(
             db=db,
             user_id=current_user.id,
             action="BENEFICIARY_COMPLETED",
-            details=f"Beneficiary {beneficiary_id} marked as completed"
+            resource_type="Beneficiary",
+            resource_id=beneficiary_id,
+            description=f"Beneficiary {beneficiary_id} marked as completed"
         )
         
         return ResponseModel(
@@ -328,6 +348,12 @@ def complete_beneficiary(
             message="Beneficiary marked as completed successfully"
         )
         
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Beneficiary was modified by another request"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -340,18 +366,22 @@ def suspend_beneficiary(
     *,
     db: Session = Depends(deps.get_db),
     beneficiary_id: int,
+    response: Response,
+    if_match: Optional[int] = Depends(deps.get_if_match),
     current_user: User = Depends(deps.get_current_staff_user),
 ) -> Any:
     """
     Suspend beneficiary (Staff only).
     """
-    beneficiary_obj = beneficiary.get(db=db, id=beneficiary_id)
+    beneficiary_obj = beneficiary_service.get_beneficiary(db, beneficiary_id)
     if not beneficiary_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Beneficiary not found"
         )
     
+    _check_version(beneficiary_obj, if_match)
+    
     if beneficiary_obj.status == "suspended":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -362,13 +392,16 @@ def suspend_beneficiary(
         # Update beneficiary status
         beneficiary_obj.status = "suspended"
         db.commit()
+        response.headers["ETag"] = format_etag(beneficiary_obj.version)
         
         # Log audit trail
         audit_service.log_action(
             db=db,
             user_id=current_user.id,
             action="BENEFICIARY_SUSPENDED",
-            details=f"Beneficiary {beneficiary_id} suspended"
+            resource_type="Beneficiary",
+            resource_id=beneficiary_id,
+            description=f"Beneficiary {beneficiary_id} suspended"
         )
         
         return ResponseModel(
@@ -376,6 +409,12 @@ def suspend_beneficiary(
             message="Beneficiary suspended successfully"
         )
         
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Beneficiary was modified by another request"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -388,18 +427,22 @@ def reactivate_beneficiary(
     *,
     db: Session = Depends(deps.get_db),
     beneficiary_id: int,
+    response: Response,
+    if_match: Optional[int] = Depends(deps.get_if_match),
     current_user: User = Depends(deps.get_current_staff_user),
 ) -> Any:
     """
     Reactivate suspended beneficiary (Staff only).
     """
-    beneficiary_obj = beneficiary.get(db=db, id=beneficiary_id)
+    beneficiary_obj = beneficiary_service.get_beneficiary(db, beneficiary_id)
     if not beneficiary_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Beneficiary not found"
         )
     
+    _check_version(beneficiary_obj, if_match)
+    
     if beneficiary_obj.status != "suspended":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -410,13 +453,16 @@ def reactivate_beneficiary(
         # Update beneficiary status
         beneficiary_obj.status = "active"
         db.commit()
+        response.headers["ETag"] = format_etag(beneficiary_obj.version)
         
         # Log audit trail
         audit_service.log_action(
             db=db,
             user_id=current_user.id,
             action="BENEFICIARY_REACTIVATED",
-            details=f"Beneficiary {beneficiary_id} reactivated"
+            resource_type="Beneficiary",
+            resource_id=beneficiary_id,
+            description=f"Beneficiary {beneficiary_id} reactivated"
         )
         
         return ResponseModel(
@@ -424,6 +470,12 @@ def reactivate_beneficiary(
             message="Beneficiary reactivated successfully"
         )
         
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Beneficiary was modified by another request"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
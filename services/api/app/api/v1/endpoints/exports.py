@@ -0,0 +1,90 @@
+"""Report Export Endpoints"""
+import asyncio
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path as FilePath
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, Path, Query, Request, status
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.api import deps
+from app.core.permissions import Permission, Principal
+from app.schemas.jobs import Job
+from app.services.export_service import EXPORT_FORMATS, export_service
+
+router = APIRouter()
+
+KIND_PATTERN = "^(applications|beneficiaries)$"
+FORMAT_PATTERN = "^(csv|xlsx)$"
+
+
+@router.get("/{kind}")
+async def export_records(
+    *,
+    request: Request,
+    kind: str = Path(..., regex=KIND_PATTERN),
+    format: str = Query("csv", regex=FORMAT_PATTERN),
+    program_id: Optional[int] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    current_user: Principal = Depends(deps.require_permission(Permission.VIEW_REPORTS)),
+) -> Any:
+    """
+    Export applications or beneficiaries with their user and program fields (Staff/Admin only).
+    CSV is streamed as it is read; XLSX is built on disk first.
+    """
+    export_service.validate(kind, format)
+    filters = {"program_id": program_id, "status": status_filter}
+    ip_address = deps.get_client_ip(request)
+    filename = f"{kind}-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+
+    if format == "csv":
+        return StreamingResponse(
+            export_service.stream_csv(kind, current_user.id, ip_address, **filters),
+            media_type=EXPORT_FORMATS["csv"],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+    fd, tmp_name = tempfile.mkstemp(suffix=".xlsx", dir=export_service.export_dir)
+    os.close(fd)
+    tmp_path = FilePath(tmp_name)
+    try:
+        await asyncio.to_thread(
+            export_service.export_to_file, kind, format, tmp_path, current_user.id, ip_address, **filters
+        )
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return FileResponse(
+        tmp_path,
+        media_type=EXPORT_FORMATS["xlsx"],
+        filename=filename,
+        background=BackgroundTask(tmp_path.unlink, missing_ok=True)
+    )
+
+
+@router.post("/{kind}/jobs", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+def start_export_job(
+    *,
+    request: Request,
+    kind: str = Path(..., regex=KIND_PATTERN),
+    format: str = Query("csv", regex=FORMAT_PATTERN),
+    program_id: Optional[int] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    current_user: Principal = Depends(deps.require_permission(Permission.VIEW_REPORTS)),
+) -> Any:
+    """
+    Run an export in the background (Staff/Admin only).
+    Poll the returned job under /jobs and download the file once it has completed.
+    """
+    return export_service.submit_export(
+        kind,
+        format,
+        current_user.id,
+        deps.get_client_ip(request),
+        program_id=program_id,
+        status=status_filter
+    )
@@ -0,0 +1,87 @@
+"""Bulk Data Import Endpoints"""
+from typing import Any
+from fastapi import APIRouter, Depends, File, HTTPException, Path, Query, UploadFile, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.imports import ImportSummary
+from app.services.import_service import import_service
+
+router = APIRouter()
+
+
+@router.post("/{kind}", response_model=ImportSummary)
+def import_records(
+    *,
+    db: Session = Depends(deps.get_db),
+    kind: str = Path(..., regex="^(users|beneficiaries)$"),
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False, description="Validate and merge, then roll back"),
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Import users or beneficiaries from a CSV or XLSX file (Admin only).
+    Invalid rows are skipped and listed in an error report.
+    """
+    try:
+        import_id, file_path = import_service.new_import_path(file.filename or "")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # Stream the upload to disk instead of holding it in memory
+    size = 0
+    with open(file_path, "wb") as f:
+        while chunk := file.file.read(1024 * 1024):
+            size += len(chunk)
+            if size > settings.IMPORT_MAX_FILE_SIZE:
+                f.close()
+                file_path.unlink(missing_ok=True)
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Import file is too large"
+                )
+            f.write(chunk)
+    
+    try:
+        return import_service.import_file(
+            db=db,
+            import_id=import_id,
+            path=file_path,
+            kind=kind,
+            imported_by=current_user.id,
+            dry_run=dry_run
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/{import_id}/errors")
+def download_import_errors(
+    *,
+    import_id: str,
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Download the error report of an import as CSV (Admin only).
+    """
+    report_path = import_service.error_report_path(import_id)
+    if not report_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Error report not found"
+        )
+    
+    return FileResponse(
+        report_path,
+        media_type="text/csv",
+        filename=f"import-{import_id}-errors.csv"
+    )
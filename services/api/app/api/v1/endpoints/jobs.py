@@ -0,0 +1,48 @@
+"""Background Job Endpoints"""
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import FileResponse
+
+from app.api import deps
+from app.core.permissions import Permission, Principal
+from app.schemas.jobs import Job
+from app.services.job_service import job_service
+
+router = APIRouter()
+
+ARTIFACT_MEDIA_TYPES = {
+    ".csv": "text/csv",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".pdf": "application/pdf",
+}
+
+
+@router.get("/{job_id}", response_model=Job)
+def get_job(
+    *,
+    job_id: str,
+    current_user: Principal = Depends(deps.require_permission(Permission.VIEW_REPORTS)),
+) -> Any:
+    """
+    Get the status and progress of a report or export job started by the current user.
+    """
+    return job_service.get_job(job_id, current_user.id)
+
+
+@router.get("/{job_id}/download")
+def download_job_artifact(
+    *,
+    job_id: str,
+    current_user: Principal = Depends(deps.require_permission(Permission.VIEW_REPORTS)),
+) -> Any:
+    """
+    Download the file of a completed job.
+    """
+    job = job_service.get_job(job_id, current_user.id)
+    path = job_service.get_artifact(job)
+    return FileResponse(
+        path,
+        media_type=ARTIFACT_MEDIA_TYPES.get(path.suffix, "application/octet-stream"),
+        filename=job["download_name"]
+    )
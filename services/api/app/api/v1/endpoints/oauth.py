@@ -4,9 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.core.config import settings
 from app.services.gitlab_oauth_service import gitlab_oauth_service
-from app.services.auth_service import auth_service
+from app.services.token_service import token_service
 from app.services.user_service import user_service
 from app.schemas.auth import Token
 from app.schemas.user import UserCreate
@@ -63,24 +62,11 @@ async def gitlab_callback(
             )
             user_obj = user_service.create_user(db, user_create=user_create)
         
-        # Create JWT token for our application
-        app_token = auth_service.create_access_token(
-            data={"sub": str(user_obj.id)}
-        )
+        # Create JWT tokens for our application
+        tokens = token_service.issue_tokens(db, user_obj)
+        tokens["user"]["gitlab_username"] = user_obj.gitlab_username
         
-        return {
-            "access_token": app_token,
-            "token_type": "bearer",
-            "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-            "user": {
-                "id": user_obj.id,
-                "email": user_obj.email,
-                "first_name": user_obj.first_name,
-                "last_name": user_obj.last_name,
-                "role": user_obj.role,
-                "gitlab_username": user_obj.gitlab_username
-            }
-        }
+        return tokens
         
     except Exception as e:
         raise HTTPException(
@@ -1,16 +1,24 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_
 
 from app.api import deps
 from app.core.config import settings
+from app.core.exceptions import ConflictError, NotFoundError
+from app.core.permissions import Principal
+from app.core.waiting_room import waiting_room
 from app.models.user import User
 from app.models.program import Program
 from app.schemas.program import ProgramRead, ProgramCreate, ProgramUpdate
+from app.schemas.application import ApplicationCreate
 from app.schemas.common import PaginatedResponse, ResponseModel
+from app.services.application_service import application_service
 from app.services.program_service import program_service
+from app.services.seat_service import seat_service
 from app.services.audit_service import audit_service
+from app.services.idempotency_service import idempotency_service
+from app.services.notification_service import notification_service
 from app.utils.validators import validate_program_title, validate_budget_amount
 from app.utils.formatters import format_currency, format_program_code
 
@@ -216,70 +224,142 @@ def delete_program(
         message="Program deleted successfully"
     )
 
+@router.post("/{program_id}/waiting-room", response_model=Dict[str, Any])
+def join_waiting_room(
+    *,
+    program_id: int,
+    current_user: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Join a program's waiting room, or get back your existing place in it.
+    Send the returned token as X-Waiting-Room-Token when polling and applying.
+    """
+    return waiting_room.join(program_id, current_user.id)
+
+
+@router.get("/{program_id}/waiting-room", response_model=Dict[str, Any])
+def get_waiting_room_status(
+    *,
+    program_id: int,
+    current_user: Principal = Depends(deps.get_current_principal),
+    waiting_room_token: str = Header(..., alias="X-Waiting-Room-Token"),
+) -> Any:
+    """
+    Get your position in a program's waiting room. Poll no more often than
+    ``poll_after_seconds``; apply once ``admitted`` is true.
+    """
+    room_status = waiting_room.get_status(program_id, waiting_room_token, current_user.id)
+    if room_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid waiting room token"
+        )
+    return room_status
+
+
 @router.post("/{program_id}/apply", response_model=ResponseModel)
 def apply_to_program(
     *,
+    admission: None = Depends(deps.require_admission),
     db: Session = Depends(deps.get_db),
     program_id: int,
     current_user: User = Depends(deps.get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ) -> Any:
     """
-    Apply to a program.
+    Apply to a program. While the program's waiting room is open, only
+    admitted applicants get through. Retries with the same Idempotency-Key
+    get the first response back.
     """
-    program = program_service.get_program(db, program_id)
-    if not program:
+    return idempotency_service.run(
+        db, current_user.id, idempotency_key, "POST /programs/{program_id}/apply", {"program_id": program_id},
+        lambda: _apply_to_program(db, program_id, current_user),
+        response_model=ResponseModel
+    )
+
+
+def _apply_to_program(db: Session, program_id: int, current_user: User) -> ResponseModel:
+    try:
+        # Reserves a seat, or waitlists the applicant when the program is full
+        application = application_service.create_application(
+            db=db,
+            application_create=ApplicationCreate(program_id=program_id),
+            user_id=current_user.id
+        )
+    except NotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Program not found"
+            detail=str(e)
         )
-    
-    if not program.is_active:
+    except ConflictError as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Program is not active"
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
         )
-    
-    # Check if user already applied
-    from app.models.application import Application
-    existing_application = db.query(Application).filter(
-        Application.user_id == current_user.id,
-        Application.program_id == program_id
-    ).first()
-    
-    if existing_application:
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have already applied to this program"
+            detail=str(e)
         )
     
-    # Create application
-    application_data = {
-        "user_id": current_user.id,
-        "program_id": program_id,
-        "status": "pending"
-    }
-    
-    application = Application(**application_data)
-    db.add(application)
-    db.commit()
-    db.refresh(application)
-    
-    # Log audit trail
-    audit_service.log_action(
-        db=db,
-        user_id=current_user.id,
-        action="apply_to_program",
-        resource_type="application",
-        resource_id=application.id,
-        details={"program_id": program_id}
-    )
-    
+    waitlist_position = seat_service.waitlist_position(db, application)
     return ResponseModel(
         success=True,
-        message="Application submitted successfully",
-        data={"application_id": application.id}
+        message=(
+            "Application submitted successfully" if waitlist_position is None
+            else f"Program is full; you are number {waitlist_position} on the waitlist"
+        ),
+        data={
+            "application_id": application.id,
+            "status": application.status,
+            "waitlist_position": waitlist_position
+        }
     )
 
+@router.get("/{program_id}/seats", response_model=Dict[str, Any])
+def get_program_seats(
+    *,
+    db: Session = Depends(deps.get_db),
+    program_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get a program's capacity, reserved and available seats, and waitlist length.
+    """
+    seats = seat_service.get_seats(db, program_id)
+    if not seats:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Program not found"
+        )
+    return seats
+
+
+@router.post("/{program_id}/seats/reconcile", response_model=Dict[str, Any])
+def reconcile_program_seats(
+    *,
+    db: Session = Depends(deps.get_db),
+    program_id: int,
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Recount a program's reserved seats from its applications and promote
+    waitlisted applicants into any free seats (Admin only).
+    """
+    if not program_service.get_program(db, program_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Program not found"
+        )
+    
+    promoted_ids = seat_service.reconcile(db, [program_id])
+    db.commit()
+    if promoted_ids:
+        notification_service.send_waitlist_promotions(seat_service.promotion_notifications(db, promoted_ids))
+    
+    return {**seat_service.get_seats(db, program_id), "promoted": promoted_ids}
+
+
 @router.get("/my/applications")
 def get_my_applications(
     db: Session = Depends(deps.get_db),
@@ -363,6 +443,8 @@ def activate_program(
     
     program.is_active = True
     db.commit()
+    # Activation announces the program; queue the rush instead of the DB
+    waiting_room.open(program_id)
     
     # Log audit trail
     audit_service.log_action(
@@ -399,6 +481,7 @@ def deactivate_program(
     
     program.is_active = False
     db.commit()
+    waiting_room.close(program_id)
     
     # Log audit trail
     audit_service.log_action(
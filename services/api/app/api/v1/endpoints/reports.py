@@ -0,0 +1,33 @@
+"""Report Generation Endpoints"""
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api import deps
+from app.core.permissions import Permission, Principal
+from app.schemas.jobs import Job
+from app.schemas.reports import QuarterlyReportCreate
+from app.services.report_service import report_service
+
+router = APIRouter()
+
+
+@router.post("/quarterly", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+def generate_quarterly_report(
+    *,
+    report_in: QuarterlyReportCreate,
+    current_user: Principal = Depends(deps.require_permission(Permission.VIEW_REPORTS)),
+) -> Any:
+    """
+    Generate a quarterly accomplishment report in the background (Staff/Admin only).
+    Poll the returned job under /jobs for progress and download the report once it has completed.
+    """
+    try:
+        return report_service.submit_quarterly_report(
+            report_in.year, report_in.quarter, report_in.format, current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
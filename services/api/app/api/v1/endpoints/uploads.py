@@ -0,0 +1,115 @@
+"""Resumable Upload Endpoints"""
+from typing import Any
+from fastapi import APIRouter, Depends, Header, Request, Response, status
+
+from app.api import deps
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.common import ResponseModel
+from app.schemas.upload import ResumableUploadCreate, ResumableUploadStatus, FileInfo
+from app.services.upload_service import upload_service
+
+router = APIRouter()
+
+
+def _progress_headers(upload_status: dict) -> dict:
+    return {
+        "Upload-Offset": str(upload_status["offset"]),
+        "Upload-Length": str(upload_status["total_size"]),
+        "Upload-Expires": upload_status["expires_at"],
+        "Cache-Control": "no-store"
+    }
+
+
+@router.post("/", response_model=ResumableUploadStatus, status_code=status.HTTP_201_CREATED)
+def create_upload(
+    *,
+    response: Response,
+    upload_in: ResumableUploadCreate,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Start a resumable upload. Send the file with PATCH requests afterwards.
+    """
+    upload_status = upload_service.create_upload(
+        filename=upload_in.filename,
+        total_size=upload_in.total_size,
+        content_type=upload_in.content_type,
+        subfolder=upload_in.subfolder,
+        user_id=current_user.id
+    )
+    response.headers["Location"] = f"{settings.API_V1_STR}/uploads/{upload_status['upload_id']}"
+    response.headers.update(_progress_headers(upload_status))
+    return upload_status
+
+
+@router.head("/{upload_id}")
+def get_upload_offset(
+    *,
+    upload_id: str,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Response:
+    """
+    Get the current offset of an upload so the client can resume from it.
+    """
+    upload_status = upload_service.get_status(upload_id, user_id=current_user.id)
+    return Response(status_code=status.HTTP_200_OK, headers=_progress_headers(upload_status))
+
+
+@router.get("/{upload_id}", response_model=ResumableUploadStatus)
+def get_upload_status(
+    *,
+    upload_id: str,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get upload progress.
+    """
+    return upload_service.get_status(upload_id, user_id=current_user.id)
+
+
+@router.patch("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def upload_chunk(
+    *,
+    request: Request,
+    upload_id: str,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Response:
+    """
+    Append a chunk of bytes starting at ``Upload-Offset``.
+
+    On a dropped connection, issue HEAD to learn the stored offset and resume.
+    """
+    upload_status = await upload_service.append_chunk(
+        upload_id,
+        offset=upload_offset,
+        chunks=request.stream(),
+        user_id=current_user.id
+    )
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=_progress_headers(upload_status))
+
+
+@router.post("/{upload_id}/complete", response_model=FileInfo)
+async def complete_upload(
+    *,
+    upload_id: str,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Finalise a fully received upload and store the file.
+    """
+    return await upload_service.finalize(upload_id, user_id=current_user.id)
+
+
+@router.delete("/{upload_id}", response_model=ResponseModel)
+async def cancel_upload(
+    *,
+    upload_id: str,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Abort an upload and discard the received bytes.
+    """
+    await upload_service.cancel(upload_id, user_id=current_user.id)
+    return ResponseModel(message="Upload cancelled")
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.core.config import settings
+from app.core.permissions import commit_permission_change
 from app.models.user import User
 from app.schemas.user import UserRead, UserCreate, UserUpdate
 from app.schemas.common import PaginatedResponse, ResponseModel
@@ -229,7 +230,7 @@ def activate_user(
         )
     
     user.is_active = True
-    db.commit()
+    commit_permission_change(db, user)
     
     # Log audit
     audit_service.log_action(
@@ -272,7 +273,7 @@ def deactivate_user(
         )
     
     user.is_active = False
-    db.commit()
+    commit_permission_change(db, user)
     
     # Log audit
     audit_service.log_action(
@@ -1,18 +1,38 @@
 """Core Configuration Package"""
 from app.core.config import settings
-from app.core.database import engine, AsyncSessionLocal, Base, get_db
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.database import engine, AsyncSessionLocal, SessionLocal, Base, get_db
+from app.core.security import (
+    get_password_hash,
+    verify_password,
+    verify_and_update_password,
+    create_access_token,
+    decode_access_token,
+    get_password_hash_stats
+)
+from app.core.permissions import Permission, Principal
+from app.core.rate_limit import rate_limiter
+from app.core.redis import get_redis
+from app.core.cache import cache
 from app.core.firebase import ensure_firebase_initialized, get_firebase_app
 
 __all__ = [
     "settings",
     "engine",
     "AsyncSessionLocal",
+    "SessionLocal",
     "Base",
     "get_db",
     "get_password_hash",
     "verify_password",
+    "verify_and_update_password",
     "create_access_token",
+    "decode_access_token",
+    "get_password_hash_stats",
+    "Permission",
+    "Principal",
+    "rate_limiter",
+    "get_redis",
+    "cache",
     "ensure_firebase_initialized",
     "get_firebase_app"
 ]
\ No newline at end of file
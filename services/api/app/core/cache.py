@@ -0,0 +1,110 @@
+"""JSON result cache, shared through Redis when available"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookups
+from app.core.redis import get_redis, mark_redis_unavailable
+
+CACHE_KEY_PREFIX = "cache:"
+
+
+class Cache:
+    """
+    Key/value cache for computed results such as analytics buckets.
+
+    Values are stored as JSON, so anything cached must be JSON serializable.
+    Entries without a ttl never expire; they are only evicted by Redis memory
+    policy or, in the in-process fallback, by the LRU bound. Invalidation is
+    done by bumping a generation counter that callers put in their keys.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> List[Any]:
+        """Get several values at once, None for misses"""
+        if not keys:
+            return []
+
+        client = get_redis()
+        if client is not None:
+            try:
+                raw_values = client.mget([CACHE_KEY_PREFIX + key for key in keys])
+                hits = sum(1 for raw in raw_values if raw is not None)
+                record_cache_lookups("redis", hits, len(keys) - hits)
+                return [json.loads(raw) if raw is not None else None for raw in raw_values]
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or (entry[1] is not None and entry[1] <= now):
+                    values.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                values.append(json.loads(entry[0]))
+        hits = sum(1 for value in values if value is not None)
+        record_cache_lookups("memory", hits, len(keys) - hits)
+        return values
+
+    def get(self, key: str) -> Any:
+        return self.get_many([key])[0]
+
+    def set_many(self, values: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Store several values, forever when ``ttl`` is None"""
+        if not values:
+            return
+
+        encoded = {key: json.dumps(value, default=str) for key, value in values.items()}
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            for key, raw in encoded.items():
+                self._entries[key] = (raw, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        client = get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for key, raw in encoded.items():
+                    pipe.set(CACHE_KEY_PREFIX + key, raw, ex=ttl)
+                pipe.execute()
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        self.set_many({key: value}, ttl)
+
+    def get_generation(self, namespace: str) -> int:
+        """Get the current generation of a namespace, 0 until first bumped"""
+        return int(self.get(f"{namespace}:generation") or 0)
+
+    def bump_generation(self, namespace: str) -> int:
+        """Invalidate every key built from the previous generation of a namespace"""
+        key = f"{namespace}:generation"
+        with self._lock:
+            entry = self._entries.get(key)
+            generation = int(json.loads(entry[0])) + 1 if entry else 1
+            self._entries[key] = (json.dumps(generation), None)
+
+        client = get_redis()
+        if client is not None:
+            try:
+                generation = max(generation, client.incr(CACHE_KEY_PREFIX + key))
+            except Exception as e:
+                mark_redis_unavailable(e)
+        return generation
+
+
+cache = Cache(max_entries=settings.CACHE_MAX_ENTRIES)
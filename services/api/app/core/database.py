@@ -1,6 +1,7 @@
+from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from .config import settings
 
 class Base(DeclarativeBase):
@@ -20,6 +21,11 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+# Sync engine for scheduled jobs and scripts that run outside a request
+sync_engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+
+SessionLocal = sessionmaker(bind=sync_engine, autoflush=False, expire_on_commit=False)
+
 # Dependency to get database session
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
@@ -0,0 +1,13 @@
+"""Domain errors raised by services and mapped to HTTP responses by endpoints"""
+
+
+class NotFoundError(ValueError):
+    """A referenced record does not exist or is not usable (404)"""
+
+
+class ConflictError(ValueError):
+    """The write conflicts with an existing record (409)"""
+
+
+class PreconditionFailedError(ValueError):
+    """The record changed since the version the client sent in If-Match (412)"""
@@ -0,0 +1,139 @@
+"""Prometheus metrics for requests, database access and caches"""
+import os
+from typing import Optional, Tuple
+
+from app.core.config import settings
+
+# prometheus_client picks its storage when metrics are created, so the
+# multiprocess directory has to be in the environment before the import
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from app.core.query_counter import RequestStats, add_query_listener  # noqa: E402
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Requests outside any route are grouped under one label to bound cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to produce the full response", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", ["method"], multiprocess_mode="livesum"
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size", ["method", "route"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database statements executed per request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Time spent in database statements per request", ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Database statement execution time", ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Connections per pool and state", ["pool", "state"], multiprocess_mode="livesum"
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "Cache lookups by backend and result", ["backend", "result"]
+)
+
+_DB_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "COPY"}
+
+_tracked_engines = []
+
+
+def _observe_query(statement: str, seconds: float) -> None:
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+    DB_QUERY_DURATION.labels(operation if operation in _DB_OPERATIONS else "OTHER").observe(seconds)
+
+
+if settings.METRICS_ENABLED:
+    add_query_listener(_observe_query)
+
+
+def track_pool(engine: Engine, name: str) -> None:
+    """Publish the connection pool usage of ``engine`` as ``db_pool_connections{pool=name}``"""
+    _tracked_engines.append((name, engine))
+
+
+def observe_pools() -> None:
+    """Publish this worker's connection pool usage"""
+    for name, engine in _tracked_engines:
+        pool = engine.pool
+        # Only QueuePool-style pools report usage
+        if not hasattr(pool, "checkedout"):
+            continue
+        DB_POOL_CONNECTIONS.labels(name, "checked_out").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels(name, "idle").set(pool.checkedin())
+        DB_POOL_CONNECTIONS.labels(name, "overflow").set(max(pool.overflow(), 0))
+        DB_POOL_CONNECTIONS.labels(name, "size").set(pool.size())
+
+
+def record_cache_lookups(backend: str, hits: int, misses: int) -> None:
+    if hits:
+        CACHE_LOOKUPS.labels(backend, "hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(backend, "miss").inc(misses)
+
+
+def observe_request(
+    method: str,
+    route: str,
+    status_code: int,
+    duration: float,
+    response_size: int,
+    stats: Optional[RequestStats]
+) -> None:
+    REQUESTS.labels(method, route, str(status_code)).inc()
+    REQUEST_DURATION.labels(method, route).observe(duration)
+    RESPONSE_SIZE.labels(method, route).observe(response_size)
+    if stats is not None:
+        REQUEST_DB_QUERIES.labels(method, route).observe(stats.queries)
+        REQUEST_DB_DURATION.labels(method, route).observe(stats.query_seconds)
+    observe_pools()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Metrics in the Prometheus text format. With PROMETHEUS_MULTIPROC_DIR
+    set, every worker writes its samples to that directory and any worker
+    can serve the aggregate of all of them.
+    """
+    observe_pools()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def shutdown_metrics() -> None:
+    """Drop this worker's live gauges from the aggregate"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,108 @@
+"""Role permissions carried as compact claims in access tokens"""
+import enum
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from app.core.token_store import token_store
+
+
+class Permission(enum.IntFlag):
+    """Permission bits, encoded in tokens as the integer ``perms`` claim"""
+    NONE = 0
+    APPLY = 1 << 0                  # Apply to programs, manage own applications
+    REVIEW_APPLICATIONS = 1 << 1
+    MANAGE_BENEFICIARIES = 1 << 2
+    VIEW_REPORTS = 1 << 3
+    MANAGE_PROGRAMS = 1 << 4
+    MANAGE_USERS = 1 << 5
+    MANAGE_ADMINS = 1 << 6
+    SYSTEM_ADMIN = 1 << 7           # Maintenance, backups, audit logs
+
+
+BENEFICIARY_PERMISSIONS = Permission.APPLY
+STAFF_PERMISSIONS = (
+    BENEFICIARY_PERMISSIONS
+    | Permission.REVIEW_APPLICATIONS
+    | Permission.MANAGE_BENEFICIARIES
+    | Permission.VIEW_REPORTS
+)
+ADMIN_PERMISSIONS = (
+    STAFF_PERMISSIONS
+    | Permission.MANAGE_PROGRAMS
+    | Permission.MANAGE_USERS
+    | Permission.SYSTEM_ADMIN
+)
+SUPER_ADMIN_PERMISSIONS = ADMIN_PERMISSIONS | Permission.MANAGE_ADMINS
+
+ROLE_PERMISSIONS: Dict[str, Permission] = {
+    "user": BENEFICIARY_PERMISSIONS,
+    "beneficiary": BENEFICIARY_PERMISSIONS,
+    "staff": STAFF_PERMISSIONS,
+    "admin": ADMIN_PERMISSIONS,
+    "super_admin": SUPER_ADMIN_PERMISSIONS,
+    "superadmin": SUPER_ADMIN_PERMISSIONS,
+}
+
+
+def role_name(role: Any) -> str:
+    """Normalise a role column value (plain string or UserRole) to its string form"""
+    return role.value if isinstance(role, enum.Enum) else str(role or "")
+
+
+def permissions_for_role(role: Any) -> Permission:
+    """Get the permission set granted to a role"""
+    return ROLE_PERMISSIONS.get(role_name(role), Permission.NONE)
+
+
+def permission_claims(user: Any) -> Dict[str, Any]:
+    """Claims describing a user's authorization, embedded in access tokens"""
+    return {
+        "uid": user.id,
+        "role": role_name(user.role),
+        "perms": int(permissions_for_role(user.role)),
+        "pv": user.permissions_version or 0,
+    }
+
+
+def commit_permission_change(db, user: Any) -> None:
+    """
+    Commit a change to a user's role or active status.
+
+    Bumps ``permissions_version`` and publishes it once committed, so tokens
+    minted with the previous version are rechecked against the database.
+    """
+    user.permissions_version = (user.permissions_version or 0) + 1
+    db.commit()
+    token_store.publish_permissions_version(user.id, user.permissions_version)
+
+
+@dataclass
+class Principal:
+    """Authenticated caller as described by access token claims"""
+    id: int
+    email: str
+    role: str
+    permissions: Permission
+    is_active: bool = True
+
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any]) -> "Principal":
+        return cls(
+            id=payload["uid"],
+            email=payload["sub"],
+            role=payload["role"],
+            permissions=Permission(payload["perms"]),
+        )
+
+    @classmethod
+    def from_user(cls, user: Any) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=role_name(user.role),
+            permissions=permissions_for_role(user.role),
+            is_active=user.is_active,
+        )
+
+    def has(self, permission: Permission) -> bool:
+        return (self.permissions & permission) == permission
@@ -0,0 +1,92 @@
+"""Sampling profiler for single requests, producing folded stacks for flamegraphs"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+
+def _frame_label(code: CodeType, roots: Tuple[str, ...]) -> str:
+    filename = code.co_filename
+    for root in roots:
+        if filename.startswith(root):
+            filename = filename[len(root):].lstrip(os.sep)
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of the threads serving one request every
+    ``interval`` seconds from a background thread.
+
+    The request's own thread (the event loop for async code) is always
+    sampled; other threads only while their stack runs through one of
+    ``target_codes()``, which for sync endpoints is the endpoint function
+    running in the threadpool. Concurrent async requests on the same event
+    loop can therefore show up too. Sampling stops after ``max_seconds``.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        max_seconds: float,
+        target_codes: Callable[[], FrozenSet[CodeType]] = frozenset
+    ):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.target_codes = target_codes
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.truncated = False
+        self._owner_thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval):
+            if time.monotonic() >= deadline:
+                self.truncated = True
+                return
+            self._sample(own_id, self.target_codes())
+
+    def _sample(self, own_id: int, target_codes: Iterable[CodeType]) -> None:
+        self.samples += 1
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            matched = thread_id == self._owner_thread_id
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                matched = matched or frame.f_code in target_codes
+                frame = frame.f_back
+            if matched:
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+
+    def folded(self) -> str:
+        """
+        One ``frame;frame;...;frame count`` line per distinct stack, the
+        input format of flamegraph.pl and speedscope.
+        """
+        roots = tuple(sorted({p for p in sys.path if p and os.path.isabs(p)}, key=len, reverse=True))
+        labels: Dict[CodeType, str] = {}
+        lines = []
+        for stack, count in self.stacks.most_common():
+            names = [labels.setdefault(code, _frame_label(code, roots)) for code in stack]
+            lines.append(f"{';'.join(names)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
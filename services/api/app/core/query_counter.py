@@ -0,0 +1,124 @@
+"""Per-request SQL statement counting and N+1 detection"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QueryListener = Callable[[str, float], None]
+
+
+class RequestStats:
+    """Database work done while handling one request"""
+
+    __slots__ = ("queries", "query_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        # Statements are compiled with bound parameters, so equal text means
+        # the same query shape run with different values
+        self.statements: Counter = Counter()
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes run at least ``threshold`` times, most frequent first"""
+        if threshold <= 0:
+            return []
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+# Shared with the threads sync endpoints run in, which get a copy of the context
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+# Replaced rather than mutated, so hooks can iterate without a lock
+_listeners: Tuple[QueryListener, ...] = ()
+
+
+def start_request_stats() -> Tuple[RequestStats, object]:
+    """Begin counting statements for the current request, returns the stats and reset token"""
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+
+def get_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def end_request_stats(token) -> None:
+    _request_stats.reset(token)
+
+
+def add_query_listener(listener: QueryListener) -> None:
+    """Call ``listener(statement, seconds)`` after every statement, in any context"""
+    global _listeners
+    _listeners = _listeners + (listener,)
+
+
+def remove_query_listener(listener: QueryListener) -> None:
+    global _listeners
+    _listeners = tuple(existing for existing in _listeners if existing is not listener)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+        stats.statements[statement] += 1
+
+    for listener in _listeners:
+        listener(statement, elapsed)
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    started = connection.info.get("query_started") if connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count and time every statement run on ``engine`` (pass ``AsyncEngine.sync_engine`` for async engines)"""
+    if event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[List[str]]:
+    """
+    Fail when the block runs more than ``max_queries`` statements, on any
+    thread, listing the repeated ones. Meant for endpoint tests:
+
+        with assert_max_queries(3):
+            client.get("/api/v1/admin/audit-logs", headers=admin_headers)
+    """
+    executed: List[str] = []
+
+    def listener(statement: str, seconds: float) -> None:
+        executed.append(statement)
+
+    add_query_listener(listener)
+    try:
+        yield executed
+    finally:
+        remove_query_listener(listener)
+
+    if len(executed) > max_queries:
+        repeated = [(statement, count) for statement, count in Counter(executed).most_common() if count > 1]
+        details = "".join(f"\n  {count}x {statement}" for statement, count in repeated)
+        raise AssertionError(
+            f"{len(executed)} queries executed, expected at most {max_queries}"
+            + (f"; repeated:{details}" if details else "")
+        )
@@ -0,0 +1,139 @@
+"""Sliding-window rate limiting backed by Redis, with an in-memory fallback"""
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.redis import get_redis, mark_redis_unavailable
+
+RATE_UNITS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 60 * 60,
+    "day": 60 * 60 * 24,
+}
+
+# Sliding log: drop hits outside the window, then admit if under the limit.
+# Returns {allowed, retry_after_seconds} in one round trip.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) >= limit then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    return {0, tostring(tonumber(oldest[2]) + window - now)}
+end
+redis.call('ZADD', key, now, ARGV[4])
+redis.call('PEXPIRE', key, math.ceil(window * 1000))
+return {1, '0'}
+"""
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parse a rate such as ``5/minute`` into ``(limit, window_seconds)``"""
+    count, _, unit = rate.partition("/")
+    unit = unit.strip().lower().rstrip("s")
+    if unit not in RATE_UNITS:
+        raise ValueError(f"Invalid rate limit unit in '{rate}'")
+    return int(count), RATE_UNITS[unit]
+
+
+class InMemoryRateLimitStore:
+    """Per-process sliding log, used when Redis is not available"""
+
+    # Drop idle keys every this many hits to keep memory bounded
+    PURGE_EVERY = 10_000
+
+    def __init__(self):
+        self._hits: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def hit(self, key: str, limit: int, window: int) -> Tuple[bool, int]:
+        now = time.monotonic()
+        with self._lock:
+            self._calls += 1
+            if self._calls % self.PURGE_EVERY == 0:
+                self._purge(now, window)
+
+            hits = self._hits.setdefault(key, deque())
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+
+            if len(hits) >= limit:
+                return False, max(1, math.ceil(hits[0] + window - now))
+
+            hits.append(now)
+            return True, 0
+
+    def _purge(self, now: float, window: int) -> None:
+        for key in [k for k, hits in self._hits.items() if not hits or hits[-1] <= now - window]:
+            del self._hits[key]
+
+
+class RedisRateLimitStore:
+    """Sliding log shared by every worker through a Redis sorted set"""
+
+    def __init__(self, client):
+        self._script = client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def hit(self, key: str, limit: int, window: int) -> Tuple[bool, int]:
+        allowed, retry_after = self._script(
+            keys=[key],
+            args=[time.time(), window, limit, uuid.uuid4().hex],
+        )
+        if int(allowed):
+            return True, 0
+        return False, max(1, math.ceil(float(retry_after)))
+
+
+class RateLimiter:
+    """Rate limiter keyed by scope (route) and identifier (IP or account)"""
+
+    def __init__(self):
+        self.memory_store = InMemoryRateLimitStore()
+        self._redis_store: Optional[RedisRateLimitStore] = None
+
+    def get_rate(self, scope: str) -> Optional[str]:
+        """Look up the configured rate for a scope, e.g. RATE_LIMIT_LOGIN for ``login``"""
+        return getattr(settings, f"RATE_LIMIT_{scope.upper()}", None) or None
+
+    def hit(self, scope: str, identifier: str, rate: str) -> Tuple[bool, int]:
+        """Record a hit and return ``(allowed, retry_after_seconds)``"""
+        limit, window = parse_rate(rate)
+        key = f"ratelimit:{scope}:{identifier}"
+
+        client = get_redis()
+        if client is not None:
+            try:
+                if self._redis_store is None:
+                    self._redis_store = RedisRateLimitStore(client)
+                return self._redis_store.hit(key, limit, window)
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+        return self.memory_store.hit(key, limit, window)
+
+    def check(self, scope: str, identifier: Optional[str], rate: Optional[str] = None) -> None:
+        """Raise 429 with Retry-After when ``identifier`` exceeded the limit for ``scope``"""
+        rate = rate or self.get_rate(scope)
+        if not settings.RATE_LIMIT_ENABLED or not rate or not identifier:
+            return
+
+        allowed, retry_after = self.hit(scope, identifier, rate)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,51 @@
+"""Optional Redis connection shared by subsystems that need cross-worker state"""
+import logging
+import time
+from typing import Optional
+
+from app.core.config import settings
+
+try:
+    import redis
+except ImportError:  # Redis is optional, callers fall back to in-process state
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# How long to stop trying Redis after a connection failure
+RETRY_AFTER_FAILURE_SECONDS = 30
+
+_redis_client: Optional["redis.Redis"] = None
+_unavailable_until = 0.0
+
+
+def get_redis() -> Optional["redis.Redis"]:
+    """
+    Get the shared Redis client.
+
+    Returns None when REDIS_URL is not set, the client library is missing,
+    or Redis recently failed, so callers can use their in-memory fallback.
+    """
+    global _redis_client
+
+    if redis is None or not settings.REDIS_URL:
+        return None
+
+    if time.monotonic() < _unavailable_until:
+        return None
+
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+            decode_responses=True,
+        )
+    return _redis_client
+
+
+def mark_redis_unavailable(error: Exception) -> None:
+    """Back off from Redis for a while after a failed call"""
+    global _unavailable_until
+    logger.warning(f"Redis unavailable, using in-memory fallback: {str(error)}")
+    _unavailable_until = time.monotonic() + RETRY_AFTER_FAILURE_SECONDS
@@ -0,0 +1,55 @@
+"""In-process scheduler for periodic maintenance and analytics jobs"""
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_scheduler = None
+
+
+def start_scheduler() -> None:
+    """
+    Start the background scheduler and register the periodic jobs.
+
+    Every API worker runs its own scheduler, so jobs must be safe to start
+    concurrently (they take a Postgres advisory lock and skip if it is held).
+    """
+    global _scheduler
+
+    if not settings.SCHEDULER_ENABLED or _scheduler is not None:
+        return
+
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.interval import IntervalTrigger
+    from app.services.cohort_service import cohort_service
+    from app.services.idempotency_service import idempotency_service
+
+    _scheduler = BackgroundScheduler(timezone=settings.ANALYTICS_TIMEZONE)
+    _scheduler.add_job(
+        cohort_service.run_scheduled_refresh,
+        CronTrigger(hour=settings.COHORT_REFRESH_HOUR, minute=0),
+        id="refresh_cohorts",
+        coalesce=True,
+        max_instances=1,
+        misfire_grace_time=3600
+    )
+    _scheduler.add_job(
+        idempotency_service.run_scheduled_cleanup,
+        IntervalTrigger(hours=1),
+        id="expire_idempotency_keys",
+        coalesce=True,
+        max_instances=1
+    )
+    _scheduler.start()
+    logger.info("Scheduler started")
+
+
+def shutdown_scheduler() -> None:
+    """Stop the scheduler without waiting for running jobs"""
+    global _scheduler
+
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
@@ -1,35 +1,179 @@
+import asyncio
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 from .config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes below BCRYPT_ROUNDS are reported by verify_and_update() as needing an upgrade
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt runs in a dedicated process pool so login bursts don't starve the
+# request threadpool. Slots cover busy workers plus a bounded backlog; when
+# they run out the request is shed with 503 instead of queueing unbounded.
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(
+    settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE
+)
+_hash_queue_depth = 0
+_hash_queue_lock = threading.Lock()
+
+
+ACCESS_TOKEN_TYPE = "access"
+
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any],
+    expires_delta: timedelta = None,
+    claims: Optional[Dict[str, Any]] = None
 ) -> str:
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(
+        expire = now + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = dict(claims or {})
+    to_encode.update({
+        "exp": expire,
+        "iat": now,
+        "sub": str(subject),
+        "jti": uuid.uuid4().hex,
+        "type": ACCESS_TOKEN_TYPE,
+    })
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Decode and validate an access token, raising JWTError when it is invalid.
+    Revocation is checked separately through ``token_store.is_revoked``.
+    """
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    if payload.get("type") != ACCESS_TOKEN_TYPE or not payload.get("jti"):
+        raise jwt.JWTError("Not an access token")
+    return payload
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except (ValueError, TypeError):
+        # Unusable or unrecognised hash (e.g. imported accounts without a password)
+        return False, None
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                _hash_pool = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _hash_pool
+
+
+def _release_hash_slot(_: Future) -> None:
+    global _hash_queue_depth
+    with _hash_queue_lock:
+        _hash_queue_depth -= 1
+    _hash_slots.release()
+
+
+def _submit_hash_job(fn: Callable, *args: Any) -> Future:
+    global _hash_queue_depth
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    with _hash_queue_lock:
+        _hash_queue_depth += 1
+    try:
+        future = _get_hash_pool().submit(fn, *args)
+    except Exception:
+        _release_hash_slot(None)
+        raise
+    future.add_done_callback(_release_hash_slot)
+    return future
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and return ``(verified, new_hash)``.
+
+    ``new_hash`` is set when the stored hash is below the current cost policy
+    and should be persisted in place of the old one.
+    """
+    return _submit_hash_job(_verify_and_update, plain_password, hashed_password).result()
+
+
+async def averify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Async variant of verify_and_update_password that never blocks the event loop"""
+    future = _submit_hash_job(_verify_and_update, plain_password, hashed_password)
+    return await asyncio.wrap_future(future)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    verified, _ = verify_and_update_password(plain_password, hashed_password)
+    return verified
+
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _submit_hash_job(_hash_password, password).result()
+
+
+async def aget_password_hash(password: str) -> str:
+    """Async variant of get_password_hash"""
+    return await asyncio.wrap_future(_submit_hash_job(_hash_password, password))
+
+
+def get_password_hash_stats() -> Dict[str, int]:
+    """Hashing pool utilisation, where queue_depth counts running plus waiting jobs"""
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "capacity": settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE,
+        "queue_depth": _hash_queue_depth,
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+    }
+
+
+def shutdown_password_hashing() -> None:
+    """Stop the hashing worker processes"""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+            _hash_pool = None
+
 
 def verify_token(token: str) -> Optional[str]:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_access_token(token)
         return payload.get("sub")
     except jwt.JWTError:
-        return None
\ No newline at end of file
+        return None
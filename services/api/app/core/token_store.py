@@ -0,0 +1,142 @@
+"""Access token revocation state, shared through Redis when available"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis, mark_redis_unavailable
+
+REVOKED_JTI_KEY = "token:revoked:{jti}"
+USER_NOT_BEFORE_KEY = "token:not-before:{user_id}"
+PERMISSIONS_VERSION_KEY = "token:permissions-version:{user_id}"
+
+
+class TokenStore:
+    """
+    Denylist for access tokens that must stop working before they expire.
+
+    Individual tokens are revoked by ``jti`` (logout) and all of a user's
+    tokens by a not-before timestamp (password change, refresh token reuse).
+    Entries only need to live as long as an access token can, so lookups are
+    a single Redis MGET and the in-process copy stays small. Writes always
+    land in the in-process copy too, so revocations made by this worker
+    still apply if Redis becomes unreachable.
+
+    It also holds each user's current permissions version, so authorization
+    can trust the role claims of a token unless that version moved on.
+    """
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._not_before: Dict[str, float] = {}
+        self._permissions_versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self) -> int:
+        return settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    def revoke(self, jti: str, expires_at: Optional[float] = None) -> None:
+        """Revoke a single access token until it would have expired anyway"""
+        now = time.time()
+        expires_at = expires_at or now + self.ttl
+        ttl = max(1, int(expires_at - now) + 1)
+
+        with self._lock:
+            self._purge(now)
+            self._revoked[jti] = expires_at
+
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(REVOKED_JTI_KEY.format(jti=jti), 1, ex=ttl)
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+    def revoke_user(self, user_id: Any) -> None:
+        """Revoke every access token issued to a user up to now"""
+        now = time.time()
+        key = str(user_id)
+
+        with self._lock:
+            self._purge(now)
+            self._not_before[key] = int(now)
+
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(USER_NOT_BEFORE_KEY.format(user_id=key), int(now), ex=self.ttl + 60)
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """Check a decoded access token against the denylist"""
+        jti = payload.get("jti")
+        user_id = str(payload.get("uid", payload.get("sub")))
+        issued_at = payload.get("iat", 0)
+
+        if jti in self._revoked or issued_at < self._not_before.get(user_id, 0):
+            return True
+
+        client = get_redis()
+        if client is not None:
+            try:
+                revoked, not_before = client.mget(
+                    REVOKED_JTI_KEY.format(jti=jti),
+                    USER_NOT_BEFORE_KEY.format(user_id=user_id),
+                )
+                return revoked is not None or (
+                    not_before is not None and issued_at < int(not_before)
+                )
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+        return False
+
+    def publish_permissions_version(self, user_id: Any, version: int) -> None:
+        """Record a user's new permissions version after a role or status change"""
+        key = str(user_id)
+        with self._lock:
+            self._permissions_versions[key] = max(version, self._permissions_versions.get(key, 0))
+
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(PERMISSIONS_VERSION_KEY.format(user_id=key), version)
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+    def remember_permissions_version(self, user_id: Any, version: int) -> None:
+        """Cache a version read from the database without overriding a newer published one"""
+        key = str(user_id)
+        with self._lock:
+            self._permissions_versions.setdefault(key, version)
+
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(PERMISSIONS_VERSION_KEY.format(user_id=key), version, nx=True)
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+    def get_permissions_version(self, user_id: Any) -> Optional[int]:
+        """Get the current permissions version of a user, None when unknown"""
+        key = str(user_id)
+        client = get_redis()
+        if client is not None:
+            try:
+                version = client.get(PERMISSIONS_VERSION_KEY.format(user_id=key))
+                return int(version) if version is not None else None
+            except Exception as e:
+                mark_redis_unavailable(e)
+        return self._permissions_versions.get(key)
+
+    def _purge(self, now: float) -> None:
+        for jti in [j for j, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+        cutoff = now - self.ttl
+        for user_id in [u for u, ts in self._not_before.items() if ts <= cutoff]:
+            del self._not_before[user_id]
+
+
+token_store = TokenStore()
@@ -0,0 +1,452 @@
+"""In-process tracing: spans for requests, services and outbound calls, exported as JSON lines or OTLP"""
+import functools
+import inspect
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+MAX_ATTRIBUTE_LENGTH = 2000
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """``(trace_id, parent_span_id, sampled)`` from a W3C traceparent header"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class NonRecordingSpan:
+    """Carries the IDs of an unsampled trace so they still propagate; records nothing"""
+
+    recording = False
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-00"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, error: Any) -> None:
+        pass
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        pass
+
+
+class Span:
+    """One timed operation of a sampled trace"""
+
+    recording = True
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None,
+        start_ns: Optional[int] = None
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes) if attributes else {}
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: Any) -> None:
+        if isinstance(error, BaseException):
+            self.attributes["exception.type"] = type(error).__name__
+            error = str(error)
+        self.error = str(error)[:MAX_ATTRIBUTE_LENGTH]
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = end_ns or time.time_ns()
+            tracer.processor.submit(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class JsonFileExporter:
+    """
+    Appends one JSON object per span to a local file. Once a batch would
+    take the file past ``max_bytes`` it is rolled over to ``<path>.1``,
+    older files shift up and only ``backup_count`` of them are kept.
+    Workers sharing the file may both rotate it, which at worst leaves one
+    backup short.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 0, backup_count: int = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        data = "".join(json.dumps({"service": settings.TRACING_SERVICE_NAME, **span.to_dict()}, default=str) + "\n" for span in spans).encode()
+        size = self._size()
+        if self.max_bytes and size and size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    def _size(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _backup(self, index: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{index}")
+
+    def _rotate(self) -> None:
+        try:
+            if not self.backup_count:
+                self.path.unlink()
+                return
+            for index in range(self.backup_count - 1, 0, -1):
+                if self._backup(index).exists():
+                    self._backup(index).replace(self._backup(index + 1))
+            self.path.replace(self._backup(1))
+        except FileNotFoundError:
+            pass  # another worker rotated it first
+
+    def shutdown(self) -> None:
+        pass
+
+
+class OtlpHttpExporter:
+    """Posts spans to an OpenTelemetry collector using OTLP/HTTP with JSON encoding"""
+
+    def __init__(self, endpoint: str):
+        import httpx
+
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self._client = httpx.Client(timeout=10.0)
+
+    def _value(self, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)[:MAX_ATTRIBUTE_LENGTH]}
+
+    def _span(self, span: Span) -> Dict[str, Any]:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": SPAN_KINDS[span.kind],
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": self._value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error is not None else {"code": 0},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+    def export(self, spans: List[Span]) -> None:
+        response = self._client.post(self.url, json={
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": settings.TRACING_SERVICE_NAME}}
+                ]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [self._span(span) for span in spans]}],
+            }]
+        })
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+class BatchSpanProcessor:
+    """
+    Queues finished spans and exports them in batches from a background
+    thread, so requests never wait on the exporter. Spans are dropped when
+    the queue is full.
+    """
+
+    def __init__(self, max_queue: int, batch_size: int, interval: float):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self._exporter = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _create_exporter(self):
+        if settings.TRACING_EXPORTER == "otlp":
+            if not settings.TRACING_OTLP_ENDPOINT:
+                raise ValueError("TRACING_OTLP_ENDPOINT is required for the otlp exporter")
+            return OtlpHttpExporter(settings.TRACING_OTLP_ENDPOINT)
+        return JsonFileExporter(
+            Path(settings.TRACING_JSON_PATH or Path(settings.UPLOAD_DIR) / "traces" / "spans.jsonl"),
+            max_bytes=settings.TRACING_JSON_MAX_BYTES,
+            backup_count=settings.TRACING_JSON_BACKUP_COUNT
+        )
+
+    def submit(self, span: Span) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, block: bool) -> List[Span]:
+        batch = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=self.interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _export(self, batch: List[Span]) -> None:
+        if not batch:
+            return
+        try:
+            if self._exporter is None:
+                self._exporter = self._create_exporter()
+            self._exporter.export(batch)
+        except Exception as e:
+            logger.warning(f"Dropped {len(batch)} spans, export failed: {str(e)}")
+
+    def _run(self) -> None:
+        # The exporter's own HTTP calls must not produce spans
+        _suppressed.set(True)
+        while not self._stop.is_set():
+            self._export(self._drain(block=True))
+
+    def shutdown(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        _suppressed.set(True)
+        while not self._queue.empty():
+            self._export(self._drain(block=False))
+        if self._exporter is not None:
+            self._exporter.shutdown()
+
+
+_current_span: ContextVar[Any] = ContextVar("current_span", default=None)
+_suppressed: ContextVar[bool] = ContextVar("tracing_suppressed", default=False)
+_UNSET = object()
+
+
+class Tracer:
+    """
+    Creates spans and tracks the current one in a context variable, so
+    nesting follows ``await`` and the threadpool that runs sync endpoints.
+    Work handed to our own executors keeps its parent through ``bind``.
+
+    New traces are sampled at ``TRACING_SAMPLE_RATE``, decided from the
+    trace ID; an incoming traceparent's decision is kept. Unsampled traces
+    only carry their IDs along.
+    """
+
+    def __init__(self):
+        self.processor = BatchSpanProcessor(
+            max_queue=settings.TRACING_MAX_QUEUE,
+            batch_size=512,
+            interval=settings.TRACING_EXPORT_INTERVAL_SECONDS
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return settings.TRACING_ENABLED
+
+    def current_span(self):
+        return _current_span.get()
+
+    def suppressed(self) -> bool:
+        return _suppressed.get()
+
+    def _sampled(self, trace_id: str) -> bool:
+        return int(trace_id[16:], 16) < settings.TRACING_SAMPLE_RATE * 2 ** 64
+
+    def start_span(
+        self,
+        name: str,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None,
+        remote_parent: Optional[Tuple[str, str, bool]] = None,
+        start_ns: Optional[int] = None
+    ):
+        """Start a span under the current one, or ``remote_parent``, or as a new trace"""
+        if remote_parent is not None:
+            trace_id, parent_id, sampled = remote_parent
+            if not sampled:
+                return NonRecordingSpan(trace_id, _new_id(64))
+            return Span(name, trace_id, parent_id, kind, attributes, start_ns)
+
+        parent = _current_span.get()
+        if parent is None:
+            trace_id = _new_id(128)
+            if not self._sampled(trace_id):
+                return NonRecordingSpan(trace_id, _new_id(64))
+            return Span(name, trace_id, None, kind, attributes, start_ns)
+        if not parent.recording:
+            return parent
+        return Span(name, parent.trace_id, parent.span_id, kind, attributes, start_ns)
+
+    @contextmanager
+    def use_span(self, span) -> Iterator[Any]:
+        """Make ``span`` current for the block and end it afterwards"""
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", attributes: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+        with self.use_span(self.start_span(name, kind, attributes)) as span:
+            yield span
+
+    def record_span(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Record an already finished child of the current span, e.g. a SQL statement"""
+        parent = _current_span.get()
+        if parent is None or not parent.recording:
+            return
+        Span(name, parent.trace_id, parent.span_id, kind, attributes, start_ns).end(end_ns)
+
+    def bind(self, func: Callable) -> Callable:
+        """Run ``func`` under the current span when it is called on another thread"""
+        span = _current_span.get()
+        if span is None:
+            return func
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            token = _current_span.set(span)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current_span.reset(token)
+        return run
+
+    def shutdown(self) -> None:
+        """Export the spans still queued"""
+        self.processor.shutdown()
+
+
+tracer = Tracer()
+
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable:
+    """
+    Decorator running a function, sync or async, in a span named ``name``
+    (default: its qualified name). A no-op while tracing is disabled.
+    """
+    def decorator(func: Callable) -> Callable:
+        if not settings.TRACING_ENABLED:
+            return func
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(span_name, attributes=attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, attributes=attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_methods(cls: type) -> type:
+    """
+    Class decorator applying ``traced`` to every public method of a
+    service. Generators are left alone, their work happens after the call.
+    """
+    if not settings.TRACING_ENABLED:
+        return cls
+    for attribute, value in list(vars(cls).items()):
+        if attribute.startswith("_") or not inspect.isfunction(value):
+            continue
+        if inspect.isgeneratorfunction(value) or inspect.isasyncgenfunction(value):
+            continue
+        setattr(cls, attribute, traced(f"{cls.__name__}.{attribute}")(value))
+    return cls
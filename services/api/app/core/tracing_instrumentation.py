@@ -0,0 +1,145 @@
+"""Automatic spans for SQL statements, httpx, smtplib and firebase_admin calls"""
+import functools
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.core.query_counter import add_query_listener
+from app.core.tracing import MAX_ATTRIBUTE_LENGTH, tracer
+
+AttributeGetter = Callable[..., Dict[str, Any]]
+
+_installed = False
+
+
+def _record_query(statement: str, seconds: float) -> None:
+    # Called after the statement ran, in the context that ran it
+    end_ns = time.time_ns()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement else "SQL"
+    tracer.record_span(
+        f"db {operation}",
+        start_ns=end_ns - int(seconds * 1e9),
+        end_ns=end_ns,
+        kind="client",
+        attributes={"db.system": "postgresql", "db.statement": statement[:MAX_ATTRIBUTE_LENGTH]}
+    )
+
+
+def _wrap(owner: Any, attribute: str, span_name: str, attributes: Optional[AttributeGetter] = None) -> None:
+    """Replace ``owner.attribute`` with a version that runs in a client span"""
+    original = getattr(owner, attribute, None)
+    if original is None or getattr(original, "_traced", False):
+        return
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        if tracer.suppressed():
+            return original(*args, **kwargs)
+        with tracer.span(span_name, kind="client", attributes=attributes(*args, **kwargs) if attributes else None):
+            return original(*args, **kwargs)
+
+    wrapper._traced = True
+    setattr(owner, attribute, wrapper)
+
+
+def _http_attributes(request) -> Dict[str, Any]:
+    # The query string is left out, it can carry OAuth codes and tokens
+    return {"http.method": request.method, "http.url": str(request.url.copy_with(query=None))}
+
+
+def _finish_http_span(span, response) -> None:
+    span.set_attribute("http.status_code", response.status_code)
+    if response.status_code >= 500:
+        span.set_error(f"HTTP {response.status_code}")
+
+
+def instrument_httpx() -> None:
+    """Span every request sent with httpx and pass the trace on in a traceparent header"""
+    try:
+        import httpx
+    except ImportError:
+        return
+    if getattr(httpx.Client.send, "_traced", False):
+        return
+    sync_send = httpx.Client.send
+    async_send = httpx.AsyncClient.send
+
+    @functools.wraps(sync_send)
+    def send(self, request, *args, **kwargs):
+        if tracer.suppressed():
+            return sync_send(self, request, *args, **kwargs)
+        with tracer.span(f"HTTP {request.method}", kind="client", attributes=_http_attributes(request)) as span:
+            request.headers["traceparent"] = span.traceparent
+            response = sync_send(self, request, *args, **kwargs)
+            _finish_http_span(span, response)
+            return response
+
+    @functools.wraps(async_send)
+    async def send_async(self, request, *args, **kwargs):
+        if tracer.suppressed():
+            return await async_send(self, request, *args, **kwargs)
+        with tracer.span(f"HTTP {request.method}", kind="client", attributes=_http_attributes(request)) as span:
+            request.headers["traceparent"] = span.traceparent
+            response = await async_send(self, request, *args, **kwargs)
+            _finish_http_span(span, response)
+            return response
+
+    send._traced = True
+    send_async._traced = True
+    httpx.Client.send = send
+    httpx.AsyncClient.send = send_async
+
+
+def instrument_smtplib() -> None:
+    """Span SMTP connects, logins and sends"""
+    import smtplib
+
+    def connect_attributes(smtp, host: str = "localhost", port: int = 0, *args, **kwargs) -> Dict[str, Any]:
+        return {"net.peer.name": host, "net.peer.port": port or smtp.default_port}
+
+    def sendmail_attributes(smtp, from_addr, to_addrs, *args, **kwargs) -> Dict[str, Any]:
+        return {"messaging.destination_count": 1 if isinstance(to_addrs, str) else len(to_addrs)}
+
+    for smtp_class in (smtplib.SMTP, smtplib.SMTP_SSL):
+        _wrap(smtp_class, "connect", "smtp connect", connect_attributes)
+    _wrap(smtplib.SMTP, "starttls", "smtp starttls")
+    _wrap(smtplib.SMTP, "login", "smtp login")
+    # send_message goes through sendmail
+    _wrap(smtplib.SMTP, "sendmail", "smtp sendmail", sendmail_attributes)
+
+
+def instrument_firebase() -> None:
+    """Span token verification and push sends made through firebase_admin"""
+    try:
+        from firebase_admin import auth, messaging
+    except ImportError:
+        return
+
+    def multicast_attributes(message, *args, **kwargs) -> Dict[str, Any]:
+        return {"messaging.destination_count": len(getattr(message, "tokens", None) or [])}
+
+    def batch_attributes(messages, *args, **kwargs) -> Dict[str, Any]:
+        return {"messaging.batch.message_count": len(messages)}
+
+    _wrap(auth, "verify_id_token", "firebase auth.verify_id_token")
+    _wrap(messaging, "send", "firebase messaging.send")
+    _wrap(messaging, "send_multicast", "firebase messaging.send_multicast", multicast_attributes)
+    _wrap(messaging, "send_each_for_multicast", "firebase messaging.send_each_for_multicast", multicast_attributes)
+    _wrap(messaging, "send_all", "firebase messaging.send_all", batch_attributes)
+    _wrap(messaging, "send_each", "firebase messaging.send_each", batch_attributes)
+
+
+def instrument_libraries() -> None:
+    """
+    Install the automatic spans. Call once at startup, after
+    ``instrument_engine`` has hooked the database engines. Modules that
+    call through ``module.function`` pick up the wrappers; names imported
+    directly before this runs keep the originals.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    add_query_listener(_record_query)
+    instrument_httpx()
+    instrument_smtplib()
+    instrument_firebase()
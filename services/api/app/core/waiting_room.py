@@ -0,0 +1,270 @@
+"""Virtual waiting room for program launches, backed by Redis with an in-memory fallback"""
+import math
+import secrets
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.redis import get_redis, mark_redis_unavailable
+
+# Admission is a token bucket over ticket numbers: ``frontier`` advances at
+# ``rate`` per second and a ticket is admitted once the frontier passes it.
+# The frontier may run at most ``burst`` tickets ahead of the last one
+# issued, so an idle room admits the next ``burst`` arrivals immediately.
+ADVANCE = """
+local state = redis.call('HMGET', KEYS[1], 'seq', 'frontier', 'updated')
+if not state[1] then return nil end
+local seq, frontier, updated = tonumber(state[1]), tonumber(state[2]), tonumber(state[3])
+local now, rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+frontier = math.min(seq + burst, frontier + rate * math.max(now - updated, 0))
+"""
+
+# Issue (or look up) the caller's ticket. Returns {token, ticket, frontier}.
+JOIN_SCRIPT = ADVANCE + """
+local user_id, token = ARGV[4], redis.call('HGET', KEYS[3], ARGV[4])
+local ticket
+if token then
+    ticket = tonumber(string.match(redis.call('HGET', KEYS[2], token), '^(%d+)'))
+else
+    seq = seq + 1
+    ticket, token = seq, ARGV[5]
+    redis.call('HSET', KEYS[2], token, ticket .. ':' .. user_id)
+    redis.call('HSET', KEYS[3], user_id, token)
+    local ttl = redis.call('PTTL', KEYS[1])
+    if ttl > 0 then
+        redis.call('PEXPIRE', KEYS[2], ttl)
+        redis.call('PEXPIRE', KEYS[3], ttl)
+    end
+end
+redis.call('HSET', KEYS[1], 'seq', seq, 'frontier', tostring(frontier), 'updated', ARGV[1])
+return {token, ticket, tostring(frontier)}
+"""
+
+# Look up a ticket by token. Returns {ticket, user_id, frontier}, {} for an
+# unknown token and nil (like ADVANCE) when the room is closed.
+STATUS_SCRIPT = ADVANCE + """
+redis.call('HSET', KEYS[1], 'frontier', tostring(frontier), 'updated', ARGV[1])
+local entry = redis.call('HGET', KEYS[2], ARGV[4])
+if not entry then return {} end
+local ticket, user_id = string.match(entry, '^(%d+):(.*)$')
+return {ticket, user_id, tostring(frontier)}
+"""
+
+
+class InMemoryWaitingRoomStore:
+    """Per-process rooms, used when Redis is not available"""
+
+    def __init__(self):
+        self._rooms: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def open(self, program_id: int, duration: int, burst: int) -> None:
+        with self._lock:
+            self._rooms[program_id] = {
+                "expires_at": time.monotonic() + duration,
+                "seq": 0,
+                "frontier": float(burst),
+                "updated": time.time(),
+                "tickets": {},
+                "users": {},
+            }
+
+    def close(self, program_id: int) -> None:
+        with self._lock:
+            self._rooms.pop(program_id, None)
+
+    def _room(self, program_id: int) -> Optional[Dict[str, Any]]:
+        room = self._rooms.get(program_id)
+        if room is not None and time.monotonic() >= room["expires_at"]:
+            del self._rooms[program_id]
+            return None
+        return room
+
+    def _advance(self, room: Dict[str, Any], rate: float, burst: int) -> None:
+        now = time.time()
+        room["frontier"] = min(room["seq"] + burst, room["frontier"] + rate * max(now - room["updated"], 0))
+        room["updated"] = now
+
+    def is_open(self, program_id: int) -> bool:
+        with self._lock:
+            return self._room(program_id) is not None
+
+    def join(self, program_id: int, user_id: int, rate: float, burst: int) -> Optional[Tuple[str, int, float]]:
+        with self._lock:
+            room = self._room(program_id)
+            if room is None:
+                return None
+            self._advance(room, rate, burst)
+            token = room["users"].get(user_id)
+            if token is None:
+                room["seq"] += 1
+                token = secrets.token_urlsafe(16)
+                room["tickets"][token] = (room["seq"], user_id)
+                room["users"][user_id] = token
+            return token, room["tickets"][token][0], room["frontier"]
+
+    def status(self, program_id: int, token: str, rate: float, burst: int) -> Optional[Tuple]:
+        with self._lock:
+            room = self._room(program_id)
+            if room is None:
+                return None
+            self._advance(room, rate, burst)
+            if token not in room["tickets"]:
+                return ()
+            ticket, user_id = room["tickets"][token]
+            return ticket, user_id, room["frontier"]
+
+
+class RedisWaitingRoomStore:
+    """Rooms shared by every worker, one state hash plus ticket and user hashes per program"""
+
+    def __init__(self, client):
+        self._client = client
+        self._join = client.register_script(JOIN_SCRIPT)
+        self._status = client.register_script(STATUS_SCRIPT)
+
+    def _keys(self, program_id: int):
+        prefix = f"waitingroom:{program_id}"
+        return [f"{prefix}:state", f"{prefix}:tickets", f"{prefix}:users"]
+
+    def open(self, program_id: int, duration: int, burst: int) -> None:
+        state, tickets, users = self._keys(program_id)
+        pipe = self._client.pipeline()
+        pipe.delete(state, tickets, users)
+        pipe.hset(state, mapping={"seq": 0, "frontier": burst, "updated": time.time()})
+        pipe.expire(state, duration)
+        pipe.execute()
+
+    def close(self, program_id: int) -> None:
+        self._client.delete(*self._keys(program_id))
+
+    def is_open(self, program_id: int) -> bool:
+        return bool(self._client.exists(self._keys(program_id)[0]))
+
+    def join(self, program_id: int, user_id: int, rate: float, burst: int) -> Optional[Tuple[str, int, float]]:
+        result = self._join(
+            keys=self._keys(program_id),
+            args=[time.time(), rate, burst, user_id, secrets.token_urlsafe(16)],
+        )
+        if not result:
+            return None
+        token, ticket, frontier = result
+        return token, int(ticket), float(frontier)
+
+    def status(self, program_id: int, token: str, rate: float, burst: int) -> Optional[Tuple]:
+        result = self._status(keys=self._keys(program_id), args=[time.time(), rate, burst, token])
+        if not result:
+            return result if result is None else ()
+        ticket, user_id, frontier = result
+        return int(ticket), int(user_id), float(frontier)
+
+
+class WaitingRoom:
+    """
+    Admission control for program launches.
+
+    Activating a program opens its room for ``WAITING_ROOM_DURATION_MINUTES``.
+    While it is open, applicants first join the queue and get a token with
+    their position, then poll until they are admitted at
+    ``WAITING_ROOM_ADMIT_PER_SECOND``; applying requires an admitted token.
+    Joining and polling only touch Redis or process memory, never the
+    database.
+    """
+
+    def __init__(self):
+        self.memory_store = InMemoryWaitingRoomStore()
+        self._redis_store: Optional[RedisWaitingRoomStore] = None
+
+    def _call(self, method: str, *args):
+        client = get_redis()
+        if client is not None:
+            try:
+                if self._redis_store is None:
+                    self._redis_store = RedisWaitingRoomStore(client)
+                return getattr(self._redis_store, method)(*args)
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+        return getattr(self.memory_store, method)(*args)
+
+    def open(self, program_id: int) -> None:
+        if settings.WAITING_ROOM_ENABLED:
+            self._call("open", program_id, settings.WAITING_ROOM_DURATION_MINUTES * 60, settings.WAITING_ROOM_BURST)
+
+    def close(self, program_id: int) -> None:
+        self._call("close", program_id)
+
+    def is_open(self, program_id: int) -> bool:
+        return settings.WAITING_ROOM_ENABLED and self._call("is_open", program_id)
+
+    def _describe(self, program_id: int, token: str, ticket: int, frontier: float) -> Dict[str, Any]:
+        rate = settings.WAITING_ROOM_ADMIT_PER_SECOND
+        ahead = max(ticket - math.floor(frontier), 0)
+        estimated_wait = math.ceil(ahead / rate) if ahead else 0
+        return {
+            "program_id": program_id,
+            "open": True,
+            "token": token,
+            "admitted": ahead == 0,
+            "position": ahead,
+            "estimated_wait_seconds": estimated_wait,
+            "poll_after_seconds": min(max(estimated_wait, 1), settings.WAITING_ROOM_POLL_SECONDS) if ahead else 0,
+        }
+
+    def join(self, program_id: int, user_id: int) -> Dict[str, Any]:
+        """Take a place in the queue, or get back the caller's existing one"""
+        if not settings.WAITING_ROOM_ENABLED:
+            return {"program_id": program_id, "open": False, "admitted": True}
+        result = self._call(
+            "join", program_id, user_id, settings.WAITING_ROOM_ADMIT_PER_SECOND, settings.WAITING_ROOM_BURST
+        )
+        if result is None:
+            return {"program_id": program_id, "open": False, "admitted": True}
+        token, ticket, frontier = result
+        return self._describe(program_id, token, ticket, frontier)
+
+    def get_status(self, program_id: int, token: str, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Position of a token, or None when the token is unknown or belongs to
+        someone else. A closed room admits everyone.
+        """
+        if not settings.WAITING_ROOM_ENABLED:
+            return {"program_id": program_id, "open": False, "admitted": True}
+        result = self._call(
+            "status", program_id, token, settings.WAITING_ROOM_ADMIT_PER_SECOND, settings.WAITING_ROOM_BURST
+        )
+        if result is None:
+            return {"program_id": program_id, "open": False, "admitted": True}
+        if not result or result[1] != user_id:
+            return None
+        ticket, _, frontier = result
+        return self._describe(program_id, token, ticket, frontier)
+
+    def check_admission(self, program_id: int, user_id: int, token: Optional[str]) -> None:
+        """Raise unless the room is closed or ``token`` has been admitted"""
+        if not token:
+            if self.is_open(program_id):
+                raise HTTPException(
+                    status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+                    detail="This program is in high demand, please join its waiting room first",
+                )
+            return
+
+        room_status = self.get_status(program_id, token, user_id)
+        if room_status is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid waiting room token",
+            )
+        if not room_status["admitted"]:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=room_status,
+                headers={"Retry-After": str(room_status["poll_after_seconds"])},
+            )
+
+
+waiting_room = WaitingRoom()
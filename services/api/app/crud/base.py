@@ -2,9 +2,11 @@ from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update
 from sqlalchemy.orm import DeclarativeBase
 
+from app.core.exceptions import PreconditionFailedError
+
 ModelType = TypeVar("ModelType", bound=DeclarativeBase)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
@@ -45,20 +47,42 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db: AsyncSession,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        expected_version: Optional[int] = None
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
+        """
+        Update ``db_obj`` in one ``UPDATE ... RETURNING``. Models with a
+        ``version`` column are only written if the row still has
+        ``expected_version`` (default: the version of ``db_obj``), otherwise
+        PreconditionFailedError is raised.
+        """
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+        columns = self.model.__table__.columns.keys()
+        values = {field: value for field, value in update_data.items() if field in columns and field != "version"}
+
+        stmt = update(self.model).where(self.model.id == db_obj.id)
+        version = getattr(self.model, "version", None)
+        if version is not None:
+            if expected_version is None:
+                expected_version = db_obj.version
+            stmt = stmt.where(version == expected_version)
+            values["version"] = version + 1
+        elif not values:
+            return db_obj
+
+        result = await db.execute(
+            stmt.values(**values).returning(self.model),
+            execution_options={"synchronize_session": False, "populate_existing": True}
+        )
+        updated = result.scalars().first()
+        if updated is None:
+            await db.rollback()
+            raise PreconditionFailedError(f"{self.model.__name__} was modified by another request")
         await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
+        return updated
 
     async def remove(self, db: AsyncSession, *, id: int) -> ModelType:
         obj = await self.get(db, id=id)
@@ -4,7 +4,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from fastapi import HTTPException, status
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_and_update_password
+from app.core.permissions import commit_permission_change
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.crud.base import CRUDBase
@@ -78,8 +79,12 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user = self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        verified, upgraded_hash = verify_and_update_password(password, user.hashed_password)
+        if not verified:
             return None
+        if upgraded_hash:
+            user.hashed_password = upgraded_hash
+            db.commit()
         return user
     
     def is_active(self, user: User) -> bool:
@@ -133,7 +138,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user = self.get(db, id=user_id)
         if user:
             user.is_active = False
-            db.commit()
+            commit_permission_change(db, user)
             db.refresh(user)
         return user
     
@@ -142,7 +147,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user = self.get(db, id=user_id)
         if user:
             user.is_active = True
-            db.commit()
+            commit_permission_change(db, user)
             db.refresh(user)
         return user
     
@@ -167,7 +172,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user = self.get(db, id=user_id)
         if user:
             user.role = new_role
-            db.commit()
+            commit_permission_change(db, user)
             db.refresh(user)
         return user
 
@@ -5,7 +5,7 @@ from sqlalchemy.orm import selectinload
 
 from ..models.program import Program
 from ..models.application import Application
-from ..schemas.program import ProgramCreate, ProgramUpdate, ApplicationCreate
+from ..schemas.program import ProgramCreate, ProgramUpdate
 from .base import CRUDBase
 
 
@@ -50,25 +50,13 @@ class CRUDProgram(CRUDBase[Program, ProgramCreate, ProgramUpdate]):
             select(Application).where(
                 and_(
                     Application.user_id == user_id,
-                    Application.program_id == program_id
+                    Application.program_id == program_id,
+                    Application.is_active == True
                 )
             )
         )
         return result.scalar_one_or_none()
 
-    async def create_application(
-        self, db: AsyncSession, *, user_id: int, program_id: int
-    ) -> Application:
-        db_obj = Application(
-            user_id=user_id,
-            program_id=program_id,
-            status="pending"
-        )
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
-
     async def get_user_applications(
         self, db: AsyncSession, *, user_id: int
     ) -> List[Application]:
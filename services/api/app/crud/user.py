@@ -7,7 +7,7 @@ from jose import jwt
 from pydantic import ValidationError
 
 from ..core.config import settings
-from ..core.security import verify_password, get_password_hash
+from ..core.security import averify_and_update_password, get_password_hash
 from ..core.database import get_db
 from ..models.user import User
 from ..schemas.user import UserCreate, UserUpdate
@@ -55,8 +55,12 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user = await self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        verified, upgraded_hash = await averify_and_update_password(password, user.hashed_password)
+        if not verified:
             return None
+        if upgraded_hash:
+            user.hashed_password = upgraded_hash
+            await db.commit()
         return user
 
     def is_active(self, user: User) -> bool:
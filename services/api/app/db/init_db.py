@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from app.core.database import engine, SessionLocal
+from app.core.database import sync_engine, SessionLocal
 from app.models.user import User, UserRole
 from app.models.program import Program, ProgramStatus, ProgramCategory
 from app.services.auth_service import auth_service
@@ -178,7 +178,7 @@ def init_db() -> None:
     from app.models import user, program, application, beneficiary, audit
     from app.core.database import Base
     
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=sync_engine)
     logger.info("Database tables created")
     
     # Create initial data
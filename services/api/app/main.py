@@ -1,23 +1,48 @@
+import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.database import engine, sync_engine
 from app.core.firebase import ensure_firebase_initialized
+from app.core.metrics import render_metrics, shutdown_metrics, track_pool
+from app.core.query_counter import instrument_engine
+from app.core.scheduler import start_scheduler, shutdown_scheduler
+from app.core.security import shutdown_password_hashing
+from app.core.tracing import tracer
+from app.core.tracing_instrumentation import instrument_libraries
+from app.middleware import MetricsMiddleware, ProfilingMiddleware, QueryCounterMiddleware, TracingMiddleware
+from app.services.gitlab_oauth_service import gitlab_oauth_service
+from app.services.job_service import job_service
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("Starting up...")
+    logger.info("Starting up...")
     
     # Initialize Firebase Admin SDK
     ensure_firebase_initialized()
-    print("Firebase Admin SDK initialized")
+    logger.info("Firebase Admin SDK initialized")
+    
+    # Open the shared GitLab connection pool
+    await gitlab_oauth_service.startup()
+    
+    # Nightly analytics refreshes
+    start_scheduler()
     
     yield
     
     # Shutdown
-    print("Shutting down...")
+    logger.info("Shutting down...")
+    shutdown_scheduler()
+    job_service.shutdown()
+    shutdown_password_hashing()
+    await gitlab_oauth_service.shutdown()
+    shutdown_metrics()
+    tracer.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -35,6 +60,25 @@ if settings.ALLOWED_HOSTS:
         allow_headers=["*"],
     )
 
+# Admin-triggered profiles of single requests (X-Profile: 1)
+app.add_middleware(ProfilingMiddleware)
+
+# Count statements per request, for N+1 warnings and the metrics below
+instrument_engine(engine.sync_engine)
+instrument_engine(sync_engine)
+app.add_middleware(QueryCounterMiddleware)
+
+# Latency includes the middleware added before this
+if settings.METRICS_ENABLED:
+    track_pool(engine.sync_engine, "async")
+    track_pool(sync_engine, "sync")
+    app.add_middleware(MetricsMiddleware)
+
+# Root span of each request; SQL, httpx, SMTP and Firebase calls nest under it
+if settings.TRACING_ENABLED:
+    instrument_libraries()
+    app.add_middleware(TracingMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 # Root health endpoint for Railway
@@ -44,4 +88,12 @@ async def health_check():
 
 @app.get("/")
 async def root():
-    return {"message": "MSWD Livelihood Rizal Palawan API", "version": "1.0.0", "docs": "/docs"}
\ No newline at end of file
+    return {"message": "MSWD Livelihood Rizal Palawan API", "version": "1.0.0", "docs": "/docs"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint, aggregated across workers"""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,12 @@
+"""ASGI Middleware Package"""
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.query_counter import QueryCounterMiddleware
+from app.middleware.tracing import TracingMiddleware
+
+__all__ = [
+    "MetricsMiddleware",
+    "ProfilingMiddleware",
+    "QueryCounterMiddleware",
+    "TracingMiddleware"
+]
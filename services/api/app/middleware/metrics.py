@@ -0,0 +1,57 @@
+"""Request metrics middleware"""
+import time
+
+from app.core.metrics import REQUESTS_IN_PROGRESS, UNMATCHED_ROUTE, observe_request
+
+# Not worth measuring, and scrapes would dominate the request counts
+EXCLUDED_PATHS = {"/metrics", "/health"}
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, e.g. ``/api/v1/programs/{program_id}``"""
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Records latency, response size and database work per route template.
+
+    A plain ASGI middleware rather than ``BaseHTTPMiddleware``, so streamed
+    responses are measured until their last chunk. The router stores the
+    matched route in the scope, and QueryCounterMiddleware (added inside
+    this one) the request's statement counts, both read once the response
+    is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            in_progress.dec()
+            observe_request(
+                method, route_template(scope), status_code, duration, response_size, scope.get("query_stats")
+            )
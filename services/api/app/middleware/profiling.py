@@ -0,0 +1,98 @@
+"""On-demand request profiling for admins"""
+import asyncio
+import inspect
+import logging
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.api.deps import get_principal_from_token
+from app.core.config import settings
+from app.core.permissions import Permission
+from app.middleware.metrics import route_template
+from app.services.profile_service import profile_service
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+
+def _endpoint_codes(scope):
+    """Code of the matched endpoint, so its threadpool thread is sampled too"""
+    endpoint = scope.get("endpoint")
+    code = getattr(inspect.unwrap(endpoint), "__code__", None) if endpoint is not None else None
+    return frozenset((code,)) if code is not None else frozenset()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when an admin sends ``X-Profile: 1``.
+
+    The admin is recognised from the bearer token's claims; the database
+    is only read when the user's permissions version is not cached yet.
+    The response carries ``X-Profile-Status`` (captured, busy,
+    rate-limited) and, when captured, ``X-Profile-Id``. The profile can
+    then be listed and downloaded under ``/admin/profiles``. Other requests
+    pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_HEADER, "").lower() not in ("1", "true"):
+            await self.app(scope, receive, send)
+            return
+
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        principal = (
+            await asyncio.to_thread(get_principal_from_token, token) if scheme.lower() == "bearer" and token else None
+        )
+        if principal is None or not principal.has(Permission.MANAGE_USERS):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id, profile_status = profile_service.begin()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers = MutableHeaders(scope=message)
+                response_headers.append("X-Profile-Status", profile_status)
+                if profile_id:
+                    response_headers.append("X-Profile-Id", profile_id)
+            await send(message)
+
+        if profile_id is None:
+            await self.app(scope, receive, send_wrapper)
+            return
+
+        profiler = profile_service.new_profiler(lambda: _endpoint_codes(scope))
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            # Joins the sampling thread, so keep it off the event loop
+            await asyncio.to_thread(profiler.stop)
+            try:
+                await asyncio.to_thread(profile_service.save, profile_id, profiler, {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_template(scope),
+                    "status_code": status_code,
+                    "user_id": principal.id,
+                    "duration_ms": round(duration_ms, 1),
+                })
+            except Exception:
+                logger.exception(f"Could not save profile {profile_id}")
+            finally:
+                profile_service.end()
@@ -0,0 +1,53 @@
+"""Per-request SQL statement counting and N+1 warnings"""
+import logging
+
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+from app.core.query_counter import end_request_stats, start_request_stats
+from app.middleware.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text included in a warning
+MAX_LOGGED_STATEMENT = 500
+
+
+class QueryCounterMiddleware:
+    """
+    Counts the statements each request runs and warns about the same
+    statement shape running ``N_PLUS_ONE_THRESHOLD`` or more times, the
+    signature of a per-row lookup in a loop. With ``DEBUG`` the counts are
+    also returned as ``X-DB-Query-Count``, ``X-DB-Query-Time-Ms`` and
+    ``X-DB-Repeated-Queries`` headers. The stats are left in the scope for
+    MetricsMiddleware.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_request_stats()
+        scope["query_stats"] = stats
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Query-Count", str(stats.queries))
+                headers.append("X-DB-Query-Time-Ms", f"{stats.query_seconds * 1000:.1f}")
+                headers.append("X-DB-Repeated-Queries", str(len(stats.repeated(settings.N_PLUS_ONE_THRESHOLD))))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request_stats(token)
+            for statement, count in stats.repeated(settings.N_PLUS_ONE_THRESHOLD):
+                logger.warning(
+                    f"Possible N+1 in {scope['method']} {route_template(scope)}: "
+                    f"{count}x {statement[:MAX_LOGGED_STATEMENT]}"
+                )
@@ -0,0 +1,51 @@
+"""Request tracing middleware"""
+from starlette.datastructures import Headers
+
+from app.core.tracing import parse_traceparent, tracer
+from app.middleware.metrics import EXCLUDED_PATHS, route_template
+
+
+class TracingMiddleware:
+    """
+    Opens the server span every other span of a request nests under.
+
+    An incoming W3C ``traceparent`` header continues the caller's trace.
+    Sampled requests get their trace ID back in ``X-Trace-Id``. The span is
+    named after the route template once routing has happened.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        span = tracer.start_span(
+            f"{method} {scope['path']}",
+            kind="server",
+            attributes={"http.method": method, "http.target": scope["path"]},
+            remote_parent=parse_traceparent(Headers(scope=scope).get("traceparent"))
+        )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                span.set_attribute("http.status_code", status_code)
+                if status_code >= 500:
+                    span.set_error(f"HTTP {status_code}")
+                if span.recording:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-trace-id", span.trace_id.encode())]
+            await send(message)
+
+        with tracer.use_span(span):
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = route_template(scope)
+                span.set_attribute("http.route", route)
+                if span.recording:
+                    span.name = f"{method} {route}"
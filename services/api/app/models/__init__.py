@@ -4,11 +4,19 @@ from app.models.program import Program
 from app.models.application import Application
 from app.models.beneficiary import Beneficiary
 from app.models.audit import AuditLog
+from app.models.refresh_token import RefreshToken
+from app.models.barangay_stats import BarangayStats
+from app.models.cohort_stats import CohortStats
+from app.models.idempotency_key import IdempotencyKey
 
 __all__ = [
     "User",
     "Program", 
     "Application",
     "Beneficiary",
-    "AuditLog"
+    "AuditLog",
+    "RefreshToken",
+    "BarangayStats",
+    "CohortStats",
+    "IdempotencyKey"
 ]
\ No newline at end of file
@@ -1,15 +1,25 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .user import Base
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        # One active application per user and program, used by ON CONFLICT when applying
+        Index(
+            "uq_applications_active_user_program",
+            "user_id",
+            "program_id",
+            unique=True,
+            postgresql_where=text("is_active")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     program_id = Column(Integer, ForeignKey("programs.id"), nullable=False)
-    status = Column(String(50), default="pending", nullable=False)  # pending, approved, rejected, withdrawn
+    status = Column(String(50), default="pending", nullable=False)  # pending, waitlisted, approved, rejected, withdrawn
     notes = Column(Text)
     applied_at = Column(DateTime(timezone=True), server_default=func.now())
     reviewed_at = Column(DateTime(timezone=True))
@@ -17,6 +27,9 @@ class Application(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped on every write; exposed as the ETag for If-Match updates
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
     
     # Relationships
     user = relationship("User", foreign_keys=[user_id], back_populates="applications")
@@ -0,0 +1,29 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class BarangayStats(Base):
+    """Per-barangay rollup of applications and active beneficiaries, kept current by delta upserts"""
+    __tablename__ = "barangay_stats"
+
+    barangay = Column(String, primary_key=True)  # User.barangay, "Unspecified" when missing
+
+    # Active applications
+    applications_total = Column(Integer, nullable=False, default=0, server_default="0")
+    applications_pending = Column(Integer, nullable=False, default=0, server_default="0")
+    applications_approved = Column(Integer, nullable=False, default=0, server_default="0")
+    applications_rejected = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Active beneficiaries
+    beneficiaries_total = Column(Integer, nullable=False, default=0, server_default="0")
+    household_size_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    household_size_reported = Column(Integer, nullable=False, default=0, server_default="0")
+    monthly_income_sum = Column(BigInteger, nullable=False, default=0, server_default="0")  # in cents
+    monthly_income_reported = Column(Integer, nullable=False, default=0, server_default="0")
+    income_below_5k = Column(Integer, nullable=False, default=0, server_default="0")
+    income_5k_10k = Column(Integer, nullable=False, default=0, server_default="0")
+    income_10k_20k = Column(Integer, nullable=False, default=0, server_default="0")
+    income_20k_40k = Column(Integer, nullable=False, default=0, server_default="0")
+    income_40k_up = Column(Integer, nullable=False, default=0, server_default="0")
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,10 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Date
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Date, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .user import Base
 
 class Beneficiary(Base):
     __tablename__ = "beneficiaries"
+    __table_args__ = (
+        # One active beneficiary per application, used by ON CONFLICT in batch enrollment
+        Index(
+            "uq_beneficiaries_active_application",
+            "application_id",
+            unique=True,
+            postgresql_where=text("is_active")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -26,6 +35,9 @@ class Beneficiary(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped on every write; exposed as the ETag for If-Match updates
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
     
     # Relationships
     user = relationship("User", back_populates="beneficiaries")
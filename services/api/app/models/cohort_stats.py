@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class CohortStats(Base):
+    """Funnel and duration statistics of the applications of one program submitted in one month"""
+    __tablename__ = "cohort_stats"
+
+    cohort_month = Column(Date, primary_key=True)  # First day of the month of applied_at
+    program_id = Column(Integer, ForeignKey("programs.id", ondelete="CASCADE"), primary_key=True)
+
+    # Funnel
+    applications = Column(Integer, nullable=False, default=0)
+    reviewed = Column(Integer, nullable=False, default=0)
+    approved = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    withdrawn = Column(Integer, nullable=False, default=0)
+    enrolled = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    dropped = Column(Integer, nullable=False, default=0)  # Enrolled, then removed or suspended
+
+    # Durations in days
+    review_days_median = Column(Float)
+    review_days_p90 = Column(Float)
+    enrollment_days_median = Column(Float)  # reviewed_at -> enrollment_date
+    completion_days_median = Column(Float)  # Kaplan-Meier, enrollment -> completion
+    completion_rate_90_days = Column(Float)  # Share completed within 90/180/365 days of enrolling
+    completion_rate_180_days = Column(Float)
+    completion_rate_365_days = Column(Float)
+    total_days_median = Column(Float)  # applied_at -> completion_date, completed only
+
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
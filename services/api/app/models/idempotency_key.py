@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, JSON, String, UniqueConstraint
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class IdempotencyKey(Base):
+    """A client-supplied Idempotency-Key and the response first returned for it"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Concurrent retries race on this constraint; exactly one claims the key
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    scope = Column(String(255), nullable=False)  # "<METHOD> <route>"
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the canonical request body
+    status = Column(String(20), nullable=False, default="in_progress")  # in_progress, completed
+    response_status = Column(Integer)
+    response_body = Column(JSON)
+    locked_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
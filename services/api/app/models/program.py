@@ -28,6 +28,7 @@ class Program(Base):
     status = Column(Enum(ProgramStatus), default=ProgramStatus.UPCOMING)
     max_participants = Column(Integer, nullable=False)
     current_participants = Column(Integer, default=0)
+    seats_reserved = Column(Integer, default=0, server_default="0", nullable=False)  # pending + approved applications
     start_date = Column(DateTime(timezone=True), nullable=False)
     end_date = Column(DateTime(timezone=True), nullable=False)
     location = Column(String, nullable=True)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum
+from typing import Optional
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -22,8 +23,10 @@ class User(Base):
     phone = Column(String, nullable=True)
     address = Column(String, nullable=True)
     occupation = Column(String, nullable=True)
+    tin = Column(String(20), nullable=True)  # Tax Identification Number
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
+    permissions_version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped on role/status changes
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
 class ApplicationBase(BaseModel):
     program_id: int
@@ -26,6 +26,7 @@ class ApplicationInDBBase(ApplicationBase):
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: int
 
 class Application(ApplicationInDBBase):
     pass
@@ -35,4 +36,21 @@ class ApplicationRead(ApplicationInDBBase):
     pass
 
 class ApplicationInDB(ApplicationInDBBase):
-    pass
\ No newline at end of file
+    pass
+
+class ApplicationBulkReview(BaseModel):
+    application_ids: List[int] = Field(..., min_length=1, max_length=5000)
+    status: Literal["approved", "rejected"]
+    notes: Optional[str] = None
+
+class ApplicationBulkReviewItem(BaseModel):
+    application_id: int
+    success: bool
+    status: Optional[str] = None
+    error: Optional[str] = None
+
+class ApplicationBulkReviewResult(BaseModel):
+    processed: int
+    succeeded: int
+    failed: int
+    results: List[ApplicationBulkReviewItem]
@@ -3,6 +3,7 @@ from pydantic import BaseModel, EmailStr, Field
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str
     expires_in: int
     user: dict
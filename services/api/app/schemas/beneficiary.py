@@ -1,6 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Optional
 
 class BeneficiaryBase(BaseModel):
     program_id: int
@@ -13,6 +13,7 @@ class BeneficiaryBase(BaseModel):
 
 class BeneficiaryCreate(BeneficiaryBase):
     user_id: int
+    progress_notes: Optional[str] = None
 
 class BeneficiaryUpdate(BaseModel):
     completion_date: Optional[date] = None
@@ -34,9 +35,33 @@ class BeneficiaryInDBBase(BeneficiaryBase):
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: int
 
 class Beneficiary(BeneficiaryInDBBase):
     pass
 
 class BeneficiaryInDB(BeneficiaryInDBBase):
-    pass
\ No newline at end of file
+    pass
+
+class BeneficiaryBatchEnroll(BaseModel):
+    program_id: Optional[int] = None
+    application_ids: Optional[List[int]] = Field(None, min_length=1, max_length=5000)
+    enrollment_date: Optional[date] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if self.program_id is None and not self.application_ids:
+            raise ValueError("Provide a program_id or application_ids")
+        return self
+
+class BeneficiaryBatchEnrollItem(BaseModel):
+    application_id: int
+    success: bool
+    beneficiary_id: Optional[int] = None
+    error: Optional[str] = None
+
+class BeneficiaryBatchEnrollResult(BaseModel):
+    processed: int
+    succeeded: int
+    failed: int
+    results: List[BeneficiaryBatchEnrollItem]
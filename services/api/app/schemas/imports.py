@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+class ImportSummary(BaseModel):
+    import_id: str
+    kind: str
+    dry_run: bool
+    total_rows: int
+    valid_rows: int
+    invalid_rows: int
+    users_created: int
+    users_updated: int
+    applications_created: int
+    beneficiaries_created: int
+    has_error_report: bool
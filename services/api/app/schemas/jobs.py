@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+
+class Job(BaseModel):
+    job_id: str
+    job_type: str
+    params: Dict[str, Any]
+    status: str  # pending, running, completed, failed
+    progress: int  # percent
+    step: Optional[str] = None
+    download_name: Optional[str] = None
+    error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+class Profile(BaseModel):
+    profile_id: str
+    method: str
+    path: str
+    route: str
+    status_code: int
+    user_id: int
+    duration_ms: float
+    samples: int
+    interval_ms: float
+    truncated: bool  # sampling stopped at PROFILING_MAX_SECONDS
+    created_at: str
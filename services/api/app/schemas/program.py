@@ -42,6 +42,7 @@ class ProgramUpdate(ProgramBase):
 
 class ProgramInDBBase(ProgramBase):
     id: Optional[int] = None
+    seats_reserved: Optional[int] = 0
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+
+class QuarterlyReportCreate(BaseModel):
+    year: int = Field(..., ge=2000, le=2100)
+    quarter: int = Field(..., ge=1, le=4)
+    format: str = Field("xlsx", pattern="^(csv|xlsx|pdf)$")
@@ -0,0 +1,31 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class ResumableUploadCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    total_size: int = Field(..., gt=0)
+    content_type: Optional[str] = Field(None, max_length=255)
+    subfolder: str = Field("general", pattern=r"^[a-z0-9_-]{1,50}$")
+
+class ResumableUploadStatus(BaseModel):
+    upload_id: str
+    filename: str
+    offset: int
+    total_size: int
+    is_complete: bool
+    expires_at: str
+
+class FileInfo(BaseModel):
+    id: str
+    original_filename: str
+    stored_filename: str
+    relative_path: str
+    file_size: int
+    file_size_formatted: str
+    content_type: Optional[str] = None
+    file_extension: str
+    is_image: bool
+    is_document: bool
+    uploaded_at: str
+    uploaded_by: Optional[int] = None
+    subfolder: str
@@ -7,6 +7,18 @@ from app.services.auth_service import auth_service
 from app.services.user_service import user_service
 from app.services.program_service import program_service
 from app.services.file_service import file_service
+from app.services.upload_service import upload_service
+from app.services.token_service import token_service
+from app.services.import_service import import_service
+from app.services.export_service import export_service
+from app.services.analytics_service import analytics_service
+from app.services.barangay_stats_service import barangay_stats_service
+from app.services.cohort_service import cohort_service
+from app.services.job_service import job_service
+from app.services.seat_service import seat_service
+from app.services.idempotency_service import idempotency_service
+from app.services.report_service import report_service
+from app.services.profile_service import profile_service
 
 __all__ = [
     "application_service",
@@ -16,5 +28,17 @@ __all__ = [
     "auth_service",
     "user_service",
     "program_service",
-    "file_service"
+    "file_service",
+    "upload_service",
+    "token_service",
+    "import_service",
+    "export_service",
+    "analytics_service",
+    "barangay_stats_service",
+    "cohort_service",
+    "job_service",
+    "seat_service",
+    "idempotency_service",
+    "report_service",
+    "profile_service"
 ]
\ No newline at end of file
@@ -0,0 +1,539 @@
+"""Analytics Service - trends and program figures for reporting dashboards"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import DateTime, cast, func, literal, literal_column, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.tracing import trace_methods
+from app.models.application import Application
+from app.models.beneficiary import Beneficiary
+from app.models.program import Program
+from app.models.user import User
+from app.utils.helpers import parse_budget_amount
+
+TREND_METRICS = ("applications", "enrollments")
+TREND_BUCKETS = ("day", "week", "month")
+TREND_DIMENSIONS = ("status", "program", "category", "barangay")
+
+CACHE_NAMESPACE = "analytics:trends"
+PROGRAMS_CACHE_NAMESPACE = "analytics:programs"
+INCOME_CACHE_NAMESPACE = "analytics:income"
+INCOME_GROUPS = ("program", "category", "barangay")
+QUANTILES = (10, 25, 50, 75, 90)
+# Monthly household income histogram edges in pesos
+INCOME_HISTOGRAM_EDGES = (0, 5_000, 10_000, 20_000, 40_000, np.inf)
+PROGRAM_SORT_FIELDS = (
+    "title",
+    "budget",
+    "budget_committed",
+    "budget_remaining",
+    "budget_utilization",
+    "fill_rate",
+    "approval_rate",
+    "demand_ratio",
+    "schedule_elapsed",
+    "applications_total",
+    "beneficiaries_total",
+)
+
+
+def _rank_descending(values: np.ndarray) -> np.ndarray:
+    """1 for the largest value; NaN values rank last"""
+    order = np.argsort(np.where(np.isnan(values), np.inf, -values), kind="stable")
+    ranks = np.empty(len(values), dtype=int)
+    ranks[order] = np.arange(1, len(values) + 1)
+    return ranks
+
+
+def _number(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+@trace_methods
+class AnalyticsService:
+    """
+    Reporting aggregates over applications and beneficiaries.
+
+    Trends are counted per ``date_trunc`` bucket in the local timezone and
+    gap-filled with ``generate_series``, so days with no activity show up as
+    zeros. Closed buckets are cached and only the open bucket (and any cache
+    misses) are queried. They can still change: enrollment dates come from
+    the client and rows are soft deleted, so those writes and imports bump
+    the cache generation via ``invalidate``. Without Redis that only reaches
+    the current worker, so closed buckets also expire after
+    ANALYTICS_TRENDS_CACHE_TTL (ANALYTICS_STATUS_CACHE_TTL by status).
+    """
+
+    def __init__(self):
+        self.timezone = ZoneInfo(settings.ANALYTICS_TIMEZONE)
+        self.max_buckets = settings.ANALYTICS_MAX_BUCKETS
+
+    def today(self) -> date:
+        return datetime.now(self.timezone).date()
+
+    @staticmethod
+    def bucket_start(day: date, bucket: str) -> date:
+        """Python twin of ``date_trunc`` for day, week (ISO, Monday) and month"""
+        if bucket == "week":
+            return day - timedelta(days=day.weekday())
+        if bucket == "month":
+            return day.replace(day=1)
+        return day
+
+    @staticmethod
+    def next_bucket(start: date, bucket: str) -> date:
+        if bucket == "week":
+            return start + timedelta(days=7)
+        if bucket == "month":
+            return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return start + timedelta(days=1)
+
+    def _buckets(self, start: date, end: date, bucket: str) -> List[date]:
+        buckets = []
+        current = self.bucket_start(start, bucket)
+        while current <= end:
+            buckets.append(current)
+            if len(buckets) > self.max_buckets:
+                raise ValueError(f"Date range spans more than {self.max_buckets} {bucket} buckets")
+            current = self.next_bucket(current, bucket)
+        return buckets
+
+    def _query_buckets(
+        self,
+        db: Session,
+        metric: str,
+        bucket: str,
+        dimension: Optional[str],
+        program_id: Optional[int],
+        first: date,
+        last: date
+    ) -> Dict[date, Dict[str, int]]:
+        """Count rows per bucket (and dimension) from ``first`` through ``last`` bucket"""
+        if metric == "applications":
+            model = Application
+            # Local wall-clock time, so buckets follow the office's calendar
+            timestamp = func.timezone(settings.ANALYTICS_TIMEZONE, Application.applied_at)
+        else:
+            model = Beneficiary
+            timestamp = cast(Beneficiary.enrollment_date, DateTime)
+
+        dimension_column = {
+            None: literal(None),
+            "status": model.status,
+            "program": Program.title,
+            "category": Program.category,
+            "barangay": func.coalesce(User.barangay, "Unspecified"),
+        }[dimension]
+
+        interval = literal_column(f"interval '1 {bucket}'")
+        bucket_column = func.date_trunc(bucket, timestamp)
+
+        counts_query = (
+            select(
+                bucket_column.label("bucket"),
+                dimension_column.label("dimension"),
+                func.count(model.id).label("count")
+            )
+            .select_from(model)
+            .where(
+                model.is_active == True,
+                timestamp >= first,
+                timestamp < self.next_bucket(last, bucket)
+            )
+            .group_by(bucket_column, dimension_column)
+        )
+        if dimension in ("program", "category"):
+            counts_query = counts_query.join(Program, Program.id == model.program_id)
+        elif dimension == "barangay":
+            counts_query = counts_query.join(User, User.id == model.user_id)
+        if program_id is not None:
+            counts_query = counts_query.where(model.program_id == program_id)
+        counts = counts_query.subquery()
+
+        series = select(
+            func.generate_series(cast(first, DateTime), cast(last, DateTime), interval).label("bucket")
+        ).subquery()
+
+        rows = db.execute(
+            select(series.c.bucket, counts.c.dimension, counts.c.count)
+            .select_from(series.outerjoin(counts, counts.c.bucket == series.c.bucket))
+            .order_by(series.c.bucket)
+        ).all()
+
+        results: Dict[date, Dict[str, int]] = {}
+        for bucket_start, dimension_value, count in rows:
+            breakdown = results.setdefault(bucket_start.date(), {})
+            if count:
+                key = getattr(dimension_value, "value", dimension_value)
+                breakdown["total" if dimension is None else str(key)] = count
+        return results
+
+    def get_trends(
+        self,
+        db: Session,
+        metric: str,
+        bucket: str = "day",
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        dimension: Optional[str] = None,
+        program_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Get gap-filled counts of applications (by applied date) or enrollments
+        (by enrollment date), optionally broken down by a dimension.
+
+        The range is widened to whole buckets; it defaults to the last 30 days.
+        """
+        if metric not in TREND_METRICS:
+            raise ValueError(f"Invalid metric. Must be one of: {', '.join(TREND_METRICS)}")
+        if bucket not in TREND_BUCKETS:
+            raise ValueError(f"Invalid bucket. Must be one of: {', '.join(TREND_BUCKETS)}")
+        if dimension is not None and dimension not in TREND_DIMENSIONS:
+            raise ValueError(f"Invalid dimension. Must be one of: {', '.join(TREND_DIMENSIONS)}")
+
+        today = self.today()
+        end = end or today
+        start = start or end - timedelta(days=29)
+        if start > end:
+            raise ValueError("Start date must be before end date")
+
+        buckets = self._buckets(start, end, bucket)
+        open_bucket = self.bucket_start(today, bucket)
+
+        generation = cache.get_generation(CACHE_NAMESPACE)
+        key_prefix = f"{CACHE_NAMESPACE}:{generation}:{metric}:{bucket}:{dimension}:{program_id}"
+        closed = [b for b in buckets if b < open_bucket]
+        cached = dict(zip(closed, cache.get_many([f"{key_prefix}:{b.isoformat()}" for b in closed])))
+
+        missing = [b for b in buckets if cached.get(b) is None]
+        if missing:
+            computed = self._query_buckets(db, metric, bucket, dimension, program_id, missing[0], missing[-1])
+            newly_closed = {b: computed.get(b, {}) for b in missing if b < open_bucket}
+            cache.set_many(
+                {f"{key_prefix}:{b.isoformat()}": breakdown for b, breakdown in newly_closed.items()},
+                # Review decisions move older applications between statuses
+                ttl=settings.ANALYTICS_STATUS_CACHE_TTL if dimension == "status" else settings.ANALYTICS_TRENDS_CACHE_TTL
+            )
+            for b in missing:
+                cached[b] = computed.get(b, {})
+
+        dimension_values = sorted({key for b in buckets for key in cached[b]}) if dimension else []
+        series = []
+        for b in buckets:
+            breakdown = cached[b]
+            entry = {
+                "bucket": b.isoformat(),
+                "total": sum(breakdown.values()),
+            }
+            if dimension:
+                entry["breakdown"] = {value: breakdown.get(value, 0) for value in dimension_values}
+            series.append(entry)
+
+        return {
+            "metric": metric,
+            "bucket": bucket,
+            "dimension": dimension,
+            "start": buckets[0].isoformat(),
+            "end": (self.next_bucket(buckets[-1], bucket) - timedelta(days=1)).isoformat(),
+            "dimension_values": dimension_values,
+            "series": series
+        }
+
+    def get_program_overview(
+        self,
+        db: Session,
+        sort_by: str = "budget_utilization",
+        descending: bool = True,
+        category: Optional[str] = None,
+        active_only: bool = False,
+        program_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get budget and utilization figures for every program.
+
+        Counts come from one statement that joins programs to pre-aggregated
+        applications and beneficiaries; the derived figures are computed over
+        the whole set as NumPy arrays. There is no disbursement data, so the
+        committed budget is the per-seat budget times enrolled beneficiaries.
+        Results are cached for ANALYTICS_PROGRAMS_CACHE_TTL seconds, or until
+        reviews, enrollments, deletions or imports invalidate them.
+        """
+        if sort_by not in PROGRAM_SORT_FIELDS:
+            raise ValueError(f"Invalid sort field. Must be one of: {', '.join(PROGRAM_SORT_FIELDS)}")
+
+        generation = cache.get_generation(PROGRAMS_CACHE_NAMESPACE)
+        cache_key = f"{PROGRAMS_CACHE_NAMESPACE}:{generation}:{category}:{active_only}:{program_ids}"
+        overview = cache.get(cache_key)
+        if overview is None:
+            overview = self._compute_program_overview(db, category, active_only, program_ids)
+            cache.set(cache_key, overview, ttl=settings.ANALYTICS_PROGRAMS_CACHE_TTL)
+
+        # Programs missing the figure (e.g. no parsable budget) always go last
+        ranked = [program for program in overview["programs"] if program[sort_by] is not None]
+        ranked.sort(key=lambda program: program[sort_by], reverse=descending)
+        overview["programs"] = ranked + [program for program in overview["programs"] if program[sort_by] is None]
+        overview["sort_by"] = sort_by
+        overview["descending"] = descending
+        return overview
+
+    def _compute_program_overview(
+        self,
+        db: Session,
+        category: Optional[str],
+        active_only: bool,
+        program_ids: Optional[List[int]]
+    ) -> Dict[str, Any]:
+        applications = (
+            select(
+                Application.program_id,
+                func.count(Application.id).label("applications_total"),
+                func.count(Application.id).filter(Application.status == "pending").label("applications_pending"),
+                func.count(Application.id).filter(Application.status == "approved").label("applications_approved"),
+                func.count(Application.id).filter(Application.status == "rejected").label("applications_rejected"),
+            )
+            .where(Application.is_active == True)
+            .group_by(Application.program_id)
+            .subquery()
+        )
+        beneficiaries = (
+            select(
+                Beneficiary.program_id,
+                func.count(Beneficiary.id).label("beneficiaries_total"),
+                func.count(Beneficiary.id).filter(Beneficiary.status == "completed").label("beneficiaries_completed"),
+            )
+            .where(Beneficiary.is_active == True)
+            .group_by(Beneficiary.program_id)
+            .subquery()
+        )
+        query = (
+            select(
+                Program.id,
+                Program.title,
+                Program.category,
+                Program.status,
+                Program.budget,
+                Program.max_participants,
+                Program.start_date,
+                Program.end_date,
+                func.coalesce(applications.c.applications_total, 0),
+                func.coalesce(applications.c.applications_pending, 0),
+                func.coalesce(applications.c.applications_approved, 0),
+                func.coalesce(applications.c.applications_rejected, 0),
+                func.coalesce(beneficiaries.c.beneficiaries_total, 0),
+                func.coalesce(beneficiaries.c.beneficiaries_completed, 0),
+            )
+            .outerjoin(applications, applications.c.program_id == Program.id)
+            .outerjoin(beneficiaries, beneficiaries.c.program_id == Program.id)
+        )
+        if category:
+            query = query.where(Program.category == category)
+        if active_only:
+            query = query.where(Program.is_active == True)
+        if program_ids is not None:
+            query = query.where(Program.id.in_(program_ids))
+        rows = db.execute(query).all()
+
+        budgets = [parse_budget_amount(row[4]) for row in rows]
+        budget = np.array([np.nan if amount is None else amount for amount in budgets], dtype=float)
+        seats = np.array([row[5] or 0 for row in rows], dtype=float)
+        start = np.array([row[6].timestamp() if row[6] else np.nan for row in rows], dtype=float)
+        end = np.array([row[7].timestamp() if row[7] else np.nan for row in rows], dtype=float)
+        counts = np.array([row[8:] for row in rows], dtype=float).reshape(len(rows), 6)
+        applications_total, pending, approved, rejected, enrolled, completed = counts.T
+        reviewed = approved + rejected
+        now = datetime.now(self.timezone).timestamp()
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fill_rate = np.where(seats > 0, enrolled / seats * 100, np.nan)
+            budget_per_seat = np.where(seats > 0, budget / seats, np.nan)
+            committed = budget_per_seat * enrolled
+            remaining = budget - committed
+            utilization = np.where(budget > 0, committed / budget * 100, np.nan)
+            approval_rate = np.where(reviewed > 0, approved / reviewed * 100, np.nan)
+            demand_ratio = np.where(seats > 0, applications_total / seats, np.nan)
+            schedule_elapsed = np.where(end > start, np.clip((now - start) / (end - start), 0, 1) * 100, np.nan)
+
+        utilization_rank = _rank_descending(utilization)
+        fill_rate_rank = _rank_descending(fill_rate)
+        demand_rank = _rank_descending(demand_ratio)
+
+        programs = []
+        for i, row in enumerate(rows):
+            programs.append({
+                "program_id": row[0],
+                "title": row[1],
+                "category": getattr(row[2], "value", row[2]),
+                "status": getattr(row[3], "value", row[3]),
+                "max_participants": int(seats[i]),
+                "applications_total": int(applications_total[i]),
+                "applications_pending": int(pending[i]),
+                "applications_approved": int(approved[i]),
+                "applications_rejected": int(rejected[i]),
+                "beneficiaries_total": int(enrolled[i]),
+                "beneficiaries_completed": int(completed[i]),
+                "budget": _number(budget[i]),
+                "budget_per_seat": _number(budget_per_seat[i]),
+                "budget_committed": _number(committed[i]),
+                "budget_remaining": _number(remaining[i]),
+                "budget_utilization": _number(utilization[i]),
+                "fill_rate": _number(fill_rate[i]),
+                "approval_rate": _number(approval_rate[i]),
+                "demand_ratio": _number(demand_ratio[i]),
+                "schedule_elapsed": _number(schedule_elapsed[i]),
+                "utilization_rank": int(utilization_rank[i]),
+                "fill_rate_rank": int(fill_rate_rank[i]),
+                "demand_rank": int(demand_rank[i]),
+            })
+
+        total_budget = np.nansum(budget)
+        total_committed = np.nansum(committed)
+        total_seats = seats.sum()
+        return {
+            "totals": {
+                "programs": len(rows),
+                "budget": _number(total_budget),
+                "budget_committed": _number(total_committed),
+                "budget_remaining": _number(total_budget - total_committed),
+                "budget_utilization": _number(total_committed / total_budget * 100) if total_budget else None,
+                "seats": int(total_seats),
+                "beneficiaries": int(enrolled.sum()),
+                "fill_rate": _number(enrolled.sum() / total_seats * 100) if total_seats else None,
+                "programs_without_budget": int(np.isnan(budget).sum()),
+            },
+            "programs": programs,
+        }
+
+    def get_income_distribution(
+        self,
+        db: Session,
+        group_by: Optional[str] = None,
+        program_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Get income, household size and per-capita income distributions of
+        active beneficiaries, overall or per program, category or barangay.
+
+        The columns are fetched in one query and summarized with NumPy per
+        group. Results are cached under a version of the beneficiary rows
+        (count, last id and last update), so any enrollment or edit yields
+        a fresh computation.
+        """
+        if group_by is not None and group_by not in INCOME_GROUPS:
+            raise ValueError(f"Invalid grouping. Must be one of: {', '.join(INCOME_GROUPS)}")
+
+        conditions = [Beneficiary.is_active == True]
+        if program_id is not None:
+            conditions.append(Beneficiary.program_id == program_id)
+
+        version = db.execute(
+            select(
+                func.count(Beneficiary.id),
+                func.max(Beneficiary.id),
+                func.max(func.coalesce(Beneficiary.updated_at, Beneficiary.created_at))
+            ).where(*conditions)
+        ).one()
+        cache_key = f"{INCOME_CACHE_NAMESPACE}:{group_by}:{program_id}:{version[0]}:{version[1]}:{version[2]}"
+        distribution = cache.get(cache_key)
+        if distribution is None:
+            distribution = self._compute_income_distribution(db, group_by, conditions)
+            cache.set(cache_key, distribution, ttl=settings.ANALYTICS_INCOME_CACHE_TTL)
+        return distribution
+
+    def _compute_income_distribution(self, db: Session, group_by: Optional[str], conditions: List[Any]) -> Dict[str, Any]:
+        group_column = {
+            None: literal("all"),
+            "program": Program.title,
+            "category": Program.category,
+            "barangay": func.coalesce(func.nullif(func.trim(User.barangay), ""), "Unspecified"),
+        }[group_by]
+
+        query = select(group_column, Beneficiary.monthly_income, Beneficiary.household_size).where(*conditions)
+        if group_by in ("program", "category"):
+            query = query.join(Program, Program.id == Beneficiary.program_id)
+        elif group_by == "barangay":
+            query = query.join(User, User.id == Beneficiary.user_id)
+        rows = db.execute(query).all()
+
+        keys = np.array([str(getattr(row[0], "value", row[0])) for row in rows], dtype=object)
+        income = np.array([np.nan if row[1] is None else row[1] / 100 for row in rows], dtype=float)
+        household = np.array([np.nan if not row[2] else row[2] for row in rows], dtype=float)
+        per_capita = income / household
+
+        labels, inverse = np.unique(keys, return_inverse=True)
+        group_count = len(labels)
+
+        # Poverty counts and histograms for every group at once
+        below_poverty = np.bincount(
+            inverse, weights=per_capita < settings.POVERTY_THRESHOLD_PER_CAPITA_MONTHLY, minlength=group_count
+        )
+        below_food = np.bincount(
+            inverse, weights=per_capita < settings.FOOD_THRESHOLD_PER_CAPITA_MONTHLY, minlength=group_count
+        )
+        with_per_capita = np.bincount(inverse, weights=~np.isnan(per_capita), minlength=group_count)
+
+        bin_count = len(INCOME_HISTOGRAM_EDGES) - 1
+        income_bins = np.digitize(income, INCOME_HISTOGRAM_EDGES[1:-1])
+        reported = ~np.isnan(income)
+        histograms = np.bincount(
+            inverse[reported] * bin_count + income_bins[reported], minlength=group_count * bin_count
+        ).reshape(group_count, bin_count)
+        bin_labels = [
+            f"{int(low):,}+" if np.isinf(high) else f"{int(low):,}-{int(high):,}"
+            for low, high in zip(INCOME_HISTOGRAM_EDGES[:-1], INCOME_HISTOGRAM_EDGES[1:])
+        ]
+
+        # Contiguous slices per group for the quantiles
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(inverse, minlength=group_count))))
+
+        def summarize(values: np.ndarray) -> Dict[str, Any]:
+            values = values[~np.isnan(values)]
+            if not len(values):
+                return {"reported": 0, "mean": None, **{f"p{q}": None for q in QUANTILES}}
+            percentiles = np.percentile(values, QUANTILES)
+            return {
+                "reported": int(len(values)),
+                "mean": _number(values.mean()),
+                **{f"p{q}": _number(value) for q, value in zip(QUANTILES, percentiles)},
+            }
+
+        groups = []
+        for i, label in enumerate(labels):
+            members = order[bounds[i]:bounds[i + 1]]
+            counted = int(with_per_capita[i])
+            groups.append({
+                "group": label,
+                "beneficiaries": int(len(members)),
+                "monthly_income": summarize(income[members]),
+                "household_size": summarize(household[members]),
+                "per_capita_income": summarize(per_capita[members]),
+                "income_histogram": dict(zip(bin_labels, histograms[i].tolist())),
+                "below_poverty_threshold": int(below_poverty[i]),
+                "below_food_threshold": int(below_food[i]),
+                "poverty_incidence": _number(below_poverty[i] / counted * 100) if counted else None,
+            })
+
+        return {
+            "group_by": group_by,
+            "poverty_threshold_per_capita": settings.POVERTY_THRESHOLD_PER_CAPITA_MONTHLY,
+            "food_threshold_per_capita": settings.FOOD_THRESHOLD_PER_CAPITA_MONTHLY,
+            "groups": groups,
+        }
+
+    def invalidate(self) -> None:
+        """Drop cached trend buckets and program overviews, e.g. after data is imported or edited"""
+        cache.bump_generation(CACHE_NAMESPACE)
+        self.invalidate_program_overview()
+
+    def invalidate_program_overview(self) -> None:
+        """Drop cached program overviews, e.g. after applications are reviewed"""
+        cache.bump_generation(PROGRAMS_CACHE_NAMESPACE)
+
+
+# Create service instance
+analytics_service = AnalyticsService()
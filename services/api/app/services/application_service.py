@@ -1,55 +1,75 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from collections import Counter
 from datetime import datetime
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
+from app.core.exceptions import ConflictError, NotFoundError, PreconditionFailedError
+from app.core.tracing import trace_methods
 from app.models.application import Application
 from app.models.program import Program
 from app.models.user import User
 from app.schemas.application import ApplicationCreate, ApplicationUpdate
+from app.services.analytics_service import analytics_service
 from app.services.audit_service import audit_service
+from app.services.barangay_stats_service import barangay_stats_service
 from app.services.notification_service import notification_service
+from app.services.seat_service import WAITLISTED, seat_service
 
+@trace_methods
 class ApplicationService:
     """Complete application management service"""
     
     def create_application(self, db: Session, application_create: ApplicationCreate, user_id: int) -> Application:
         """Create new program application"""
-        # Check if user already applied to this program
-        existing_application = db.query(Application).filter(
-            Application.user_id == user_id,
-            Application.program_id == application_create.program_id,
-            Application.is_active == True
-        ).first()
-        
-        if existing_application:
-            raise ValueError("User has already applied to this program")
-        
         # Check if program exists and is accepting applications
         program = db.query(Program).filter(Program.id == application_create.program_id).first()
         if not program:
-            raise ValueError("Program not found")
+            raise NotFoundError("Program not found")
         
-        if program.status != "active":
+        if not program.is_active or program.status != "active":
             raise ValueError("Program is not accepting applications")
         
-        # Create application
-        db_application = Application(
-            user_id=user_id,
-            program_id=application_create.program_id,
-            notes=application_create.notes,
-            status="pending",
-            applied_at=datetime.utcnow(),
-            is_active=True
-        )
+        # Take a seat, or join the waitlist when the program is full
+        seated = seat_service.reserve(db, program.id)
         
-        db.add(db_application)
+        # The unique partial index on active (user_id, program_id) rejects
+        # duplicates atomically, so there is no separate existence check
+        db_application = db.scalars(
+            pg_insert(Application)
+            .values(
+                user_id=user_id,
+                program_id=application_create.program_id,
+                notes=application_create.notes,
+                status="pending" if seated else WAITLISTED,
+                applied_at=datetime.utcnow(),
+                is_active=True
+            )
+            .on_conflict_do_nothing(
+                index_elements=[Application.user_id, Application.program_id],
+                index_where=Application.is_active == True
+            )
+            .returning(Application)
+        ).first()
+        if db_application is None:
+            # Also gives back the seat reserved above
+            db.rollback()
+            raise ConflictError("User has already applied to this program")
+        
+        barangay_stats_service.record_applications(db, [db_application.id], new_status=db_application.status)
         db.commit()
-        db.refresh(db_application)
+        analytics_service.invalidate_program_overview()
         
         # Send notification
         user = db.query(User).filter(User.id == user_id).first()
-        notification_service.send_application_confirmation(
-            user.email, user.name, program.title
-        )
+        if seated:
+            notification_service.send_application_confirmation(
+                user.email, user.name, program.title
+            )
+        else:
+            notification_service.send_application_waitlisted(
+                user.email, user.name, program.title, seat_service.waitlist_position(db, db_application)
+            )
         
         # Log audit
         audit_service.log_action(
@@ -88,6 +108,10 @@ class ApplicationService:
             return None
         
         old_status = application.status
+        takes_seat = not seat_service.holds_seat(old_status) and seat_service.holds_seat(status)
+        if application.is_active and takes_seat and not seat_service.reserve(db, application.program_id):
+            raise ValueError("Program has no remaining slots")
+        
         application.status = status
         application.reviewed_by = reviewed_by
         application.reviewed_at = datetime.utcnow()
@@ -95,8 +119,17 @@ class ApplicationService:
         if notes:
             application.notes = notes
         
+        # Seats before stats, the lock order of every application write
+        promoted_ids = []
+        if application.is_active:
+            if seat_service.holds_seat(old_status) and not seat_service.holds_seat(status):
+                promoted_ids = seat_service.release(db, application.program_id)
+            barangay_stats_service.record_applications(db, [application_id], old_status, status)
         db.commit()
+        # Program overviews count applications by status
+        analytics_service.invalidate_program_overview()
         db.refresh(application)
+        self._notify_promoted(db, promoted_ids)
         
         # Send notification
         user = db.query(User).filter(User.id == application.user_id).first()
@@ -125,6 +158,121 @@ class ApplicationService:
         
         return application
     
+    def _notify_promoted(self, db: Session, promoted_ids: List[int]) -> None:
+        if promoted_ids:
+            notification_service.send_waitlist_promotions(seat_service.promotion_notifications(db, promoted_ids))
+    
+    def approve_application(self, db: Session, application_id: int, approved_by: int, notes: Optional[str] = None) -> Optional[Application]:
+        """Approve a pending application"""
+        return self.update_application_status(db, application_id, "approved", approved_by, notes)
+    
+    def reject_application(self, db: Session, application_id: int, rejected_by: int, rejection_reason: Optional[str] = None) -> Optional[Application]:
+        """Reject a pending application"""
+        return self.update_application_status(db, application_id, "rejected", rejected_by, rejection_reason)
+    
+    def bulk_update_application_status(
+        self,
+        db: Session,
+        application_ids: List[int],
+        status: str,
+        reviewed_by: int,
+        notes: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Approve or reject many pending applications in one transaction.
+
+        The status change is a single UPDATE ... RETURNING and the audit rows
+        a single INSERT. Seats of rejected applications go to the waitlist.
+        Notifications are not sent here; the returned ``notifications`` are
+        meant for ``send_application_decisions`` and ``promotions`` for
+        ``send_waitlist_promotions``.
+        """
+        application_ids = list(dict.fromkeys(application_ids))
+        values = {
+            "status": status,
+            "reviewed_by": reviewed_by,
+            "reviewed_at": datetime.utcnow(),
+        }
+        if notes:
+            values["notes"] = notes
+        
+        updated_rows = db.execute(
+            update(Application)
+            .where(
+                Application.id.in_(application_ids),
+                Application.status == "pending",
+                Application.is_active == True
+            )
+            .values(**values, version=Application.version + 1)
+            .returning(Application.id, Application.program_id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        updated_ids = {row.id for row in updated_rows}
+        
+        audit_service.log_actions_bulk(db, [
+            {
+                "user_id": reviewed_by,
+                "action": "APPLICATION_STATUS_UPDATED",
+                "resource_type": "Application",
+                "resource_id": application_id,
+                "old_values": {"status": "pending"},
+                "new_values": {"status": status},
+                "description": f"Application status changed from pending to {status} (bulk review)"
+            }
+            for application_id in updated_ids
+        ], commit=False)
+        
+        promoted_ids = []
+        if not seat_service.holds_seat(status):
+            for program_id, released in sorted(Counter(row.program_id for row in updated_rows).items()):
+                promoted_ids.extend(seat_service.release(db, program_id, released))
+        barangay_stats_service.record_applications(db, updated_ids, "pending", status)
+        
+        db.commit()
+        if updated_ids:
+            analytics_service.invalidate_program_overview()
+        
+        # Explain the rows the UPDATE skipped
+        skipped_ids = [i for i in application_ids if i not in updated_ids]
+        skipped_status = dict(
+            db.query(Application.id, Application.status).filter(
+                Application.id.in_(skipped_ids),
+                Application.is_active == True
+            ).all()
+        ) if skipped_ids else {}
+        
+        results = []
+        for application_id in application_ids:
+            if application_id in updated_ids:
+                results.append({"application_id": application_id, "success": True, "status": status})
+            elif application_id in skipped_status:
+                results.append({
+                    "application_id": application_id,
+                    "success": False,
+                    "status": skipped_status[application_id],
+                    "error": "Only pending applications can be reviewed"
+                })
+            else:
+                results.append({"application_id": application_id, "success": False, "error": "Application not found"})
+        
+        notifications = [
+            {"email": email, "name": name, "program_name": program_name, "status": status}
+            for email, name, program_name in db.query(User.email, User.name, Program.title)
+            .join(Application, Application.user_id == User.id)
+            .join(Program, Program.id == Application.program_id)
+            .filter(Application.id.in_(updated_ids))
+            .all()
+        ] if updated_ids else []
+        
+        return {
+            "processed": len(application_ids),
+            "succeeded": len(updated_ids),
+            "failed": len(application_ids) - len(updated_ids),
+            "results": results,
+            "notifications": notifications,
+            "promotions": seat_service.promotion_notifications(db, promoted_ids)
+        }
+    
     def withdraw_application(self, db: Session, application_id: int, user_id: int) -> bool:
         """Withdraw application"""
         application = db.query(Application).filter(
@@ -138,10 +286,18 @@ class ApplicationService:
         if application.status in ["approved", "rejected"]:
             raise ValueError("Cannot withdraw processed application")
         
+        promoted_ids = []
+        if application.is_active:
+            if seat_service.holds_seat(application.status):
+                promoted_ids = seat_service.release(db, application.program_id)
+            barangay_stats_service.record_applications(db, [application_id], old_status=application.status)
         application.status = "withdrawn"
         application.is_active = False
         
         db.commit()
+        # Drops the application from trend buckets that may already be cached
+        analytics_service.invalidate()
+        self._notify_promoted(db, promoted_ids)
         
         # Log audit
         audit_service.log_action(
@@ -155,8 +311,22 @@ class ApplicationService:
         
         return True
     
-    def update_application(self, db: Session, application_id: int, application_update: ApplicationUpdate, updated_by: int) -> Optional[Application]:
-        """Update application information"""
+    def update_application(
+        self,
+        db: Session,
+        application_id: int,
+        application_update: ApplicationUpdate,
+        updated_by: int,
+        expected_version: Optional[int] = None
+    ) -> Optional[Application]:
+        """
+        Update application information.
+        
+        The write is ``UPDATE ... WHERE version = :v RETURNING``, with ``v``
+        the client's If-Match version or else the version just read, so a
+        concurrent edit is never overwritten: it raises
+        PreconditionFailedError instead.
+        """
         application = self.get_application(db, application_id)
         if not application:
             return None
@@ -165,16 +335,31 @@ class ApplicationService:
         if application.status != "pending":
             raise ValueError("Can only update pending applications")
         
+        if expected_version is None:
+            expected_version = application.version
+        
         update_data = application_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            if field not in ["status", "reviewed_by", "reviewed_at"]:  # Prevent status changes
-                setattr(application, field, value)
+        values = {
+            field: value for field, value in update_data.items()
+            if field not in ["status", "reviewed_by", "reviewed_at"]  # Prevent status changes
+        }
         
-        application.updated_at = datetime.utcnow()
-        application.updated_by = updated_by
+        application = db.scalars(
+            update(Application)
+            .where(
+                Application.id == application_id,
+                Application.version == expected_version,
+                Application.status == "pending"
+            )
+            .values(**values, updated_at=func.now(), version=Application.version + 1)
+            .returning(Application),
+            execution_options={"synchronize_session": False, "populate_existing": True}
+        ).first()
+        if application is None:
+            db.rollback()
+            raise PreconditionFailedError("Application was modified by another request")
         
         db.commit()
-        db.refresh(application)
         
         # Log audit
         audit_service.log_action(
@@ -183,6 +368,7 @@ class ApplicationService:
             action="APPLICATION_UPDATED",
             resource_type="Application",
             resource_id=application_id,
+            new_values=values,
             description="Application updated"
         )
         
@@ -194,11 +380,18 @@ class ApplicationService:
         if not application:
             return False
         
+        promoted_ids = []
+        if application.is_active:
+            if seat_service.holds_seat(application.status):
+                promoted_ids = seat_service.release(db, application.program_id)
+            barangay_stats_service.record_applications(db, [application_id], old_status=application.status)
         application.is_active = False
         application.deleted_at = datetime.utcnow()
         application.deleted_by = deleted_by
         
         db.commit()
+        analytics_service.invalidate()
+        self._notify_promoted(db, promoted_ids)
         
         # Log audit
         audit_service.log_action(
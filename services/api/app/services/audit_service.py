@@ -1,9 +1,12 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
+from app.core.tracing import trace_methods
 from app.models.audit import AuditLog
 import json
 
+@trace_methods
 class AuditService:
     """Complete audit logging service"""
     
@@ -41,6 +44,39 @@ class AuditService:
         
         return audit_log
     
+    def log_actions_bulk(self, db: Session, entries: List[Dict[str, Any]], commit: bool = True) -> int:
+        """
+        Insert many audit rows in one statement. Each entry takes the same
+        keys as ``log_action``. Pass ``commit=False`` to join the caller's
+        transaction.
+        """
+        if not entries:
+            return 0
+        
+        now = datetime.utcnow()
+        # executemany needs every row to bind the same columns
+        rows = [
+            {
+                "user_id": entry.get("user_id"),
+                "action": entry["action"],
+                "resource_type": entry["resource_type"],
+                "resource_id": entry.get("resource_id"),
+                "old_values": entry.get("old_values"),
+                "new_values": entry.get("new_values"),
+                "ip_address": entry.get("ip_address"),
+                "user_agent": entry.get("user_agent"),
+                "description": entry.get("description"),
+                "created_at": now,
+            }
+            for entry in entries
+        ]
+        db.execute(insert(AuditLog), rows)
+        
+        if commit:
+            db.commit()
+        
+        return len(rows)
+    
     def log_user_login(self, db: Session, user_id: int, ip_address: str, user_agent: str, success: bool = True) -> AuditLog:
         """Log user login attempt"""
         action = "USER_LOGIN_SUCCESS" if success else "USER_LOGIN_FAILED"
@@ -126,5 +162,13 @@ class AuditService:
             query = query.filter(AuditLog.action.contains(action_filter))
         
         return query.order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
+    
+    def count_actions(self, db: Session, start: datetime, end: datetime) -> Dict[str, int]:
+        """Count audit entries per action in [start, end)"""
+        rows = db.query(AuditLog.action, func.count(AuditLog.id)).filter(
+            AuditLog.created_at >= start,
+            AuditLog.created_at < end
+        ).group_by(AuditLog.action).order_by(func.count(AuditLog.id).desc()).all()
+        return {action: count for action, count in rows}
 
 audit_service = AuditService()
\ No newline at end of file
@@ -3,11 +3,12 @@ from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from jose import JWTError, jwt
+from jose import JWTError
 from passlib.context import CryptContext
 
-from app.core.config import settings
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import verify_password, verify_and_update_password, get_password_hash, create_access_token, decode_access_token
+from app.core.token_store import token_store
+from app.core.tracing import trace_methods
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.services.audit_service import audit_service
@@ -17,6 +18,7 @@ from app.utils.validators import validate_email, validate_password_strength
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+@trace_methods
 class AuthService:
     """Complete authentication service"""
     
@@ -25,33 +27,32 @@ class AuthService:
         user = db.query(User).filter(User.email == email).first()
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        verified, upgraded_hash = verify_and_update_password(password, user.hashed_password)
+        if not verified:
             return None
         if not user.is_active:
             return None
+        if upgraded_hash:
+            # Stored hash is below the current cost policy, upgrade it transparently
+            user.hashed_password = upgraded_hash
+            db.commit()
         return user
     
-    def create_access_token(self, user_id: int, expires_delta: Optional[timedelta] = None) -> str:
-        """Create JWT access token"""
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        
-        to_encode = {"sub": str(user_id), "exp": expire}
-        encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-        return encoded_jwt
+    def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+        """Create JWT access token, ``data["sub"]`` is the subject and the rest extra claims"""
+        claims = dict(data)
+        subject = claims.pop("sub")
+        return create_access_token(subject, expires_delta, claims=claims)
     
-    def verify_token(self, token: str) -> Optional[int]:
-        """Verify JWT token and return user ID"""
+    def verify_token(self, token: str) -> Optional[str]:
+        """Verify JWT access token and return its subject"""
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            user_id: str = payload.get("sub")
-            if user_id is None:
-                return None
-            return int(user_id)
+            payload = decode_access_token(token)
         except JWTError:
             return None
+        if token_store.is_revoked(payload):
+            return None
+        return payload.get("sub")
     
     def register_user(self, db: Session, user_create: UserCreate) -> User:
         """Register new user"""
@@ -0,0 +1,198 @@
+"""Barangay Statistics Service - incremental per-barangay rollups"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import Select, and_, delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.tracing import trace_methods
+from app.models.application import Application
+from app.models.barangay_stats import BarangayStats
+from app.models.beneficiary import Beneficiary
+from app.models.user import User
+
+UNSPECIFIED_BARANGAY = "Unspecified"
+APPLICATION_STATUS_COLUMNS = {
+    "pending": "applications_pending",
+    "approved": "applications_approved",
+    "rejected": "applications_rejected",
+}
+# Monthly household income brackets in cents, upper bound exclusive
+INCOME_BRACKETS = [
+    ("income_below_5k", 0, 5_000_00),
+    ("income_5k_10k", 5_000_00, 10_000_00),
+    ("income_10k_20k", 10_000_00, 20_000_00),
+    ("income_20k_40k", 20_000_00, 40_000_00),
+    ("income_40k_up", 40_000_00, None),
+]
+
+
+@trace_methods
+class BarangayStatsService:
+    """
+    Maintains the ``barangay_stats`` rollup.
+
+    Every write path that creates, reviews or removes an application, or
+    enrolls or removes a beneficiary, calls ``record_*`` in its own
+    transaction before committing. Those compute the change for the affected
+    rows grouped by barangay and add it with one INSERT ... ON CONFLICT DO
+    UPDATE, so reads never join the base tables. ``rebuild`` recomputes the
+    table from scratch after imports or to correct drift, e.g. when a user
+    moves to another barangay.
+    """
+
+    def _barangay(self):
+        return func.coalesce(func.nullif(func.trim(User.barangay), ""), UNSPECIFIED_BARANGAY)
+
+    def _apply(self, db: Session, source: Select) -> None:
+        """Add the per-barangay deltas selected by ``source`` to the rollup"""
+        columns = [column.name for column in source.selected_columns]
+        stmt = pg_insert(BarangayStats).from_select(columns, source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BarangayStats.barangay],
+            set_={
+                **{
+                    column: getattr(BarangayStats, column) + stmt.excluded[column]
+                    for column in columns if column != "barangay"
+                },
+                "updated_at": func.now(),
+            }
+        )
+        db.execute(stmt)
+
+    def record_applications(
+        self,
+        db: Session,
+        application_ids: Iterable[int],
+        old_status: Optional[str] = None,
+        new_status: Optional[str] = None
+    ) -> None:
+        """
+        Record applications moving from ``old_status`` to ``new_status``.
+
+        A missing ``old_status`` means the applications were just created,
+        a missing ``new_status`` that they were withdrawn or deleted.
+        """
+        sign = {}
+        if old_status is None:
+            sign["applications_total"] = 1
+        if new_status is None:
+            sign["applications_total"] = sign.get("applications_total", 0) - 1
+        if old_status in APPLICATION_STATUS_COLUMNS:
+            sign[APPLICATION_STATUS_COLUMNS[old_status]] = -1
+        if new_status in APPLICATION_STATUS_COLUMNS:
+            sign[APPLICATION_STATUS_COLUMNS[new_status]] = sign.get(APPLICATION_STATUS_COLUMNS[new_status], 0) + 1
+        sign = {column: value for column, value in sign.items() if value}
+
+        application_ids = list(application_ids)
+        if not sign or not application_ids:
+            return
+
+        source = (
+            select(
+                self._barangay().label("barangay"),
+                *[(func.count(Application.id) * value).label(column) for column, value in sign.items()]
+            )
+            .select_from(Application)
+            .join(User, User.id == Application.user_id)
+            .where(Application.id.in_(application_ids))
+            .group_by(self._barangay())
+        )
+        self._apply(db, source)
+
+    def record_enrollments(self, db: Session, beneficiary_ids: Iterable[int], sign: int = 1) -> None:
+        """Record beneficiaries being enrolled (``sign=1``) or removed (``sign=-1``)"""
+        beneficiary_ids = list(beneficiary_ids)
+        if beneficiary_ids:
+            self._apply(db, self._enrollment_source(Beneficiary.id.in_(beneficiary_ids), sign))
+
+    def _enrollment_source(self, condition, sign: int = 1) -> Select:
+        income = Beneficiary.monthly_income
+        brackets = [
+            (
+                func.count(Beneficiary.id).filter(
+                    income >= lower if upper is None else and_(income >= lower, income < upper)
+                ) * sign
+            ).label(column)
+            for column, lower, upper in INCOME_BRACKETS
+        ]
+        return (
+            select(
+                self._barangay().label("barangay"),
+                (func.count(Beneficiary.id) * sign).label("beneficiaries_total"),
+                (func.coalesce(func.sum(Beneficiary.household_size), 0) * sign).label("household_size_sum"),
+                (func.count(Beneficiary.household_size) * sign).label("household_size_reported"),
+                (func.coalesce(func.sum(income), 0) * sign).label("monthly_income_sum"),
+                (func.count(income) * sign).label("monthly_income_reported"),
+                *brackets
+            )
+            .select_from(Beneficiary)
+            .join(User, User.id == Beneficiary.user_id)
+            .where(condition)
+            .group_by(self._barangay())
+        )
+
+    def rebuild(self, db: Session) -> None:
+        """Recompute the whole rollup from the base tables (caller commits)"""
+        db.execute(delete(BarangayStats))
+        self._apply(db, (
+            select(
+                self._barangay().label("barangay"),
+                func.count(Application.id).label("applications_total"),
+                *[
+                    func.count(Application.id).filter(Application.status == status).label(column)
+                    for status, column in APPLICATION_STATUS_COLUMNS.items()
+                ]
+            )
+            .select_from(Application)
+            .join(User, User.id == Application.user_id)
+            .where(Application.is_active == True)
+            .group_by(self._barangay())
+        ))
+        self._apply(db, self._enrollment_source(Beneficiary.is_active == True))
+
+    def _to_dict(self, stats: BarangayStats) -> Dict[str, Any]:
+        reviewed = stats.applications_approved + stats.applications_rejected
+        return {
+            "barangay": stats.barangay,
+            "applications": {
+                "total": stats.applications_total,
+                "pending": stats.applications_pending,
+                "approved": stats.applications_approved,
+                "rejected": stats.applications_rejected,
+                "approval_rate": round(stats.applications_approved / reviewed * 100, 2) if reviewed else None,
+            },
+            "beneficiaries": {
+                "total": stats.beneficiaries_total,
+                "average_household_size": (
+                    round(stats.household_size_sum / stats.household_size_reported, 2)
+                    if stats.household_size_reported else None
+                ),
+                "average_monthly_income": (
+                    round(stats.monthly_income_sum / stats.monthly_income_reported / 100, 2)
+                    if stats.monthly_income_reported else None
+                ),
+                "income_distribution": {
+                    column[len("income_"):]: getattr(stats, column) for column, _, _ in INCOME_BRACKETS
+                },
+            },
+            "updated_at": stats.updated_at,
+        }
+
+    def get_all_stats(self, db: Session) -> List[Dict[str, Any]]:
+        """Get the rollup of every barangay"""
+        return [
+            self._to_dict(stats)
+            for stats in db.query(BarangayStats).order_by(BarangayStats.barangay).all()
+        ]
+
+    def get_stats(self, db: Session, barangay: str) -> Optional[Dict[str, Any]]:
+        """Get the rollup of one barangay"""
+        stats = db.query(BarangayStats).filter(
+            func.lower(BarangayStats.barangay) == barangay.strip().lower()
+        ).first()
+        return self._to_dict(stats) if stats else None
+
+
+# Create service instance
+barangay_stats_service = BarangayStatsService()
@@ -1,20 +1,28 @@
 """Beneficiary Management Service - Complete Implementation"""
+from collections import Counter
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import Date, DateTime, Integer, String, Text, case, exists, func, literal, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from app.core.exceptions import ConflictError, NotFoundError, PreconditionFailedError
+from app.core.tracing import trace_methods
 from app.models.beneficiary import Beneficiary
 from app.models.program import Program
 from app.models.application import Application
 from app.models.user import User
 from app.schemas.beneficiary import BeneficiaryCreate, BeneficiaryUpdate
+from app.services.analytics_service import analytics_service
 from app.services.audit_service import audit_service
+from app.services.barangay_stats_service import barangay_stats_service
 from app.services.notification_service import notification_service
 from app.utils.validators import validate_phone
 from app.utils.formatters import format_phone_number
 
 
+@trace_methods
 class BeneficiaryService:
     """Complete beneficiary management service"""
     
@@ -24,31 +32,14 @@ class BeneficiaryService:
         beneficiary_create: BeneficiaryCreate, 
         created_by: int
     ) -> Beneficiary:
-        """Create new beneficiary with all validations"""
-        # Validate program exists and is active
-        program = db.query(Program).filter(
-            Program.id == beneficiary_create.program_id,
-            Program.is_active == True
-        ).first()
-        if not program:
-            raise ValueError("Program not found or inactive")
-        
-        # Validate application exists and is approved
-        application = db.query(Application).filter(
-            Application.id == beneficiary_create.application_id,
-            Application.status == "approved"
-        ).first()
-        if not application:
-            raise ValueError("Approved application not found")
-        
-        # Check if beneficiary already exists for this application
-        existing_beneficiary = db.query(Beneficiary).filter(
-            Beneficiary.application_id == beneficiary_create.application_id,
-            Beneficiary.is_active == True
-        ).first()
-        if existing_beneficiary:
-            raise ValueError("Beneficiary already exists for this application")
-        
+        """
+        Create new beneficiary with all validations.
+        
+        The program and approved-application checks are part of a single
+        INSERT ... SELECT, and the unique partial index on active
+        ``application_id`` rejects duplicates (ON CONFLICT DO NOTHING). Only
+        when nothing is inserted do we look up which check failed.
+        """
         # Validate and format phone number if provided
         if beneficiary_create.emergency_contact_phone:
             if not validate_phone(beneficiary_create.emergency_contact_phone):
@@ -57,45 +48,243 @@ class BeneficiaryService:
                 beneficiary_create.emergency_contact_phone
             )
         
-        # Create beneficiary
-        db_beneficiary = Beneficiary(
-            user_id=application.user_id,
-            program_id=beneficiary_create.program_id,
-            application_id=beneficiary_create.application_id,
-            enrollment_date=beneficiary_create.enrollment_date or date.today(),
-            status="active",
-            emergency_contact_name=beneficiary_create.emergency_contact_name,
-            emergency_contact_phone=beneficiary_create.emergency_contact_phone,
-            household_size=beneficiary_create.household_size,
-            monthly_income=beneficiary_create.monthly_income,
-            progress_notes=beneficiary_create.progress_notes,
-            is_active=True,
-            created_at=datetime.utcnow()
+        candidate = select(
+            Application.user_id,
+            Application.program_id,
+            Application.id,
+            literal(beneficiary_create.enrollment_date or date.today(), Date),
+            literal("active"),
+            literal(beneficiary_create.emergency_contact_name, String),
+            literal(beneficiary_create.emergency_contact_phone, String),
+            literal(beneficiary_create.household_size, Integer),
+            literal(beneficiary_create.monthly_income, Integer),
+            literal(beneficiary_create.progress_notes, Text),
+            true(),
+            literal(datetime.utcnow(), DateTime)
+        ).join(Program, Program.id == Application.program_id).where(
+            Application.id == beneficiary_create.application_id,
+            Application.program_id == beneficiary_create.program_id,
+            Application.status == "approved",
+            Program.is_active == True
         )
+        db_beneficiary = db.scalars(
+            pg_insert(Beneficiary)
+            .from_select([
+                "user_id", "program_id", "application_id", "enrollment_date", "status",
+                "emergency_contact_name", "emergency_contact_phone", "household_size",
+                "monthly_income", "progress_notes", "is_active", "created_at"
+            ], candidate)
+            .on_conflict_do_nothing(
+                index_elements=[Beneficiary.application_id],
+                index_where=Beneficiary.is_active == True
+            )
+            .returning(Beneficiary)
+        ).first()
+        if db_beneficiary is None:
+            db.rollback()
+            raise self._create_error(db, beneficiary_create)
         
-        db.add(db_beneficiary)
+        self._count_participants(db, Counter([db_beneficiary.program_id]))
+        barangay_stats_service.record_enrollments(db, [db_beneficiary.id])
         db.commit()
-        db.refresh(db_beneficiary)
+        # The client picks the enrollment date, so cached trend buckets may change
+        analytics_service.invalidate()
         
         # Send enrollment notification
-        user = db.query(User).filter(User.id == application.user_id).first()
-        if user:
-            notification_service.send_enrollment_confirmation(
-                user.email, 
-                user.first_name, 
-                program.name
-            )
+        recipient = db.query(User.email, User.name, Program.title).join(
+            Program, Program.id == db_beneficiary.program_id
+        ).filter(User.id == db_beneficiary.user_id).first()
+        if recipient:
+            notification_service.send_enrollment_confirmation(*recipient)
         
         # Log audit
         audit_service.log_action(
             db=db,
             user_id=created_by,
             action="BENEFICIARY_CREATED",
-            details=f"Beneficiary created for application {beneficiary_create.application_id} in program {program.name}"
+            resource_type="Beneficiary",
+            resource_id=db_beneficiary.id,
+            description=f"Beneficiary created for application {beneficiary_create.application_id}"
         )
         
         return db_beneficiary
     
+    def _create_error(self, db: Session, beneficiary_create: BeneficiaryCreate) -> ValueError:
+        """Explain why ``create_beneficiary`` inserted nothing"""
+        program_active = db.query(Program.is_active).filter(Program.id == beneficiary_create.program_id).scalar()
+        if not program_active:
+            return NotFoundError("Program not found or inactive")
+        
+        application = db.query(Application.status, Application.program_id).filter(
+            Application.id == beneficiary_create.application_id
+        ).first()
+        if not application or application.status != "approved" or application.program_id != beneficiary_create.program_id:
+            return NotFoundError("Approved application not found")
+        
+        return ConflictError("Beneficiary already exists for this application")
+    
+    def _count_participants(self, db: Session, per_program: Counter, sign: int = 1) -> None:
+        """
+        Move ``Program.current_participants`` by the active beneficiaries
+        added (or, with ``sign=-1``, removed) per program. Called before
+        barangay_stats is touched, so programs are locked first as in every
+        other enrollment and application write.
+        """
+        if not per_program:
+            return
+        db.execute(
+            update(Program)
+            .where(Program.id.in_(per_program))
+            .values(
+                current_participants=func.greatest(
+                    func.coalesce(Program.current_participants, 0)
+                    + sign * case(dict(per_program), value=Program.id, else_=0),
+                    0
+                )
+            ),
+            execution_options={"synchronize_session": False}
+        )
+    
+    def enroll_batch(
+        self,
+        db: Session,
+        created_by: int,
+        program_id: Optional[int] = None,
+        application_ids: Optional[List[int]] = None,
+        enrollment_date: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Enroll approved applicants as beneficiaries in bulk.
+        
+        Takes every approved, not yet enrolled application of ``program_id``,
+        or an explicit list of ``application_ids``. Validation is one query
+        that locks the affected programs, the insert skips applications that
+        already have an active beneficiary (ON CONFLICT DO NOTHING) and each
+        program's participant count is updated once. The returned
+        ``notifications`` are meant for ``send_enrollment_confirmations``.
+        """
+        if program_id is None and not application_ids:
+            raise ValueError("Provide a program ID or application IDs")
+        
+        already_enrolled = exists().where(
+            Beneficiary.application_id == Application.id,
+            Beneficiary.is_active == True
+        )
+        query = db.query(
+            Application.id,
+            Application.user_id,
+            Application.program_id,
+            Application.status,
+            Program.is_active.label("program_active"),
+            (Program.max_participants - func.coalesce(Program.current_participants, 0)).label("seats_left"),
+            already_enrolled.label("enrolled")
+        ).join(Program, Program.id == Application.program_id).filter(
+            Application.is_active == True
+        )
+        
+        if program_id is not None:
+            query = query.filter(Application.program_id == program_id)
+        if application_ids:
+            query = query.filter(Application.id.in_(application_ids))
+        else:
+            query = query.filter(Application.status == "approved", ~already_enrolled)
+        
+        # Lock the programs so concurrent batches cannot overfill them
+        candidates = query.order_by(Application.applied_at, Application.id).with_for_update(of=Program).all()
+        
+        requested_ids = list(dict.fromkeys(application_ids)) if application_ids else [c.id for c in candidates]
+        errors: Dict[int, str] = {}
+        seats_left: Dict[int, int] = {}
+        rows = []
+        
+        for candidate in candidates:
+            if candidate.status != "approved":
+                errors[candidate.id] = "Application is not approved"
+            elif not candidate.program_active:
+                errors[candidate.id] = "Program not found or inactive"
+            elif candidate.enrolled:
+                errors[candidate.id] = "Beneficiary already exists for this application"
+            elif seats_left.setdefault(candidate.program_id, candidate.seats_left) <= 0:
+                errors[candidate.id] = "Program has no remaining slots"
+            else:
+                seats_left[candidate.program_id] -= 1
+                rows.append({
+                    "user_id": candidate.user_id,
+                    "program_id": candidate.program_id,
+                    "application_id": candidate.id,
+                    "enrollment_date": enrollment_date or date.today(),
+                    "status": "active",
+                    "is_active": True,
+                    "created_at": datetime.utcnow()
+                })
+        
+        inserted = db.execute(
+            pg_insert(Beneficiary)
+            .values(rows)
+            .on_conflict_do_nothing(
+                index_elements=[Beneficiary.application_id],
+                index_where=Beneficiary.is_active == True
+            )
+            .returning(Beneficiary.id, Beneficiary.application_id, Beneficiary.program_id)
+        ).all() if rows else []
+        enrolled = {row.application_id: row for row in inserted}
+        
+        self._count_participants(db, Counter(row.program_id for row in inserted))
+        
+        audit_service.log_actions_bulk(db, [
+            {
+                "user_id": created_by,
+                "action": "BENEFICIARY_CREATED",
+                "resource_type": "Beneficiary",
+                "resource_id": row.id,
+                "description": f"Beneficiary enrolled from application {row.application_id} (batch enrollment)"
+            }
+            for row in inserted
+        ], commit=False)
+        barangay_stats_service.record_enrollments(db, [row.id for row in inserted])
+        
+        db.commit()
+        if inserted:
+            analytics_service.invalidate()
+        
+        attempted = {row["application_id"] for row in rows}
+        results = []
+        for application_id in requested_ids:
+            if application_id in enrolled:
+                results.append({
+                    "application_id": application_id,
+                    "success": True,
+                    "beneficiary_id": enrolled[application_id].id
+                })
+            elif application_id in errors:
+                results.append({"application_id": application_id, "success": False, "error": errors[application_id]})
+            elif application_id in attempted:
+                # Dropped by ON CONFLICT, enrolled concurrently
+                results.append({
+                    "application_id": application_id,
+                    "success": False,
+                    "error": "Beneficiary already exists for this application"
+                })
+            else:
+                results.append({"application_id": application_id, "success": False, "error": "Approved application not found"})
+        
+        notifications = [
+            {"email": email, "name": name, "program_name": program_name}
+            for email, name, program_name in db.query(User.email, User.name, Program.title)
+            .join(Beneficiary, Beneficiary.user_id == User.id)
+            .join(Program, Program.id == Beneficiary.program_id)
+            .filter(Beneficiary.id.in_([row.id for row in inserted]))
+            .all()
+        ] if inserted else []
+        
+        return {
+            "processed": len(requested_ids),
+            "succeeded": len(enrolled),
+            "failed": len(requested_ids) - len(enrolled),
+            "results": results,
+            "notifications": notifications
+        }
+    
     def get_beneficiary(self, db: Session, beneficiary_id: int) -> Optional[Beneficiary]:
         """Get beneficiary by ID"""
         return db.query(Beneficiary).filter(
@@ -153,9 +342,14 @@ class BeneficiaryService:
         db: Session, 
         beneficiary_id: int, 
         beneficiary_update: BeneficiaryUpdate, 
-        updated_by: int
+        updated_by: int,
+        expected_version: Optional[int] = None
     ) -> Optional[Beneficiary]:
-        """Update beneficiary information"""
+        """
+        Update beneficiary information with a versioned UPDATE ... RETURNING.
+        ``expected_version`` (from If-Match) defaults to the version just
+        read; a concurrent edit raises PreconditionFailedError.
+        """
         beneficiary = self.get_beneficiary(db, beneficiary_id)
         if not beneficiary:
             return None
@@ -168,21 +362,45 @@ class BeneficiaryService:
                 beneficiary_update.emergency_contact_phone
             )
         
-        update_data = beneficiary_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(beneficiary, field, value)
+        if expected_version is None:
+            expected_version = beneficiary.version
         
-        beneficiary.updated_at = datetime.utcnow()
+        update_data = beneficiary_update.dict(exclude_unset=True)
+        # Move the household figures in the barangay rollup along with the row
+        rollup_changed = bool({"household_size", "monthly_income"} & update_data.keys())
+        if rollup_changed:
+            barangay_stats_service.record_enrollments(db, [beneficiary_id], sign=-1)
+        
+        beneficiary = db.scalars(
+            update(Beneficiary)
+            .where(
+                Beneficiary.id == beneficiary_id,
+                Beneficiary.version == expected_version,
+                Beneficiary.is_active == True
+            )
+            .values(**update_data, updated_at=func.now(), version=Beneficiary.version + 1)
+            .returning(Beneficiary),
+            execution_options={"synchronize_session": False, "populate_existing": True}
+        ).first()
+        if beneficiary is None:
+            # Also undoes the rollup change above
+            db.rollback()
+            raise PreconditionFailedError("Beneficiary was modified by another request")
         
+        if rollup_changed:
+            barangay_stats_service.record_enrollments(db, [beneficiary_id])
         db.commit()
-        db.refresh(beneficiary)
+        analytics_service.invalidate()
         
         # Log audit
         audit_service.log_action(
             db=db,
             user_id=updated_by,
             action="BENEFICIARY_UPDATED",
-            details=f"Beneficiary {beneficiary_id} updated"
+            resource_type="Beneficiary",
+            resource_id=beneficiary_id,
+            new_values=jsonable_encoder(update_data),
+            description=f"Beneficiary {beneficiary_id} updated"
         )
         
         return beneficiary
@@ -198,17 +416,23 @@ class BeneficiaryService:
         if not beneficiary:
             return False
         
+        if beneficiary.is_active:
+            self._count_participants(db, Counter([beneficiary.program_id]), sign=-1)
+            barangay_stats_service.record_enrollments(db, [beneficiary_id], sign=-1)
         beneficiary.is_active = False
         beneficiary.updated_at = datetime.utcnow()
         
         db.commit()
+        analytics_service.invalidate()
         
         # Log audit
         audit_service.log_action(
             db=db,
             user_id=deleted_by,
             action="BENEFICIARY_DELETED",
-            details=f"Beneficiary {beneficiary_id} deleted"
+            resource_type="Beneficiary",
+            resource_id=beneficiary_id,
+            description=f"Beneficiary {beneficiary_id} deleted"
         )
         
         return True
@@ -362,14 +586,14 @@ class BeneficiaryService:
         
         # Beneficiaries by program
         beneficiaries_by_program = db.query(
-            Program.name,
+            Program.title,
             func.count(Beneficiary.id).label("count")
         ).join(
             Beneficiary, Program.id == Beneficiary.program_id
         ).filter(
             Beneficiary.is_active == True
         ).group_by(
-            Program.name
+            Program.title
         ).all()
         
         # Recent enrollments (last 30 days)
@@ -0,0 +1,287 @@
+"""Cohort Analytics Service - funnel and time-to-completion per application month"""
+import logging
+import time
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, func, or_, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.tracing import trace_methods
+from app.models.application import Application
+from app.models.beneficiary import Beneficiary
+from app.models.cohort_stats import CohortStats
+from app.models.program import Program
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_try_advisory_xact_lock, so only one worker refreshes
+COHORT_REFRESH_LOCK_ID = 40_0001
+SECONDS_PER_DAY = 86400.0
+# Rows committed while the previous refresh ran can carry slightly older timestamps
+STALE_MARGIN = timedelta(hours=1)
+
+
+def kaplan_meier(durations: np.ndarray, completed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Survival curve of "not completed yet" over days since enrollment.
+
+    Beneficiaries still enrolled are censored at their current duration, so
+    cohorts that are still running do not look faster than they are.
+    """
+    order = np.argsort(durations, kind="stable")
+    durations, completed = durations[order], completed[order].astype(float)
+    times, first_index = np.unique(durations, return_index=True)
+    at_risk = len(durations) - first_index
+    events = np.add.reduceat(completed, first_index)
+    return times, np.cumprod(1.0 - events / at_risk)
+
+
+def _survival_at(times: np.ndarray, survival: np.ndarray, day: float) -> float:
+    index = np.searchsorted(times, day, side="right") - 1
+    return 1.0 if index < 0 else float(survival[index])
+
+
+def _days(values: np.ndarray) -> Optional[float]:
+    return None if np.isnan(values) else round(float(values), 1)
+
+
+@trace_methods
+class CohortService:
+    """
+    Cohorts are the applications of one program submitted in one month.
+
+    ``cohort_stats`` is refreshed nightly by the scheduler. A refresh only
+    recomputes cohorts with rows changed since the previous run, plus cohorts
+    still in progress, whose censored durations grow every day. Requests only
+    read the table.
+    """
+
+    def _cohort_month(self):
+        return func.date_trunc("month", func.timezone(settings.ANALYTICS_TIMEZONE, Application.applied_at))
+
+    def _stale_cohorts(self, db: Session, since: datetime) -> List[Tuple[date, int]]:
+        """Cohorts whose applications or beneficiaries changed since ``since`` or are still in progress"""
+        cohort_month = func.date(self._cohort_month())
+        changed = func.greatest(
+            Application.created_at,
+            Application.updated_at,
+            Application.reviewed_at,
+            Beneficiary.created_at,
+            Beneficiary.updated_at
+        ) >= since
+        in_progress = or_(
+            and_(Application.is_active == True, Application.status == "pending"),
+            and_(Beneficiary.is_active == True, Beneficiary.status == "active")
+        )
+        return db.execute(
+            select(cohort_month, Application.program_id)
+            .select_from(Application)
+            .outerjoin(Beneficiary, Beneficiary.application_id == Application.id)
+            .where(or_(changed, in_progress))
+            .distinct()
+        ).all()
+
+    def refresh(self, db: Session, full: bool = False) -> int:
+        """
+        Recompute stale cohorts, or all of them with ``full``, and return how
+        many were written. The caller commits.
+        """
+        last_run = None if full else db.query(func.max(CohortStats.computed_at)).scalar()
+
+        # Deleted beneficiaries stay behind as inactive rows, so an application
+        # can have several; only its latest one counts
+        latest_beneficiary = (
+            select(func.max(Beneficiary.id).label("id"))
+            .group_by(Beneficiary.application_id)
+            .subquery()
+        )
+        cohort_month = func.date(self._cohort_month()).label("cohort_month")
+        query = (
+            select(
+                Application.program_id,
+                cohort_month,
+                func.extract("epoch", Application.applied_at).label("applied_at"),
+                func.extract("epoch", Application.reviewed_at).label("reviewed_at"),
+                Application.status,
+                func.extract("epoch", Beneficiary.enrollment_date).label("enrolled_at"),
+                func.extract("epoch", Beneficiary.completion_date).label("completed_at"),
+                Beneficiary.status.label("beneficiary_status"),
+                Beneficiary.is_active.label("beneficiary_active"),
+            )
+            .select_from(Application)
+            .outerjoin(
+                Beneficiary,
+                and_(
+                    Beneficiary.application_id == Application.id,
+                    Beneficiary.id.in_(select(latest_beneficiary.c.id))
+                )
+            )
+            .order_by(Application.program_id, cohort_month)
+        )
+        if last_run is not None:
+            stale = [tuple(row) for row in self._stale_cohorts(db, last_run - STALE_MARGIN)]
+            if not stale:
+                return 0
+            query = query.where(tuple_(func.date(self._cohort_month()), Application.program_id).in_(stale))
+
+        now = time.time()
+        values = []
+        for (program_id, month), rows in groupby(db.execute(query), key=lambda row: (row.program_id, row.cohort_month)):
+            values.append({
+                "program_id": program_id,
+                "cohort_month": month,
+                **self._cohort_figures(list(rows), now),
+            })
+
+        for start in range(0, len(values), 1000):
+            stmt = pg_insert(CohortStats).values(values[start:start + 1000])
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[CohortStats.cohort_month, CohortStats.program_id],
+                set_={
+                    **{
+                        column.name: stmt.excluded[column.name]
+                        for column in CohortStats.__table__.columns
+                        if column.name not in ("cohort_month", "program_id", "computed_at")
+                    },
+                    "computed_at": func.now(),
+                }
+            ))
+        return len(values)
+
+    def _cohort_figures(self, rows: List[Any], now: float) -> Dict[str, Any]:
+        """Funnel counts and duration statistics of one cohort, computed over column arrays"""
+        def column(name: str) -> np.ndarray:
+            return np.array([np.nan if getattr(row, name) is None else float(getattr(row, name)) for row in rows])
+
+        applied, reviewed_at = column("applied_at"), column("reviewed_at")
+        enrolled_at, completed_at = column("enrolled_at"), column("completed_at")
+        status = np.array([row.status for row in rows], dtype=object)
+        beneficiary_status = np.array([row.beneficiary_status for row in rows], dtype=object)
+        beneficiary_active = np.array([bool(row.beneficiary_active) for row in rows])
+
+        is_enrolled = ~np.isnan(enrolled_at)
+        is_completed = ~np.isnan(completed_at) | (beneficiary_status == "completed")
+        is_dropped = is_enrolled & ~is_completed & (~beneficiary_active | (beneficiary_status == "suspended"))
+
+        review_days = (reviewed_at - applied) / SECONDS_PER_DAY
+        review_days = review_days[~np.isnan(review_days)]
+        enrollment_days = ((enrolled_at - reviewed_at) / SECONDS_PER_DAY)
+        enrollment_days = enrollment_days[~np.isnan(enrollment_days)]
+        total_days = ((completed_at - applied) / SECONDS_PER_DAY)
+        total_days = total_days[~np.isnan(total_days)]
+
+        figures = {
+            "applications": len(rows),
+            "reviewed": int(np.isin(status, ("approved", "rejected")).sum()),
+            "approved": int((status == "approved").sum()),
+            "rejected": int((status == "rejected").sum()),
+            "withdrawn": int((status == "withdrawn").sum()),
+            "enrolled": int(is_enrolled.sum()),
+            "completed": int((is_enrolled & is_completed).sum()),
+            "dropped": int(is_dropped.sum()),
+            "review_days_median": _days(np.median(review_days)) if len(review_days) else None,
+            "review_days_p90": _days(np.percentile(review_days, 90)) if len(review_days) else None,
+            "enrollment_days_median": _days(np.median(enrollment_days)) if len(enrollment_days) else None,
+            "total_days_median": _days(np.median(total_days)) if len(total_days) else None,
+            "completion_days_median": None,
+            "completion_rate_90_days": None,
+            "completion_rate_180_days": None,
+            "completion_rate_365_days": None,
+        }
+
+        # Dropped beneficiaries leave the risk set at their last known day, like
+        # censoring. Completions without a recorded date count in the funnel
+        # but have no known duration, so they are left out of the curve rather
+        # than censored at now as if still enrolled.
+        at_risk = is_enrolled & ~is_dropped & ~(is_completed & np.isnan(completed_at))
+        if at_risk.any():
+            end = np.where(np.isnan(completed_at), now, completed_at)[at_risk]
+            durations = np.maximum(end - enrolled_at[at_risk], 0) / SECONDS_PER_DAY
+            times, survival = kaplan_meier(durations, is_completed[at_risk])
+            reached = np.nonzero(survival <= 0.5)[0]
+            figures["completion_days_median"] = _days(times[reached[0]]) if len(reached) else None
+            for days in (90, 180, 365):
+                figures[f"completion_rate_{days}_days"] = round(1.0 - _survival_at(times, survival, days), 4)
+
+        return figures
+
+    def get_cohorts(
+        self,
+        db: Session,
+        program_id: Optional[int] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """Get precomputed cohorts with their funnel drop-off rates"""
+        query = db.query(CohortStats, Program.title).join(Program, Program.id == CohortStats.program_id)
+        if program_id is not None:
+            query = query.filter(CohortStats.program_id == program_id)
+        if start:
+            query = query.filter(CohortStats.cohort_month >= start.replace(day=1))
+        if end:
+            query = query.filter(CohortStats.cohort_month <= end)
+
+        def rate(part: int, whole: int) -> Optional[float]:
+            return round(part / whole * 100, 2) if whole else None
+
+        cohorts = []
+        for stats, program_title in query.order_by(CohortStats.cohort_month, CohortStats.program_id).all():
+            cohorts.append({
+                "cohort_month": stats.cohort_month.isoformat(),
+                "program_id": stats.program_id,
+                "program_title": program_title,
+                "funnel": {
+                    "applications": stats.applications,
+                    "reviewed": stats.reviewed,
+                    "approved": stats.approved,
+                    "rejected": stats.rejected,
+                    "withdrawn": stats.withdrawn,
+                    "enrolled": stats.enrolled,
+                    "completed": stats.completed,
+                    "dropped": stats.dropped,
+                },
+                "rates": {
+                    "review_rate": rate(stats.reviewed, stats.applications),
+                    "approval_rate": rate(stats.approved, stats.reviewed),
+                    "enrollment_rate": rate(stats.enrolled, stats.approved),
+                    "completion_rate": rate(stats.completed, stats.enrolled),
+                    "drop_off_rate": rate(stats.dropped, stats.enrolled),
+                },
+                "durations": {
+                    "review_days_median": stats.review_days_median,
+                    "review_days_p90": stats.review_days_p90,
+                    "enrollment_days_median": stats.enrollment_days_median,
+                    "completion_days_median": stats.completion_days_median,
+                    "completion_rate_90_days": stats.completion_rate_90_days,
+                    "completion_rate_180_days": stats.completion_rate_180_days,
+                    "completion_rate_365_days": stats.completion_rate_365_days,
+                    "total_days_median": stats.total_days_median,
+                },
+                "computed_at": stats.computed_at,
+            })
+        return cohorts
+
+    def run_scheduled_refresh(self) -> None:
+        """Nightly job: refresh stale cohorts unless another worker already is"""
+        db = SessionLocal()
+        try:
+            if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": COHORT_REFRESH_LOCK_ID}).scalar():
+                return
+            refreshed = self.refresh(db)
+            db.commit()
+            logger.info(f"Refreshed {refreshed} cohorts")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Cohort refresh failed: {str(e)}")
+        finally:
+            db.close()
+
+
+# Create service instance
+cohort_service = CohortService()
@@ -25,6 +25,61 @@ class FileService:
         # Create upload directory if it doesn't exist
         self.upload_dir.mkdir(parents=True, exist_ok=True)
     
+    def validate_upload(self, filename: Optional[str], file_size: Optional[int] = None) -> None:
+        """Validate filename, extension and (when known) size of an upload"""
+        allowed_extensions = [ext.lstrip('.') for ext in self.allowed_extensions]
+        validation_result = validate_file_upload(
+            filename, allowed_extensions, self.max_file_size // (1024 * 1024)
+        )
+        if not validation_result["is_valid"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="; ".join(validation_result["errors"])
+            )
+        
+        if file_size is not None and file_size > self.max_file_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds maximum size of {format_file_size(self.max_file_size)}"
+            )
+    
+    def allocate_path(self, filename: str, subfolder: str = "general") -> Path:
+        """Reserve a unique storage path for a new file"""
+        file_extension = get_file_extension(filename)
+        unique_filename = f"{uuid.uuid4()}.{file_extension}" if file_extension else str(uuid.uuid4())
+        
+        subfolder_path = self.upload_dir / subfolder
+        subfolder_path.mkdir(parents=True, exist_ok=True)
+        
+        return subfolder_path / unique_filename
+    
+    def build_file_info(
+        self,
+        file_path: Path,
+        original_filename: str,
+        content_type: Optional[str],
+        subfolder: str = "general",
+        user_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Build the metadata record for a stored file"""
+        file_size = file_path.stat().st_size
+        return {
+            "id": str(uuid.uuid4()),
+            "original_filename": sanitize_filename(original_filename),
+            "stored_filename": file_path.name,
+            "file_path": str(file_path),
+            "relative_path": f"{subfolder}/{file_path.name}",
+            "file_size": file_size,
+            "file_size_formatted": format_file_size(file_size),
+            "content_type": content_type,
+            "file_extension": get_file_extension(original_filename),
+            "is_image": is_image_file(original_filename),
+            "is_document": is_document_file(original_filename),
+            "uploaded_at": datetime.utcnow().isoformat(),
+            "uploaded_by": user_id,
+            "subfolder": subfolder
+        }
+    
     async def upload_file(
         self, 
         file: UploadFile, 
@@ -33,52 +88,22 @@ class FileService:
     ) -> Dict[str, Any]:
         """Upload a file and return file information"""
         # Validate file
-        validation_result = validate_file_upload(file, self.max_file_size, self.allowed_extensions)
-        if not validation_result["valid"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=validation_result["message"]
-            )
-        
-        # Generate unique filename
-        file_extension = get_file_extension(file.filename)
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        sanitized_original = sanitize_filename(file.filename)
-        
-        # Create subfolder path
-        subfolder_path = self.upload_dir / subfolder
-        subfolder_path.mkdir(parents=True, exist_ok=True)
+        self.validate_upload(file.filename)
         
         # Full file path
-        file_path = subfolder_path / unique_filename
+        file_path = self.allocate_path(file.filename, subfolder)
         
         try:
             # Save file
             content = await file.read()
+            self.validate_upload(file.filename, len(content))
             with open(file_path, "wb") as f:
                 f.write(content)
             
-            # Get file info
-            file_size = len(content)
-            file_info = {
-                "id": str(uuid.uuid4()),
-                "original_filename": sanitized_original,
-                "stored_filename": unique_filename,
-                "file_path": str(file_path),
-                "relative_path": f"{subfolder}/{unique_filename}",
-                "file_size": file_size,
-                "file_size_formatted": format_file_size(file_size),
-                "content_type": file.content_type,
-                "file_extension": file_extension,
-                "is_image": is_image_file(file.filename),
-                "is_document": is_document_file(file.filename),
-                "uploaded_at": datetime.utcnow().isoformat(),
-                "uploaded_by": user_id,
-                "subfolder": subfolder
-            }
-            
-            return file_info
+            return self.build_file_info(file_path, file.filename, file.content_type, subfolder, user_id)
             
+        except HTTPException:
+            raise
         except Exception as e:
             # Clean up file if something went wrong
             if file_path.exists():
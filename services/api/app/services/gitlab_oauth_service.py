@@ -1,11 +1,49 @@
 """GitLab OAuth Service Implementation"""
-import httpx
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import random
+import time
+from collections import OrderedDict
 from typing import Optional, Dict, Any
 from urllib.parse import urlencode
+
+import httpx
 from fastapi import HTTPException, status
 
 from app.core.config import settings
+from app.core.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+CACHE_MAX_ENTRIES = 1024
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent requests so a GitLab outage is not
+    amplified into a retry storm. Each request deposits ``ratio`` tokens and
+    each retry spends one.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
 
+@trace_methods
 class GitLabOAuthService:
     """GitLab OAuth integration service"""
     
@@ -15,6 +53,138 @@ class GitLabOAuthService:
         self.redirect_uri = settings.GITLAB_REDIRECT_URI
         self.base_url = settings.GITLAB_BASE_URL
         self.scopes = settings.GITLAB_OAUTH_SCOPES
+        self.cache_ttl = settings.GITLAB_CACHE_TTL_SECONDS
+        self.max_retries = settings.GITLAB_HTTP_MAX_RETRIES
+        self.retry_budget = RetryBudget(
+            ratio=settings.GITLAB_HTTP_RETRY_BUDGET_RATIO,
+            max_tokens=settings.GITLAB_HTTP_RETRY_BUDGET_MAX
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        # HTTP/2 needs the optional h2 package, fall back to keep-alive HTTP/1.1 without it
+        http2 = importlib.util.find_spec("h2") is not None
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=http2,
+            timeout=httpx.Timeout(
+                settings.GITLAB_HTTP_TIMEOUT,
+                connect=settings.GITLAB_HTTP_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.GITLAB_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GITLAB_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60
+            ),
+            headers={"Accept": "application/json"}
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared client, created on first use if the app lifespan did not start it"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+    
+    async def startup(self) -> None:
+        """Open the shared connection pool"""
+        self._client = self._create_client()
+    
+    async def shutdown(self) -> None:
+        """Close the shared connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._cache.clear()
+    
+    async def _request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying transient failures within the retry budget.
+        Non-idempotent requests are only retried when the connection failed
+        before anything was sent.
+        """
+        self.retry_budget.deposit()
+        attempt = 0
+        
+        while True:
+            try:
+                response = await self.client.request(method, url, **kwargs)
+                if not (idempotent and response.status_code in RETRYABLE_STATUS_CODES):
+                    return response
+                error: Optional[Exception] = None
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                error = e
+            except httpx.TransportError as e:
+                if not idempotent:
+                    raise
+                error = e
+            
+            if attempt >= self.max_retries or not self.retry_budget.withdraw():
+                if error is not None:
+                    raise error
+                return response
+            
+            attempt += 1
+            logger.warning(f"Retrying GitLab {method} {url} (attempt {attempt}): {error or response.status_code}")
+            await asyncio.sleep(random.uniform(0, 0.1 * 2 ** attempt))
+    
+    def _cache_key(self, url: str, access_token: str, params: Optional[Dict[str, Any]]) -> str:
+        token_digest = hashlib.sha256(access_token.encode()).hexdigest()
+        return f"{token_digest}:{url}?{urlencode(sorted((params or {}).items()))}"
+    
+    async def _cached_get(
+        self,
+        url: str,
+        access_token: str,
+        error_detail: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        GET with a short-TTL cache per access token. Fresh entries are served
+        without a request; stale ones are revalidated with If-None-Match.
+        """
+        key = self._cache_key(url, access_token, params)
+        entry = self._cache.get(key)
+        now = time.monotonic()
+        
+        if entry and entry["expires_at"] > now:
+            self._cache.move_to_end(key)
+            return entry["body"]
+        
+        headers = {"Authorization": f"Bearer {access_token}"}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        
+        try:
+            response = await self._request("GET", url, headers=headers, params=params)
+        except httpx.HTTPError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=error_detail
+            )
+        
+        if response.status_code == 304 and entry:
+            entry["expires_at"] = now + self.cache_ttl
+            self._cache.move_to_end(key)
+            return entry["body"]
+        
+        if response.status_code != 200:
+            self._cache.pop(key, None)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=error_detail
+            )
+        
+        body = response.json()
+        self._store(key, body, response.headers.get("ETag"), now)
+        return body
+    
+    def _store(self, key: str, body: Any, etag: Optional[str], now: float) -> None:
+        self._cache[key] = {"body": body, "etag": etag, "expires_at": now + self.cache_ttl}
+        self._cache.move_to_end(key)
+        while len(self._cache) > CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
     
     def get_authorization_url(self, state: Optional[str] = None) -> str:
         """Generate GitLab OAuth authorization URL"""
@@ -33,8 +203,6 @@ class GitLabOAuthService:
     
     async def exchange_code_for_token(self, code: str) -> Dict[str, Any]:
         """Exchange authorization code for access token"""
-        token_url = f"{self.base_url}/oauth/token"
-        
         data = {
             "client_id": self.client_id,
             "client_secret": self.client_secret,
@@ -43,44 +211,30 @@ class GitLabOAuthService:
             "redirect_uri": self.redirect_uri,
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(token_url, data=data)
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to exchange code for token"
-                )
-            
-            return response.json()
+        try:
+            # Authorization codes are single use, so never resend once delivered
+            response = await self._request("POST", "/oauth/token", idempotent=False, data=data)
+        except httpx.HTTPError:
+            response = None
+        
+        if response is None or response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to exchange code for token"
+            )
+        
+        return response.json()
     
     async def get_user_info(self, access_token: str) -> Dict[str, Any]:
         """Get user information from GitLab API"""
-        user_url = f"{self.base_url}/api/v4/user"
-        
-        headers = {
-            "Authorization": f"Bearer {access_token}"
-        }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(user_url, headers=headers)
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to get user information"
-                )
-            
-            return response.json()
+        return await self._cached_get(
+            "/api/v4/user",
+            access_token,
+            error_detail="Failed to get user information"
+        )
     
     async def get_user_projects(self, access_token: str, per_page: int = 20) -> list[Dict[str, Any]]:
         """Get user's GitLab projects"""
-        projects_url = f"{self.base_url}/api/v4/projects"
-        
-        headers = {
-            "Authorization": f"Bearer {access_token}"
-        }
-        
         params = {
             "membership": "true",
             "per_page": per_page,
@@ -88,15 +242,11 @@ class GitLabOAuthService:
             "sort": "desc"
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(projects_url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to get user projects"
-                )
-            
-            return response.json()
+        return await self._cached_get(
+            "/api/v4/projects",
+            access_token,
+            error_detail="Failed to get user projects",
+            params=params
+        )
 
-gitlab_oauth_service = GitLabOAuthService()
\ No newline at end of file
+gitlab_oauth_service = GitLabOAuthService()
@@ -0,0 +1,188 @@
+"""Idempotency Service - replay the first response to retried create requests"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Type
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, func, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.tracing import trace_methods
+from app.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+@trace_methods
+class IdempotencyService:
+    """
+    Handles the ``Idempotency-Key`` header of create endpoints.
+
+    The first request with a key claims it with one INSERT ... ON CONFLICT;
+    the unique (user_id, key) constraint makes concurrent duplicates lose
+    that race and get 409 until the first one finishes. A completed key
+    replays its stored response without running the handler again. Failed
+    requests release their key so the client can retry. Keys expire after
+    ``IDEMPOTENCY_KEY_TTL_HOURS``.
+    """
+
+    def _request_hash(self, scope: str, payload: Any) -> str:
+        canonical = json.dumps([scope, jsonable_encoder(payload)], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _claim(self, db: Session, user_id: int, key: str, scope: str, request_hash: str) -> Optional[int]:
+        """Claim the key and return its row ID, or None if another request holds it"""
+        now = datetime.now(timezone.utc)
+        stmt = pg_insert(IdempotencyKey).values(
+            user_id=user_id,
+            key=key,
+            scope=scope,
+            request_hash=request_hash,
+            status="in_progress",
+            locked_at=now,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        )
+        # Take over expired keys and requests abandoned by a crashed worker
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_idempotency_keys_user_key",
+            set_={
+                "scope": stmt.excluded.scope,
+                "request_hash": stmt.excluded.request_hash,
+                "status": "in_progress",
+                "response_status": None,
+                "response_body": None,
+                "locked_at": stmt.excluded.locked_at,
+                "created_at": func.now(),
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=or_(
+                IdempotencyKey.expires_at < now,
+                and_(
+                    IdempotencyKey.status == "in_progress",
+                    IdempotencyKey.locked_at < now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS)
+                )
+            )
+        ).returning(IdempotencyKey.id)
+
+        record_id = db.execute(stmt).scalar()
+        db.commit()
+        return record_id
+
+    def _replay(self, db: Session, user_id: int, key: str, request_hash: str) -> JSONResponse:
+        record = db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        ).first()
+        if record is None:
+            # Released between our claim attempt and this read
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is being retried, try again",
+                headers={"Retry-After": "1"}
+            )
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        if record.status != "completed":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "1"}
+            )
+        return JSONResponse(
+            content=record.response_body,
+            status_code=record.response_status,
+            headers={REPLAY_HEADER: "true"}
+        )
+
+    def _complete(self, db: Session, record_id: int, status_code: int, body: Any) -> None:
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == record_id)
+            .values(status="completed", response_status=status_code, response_body=body)
+        )
+        db.commit()
+
+    def _release(self, db: Session, record_id: int) -> None:
+        db.rollback()
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == record_id))
+        db.commit()
+
+    def run(
+        self,
+        db: Session,
+        user_id: int,
+        key: Optional[str],
+        scope: str,
+        payload: Any,
+        handler: Callable[[], Any],
+        response_model: Optional[Type[BaseModel]] = None,
+        status_code: int = status.HTTP_200_OK
+    ) -> Any:
+        """
+        Run ``handler`` once per ``key``. Without a key the handler simply
+        runs. ``payload`` identifies the request, so reusing a key for a
+        different body is rejected; the handler's result is stored as
+        serialized by ``response_model``.
+        """
+        if not key:
+            return handler()
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"
+            )
+
+        request_hash = self._request_hash(scope, payload)
+        record_id = self._claim(db, user_id, key, scope, request_hash)
+        if record_id is None:
+            return self._replay(db, user_id, key, request_hash)
+
+        try:
+            result = handler()
+        except Exception:
+            self._release(db, record_id)
+            raise
+
+        body = result
+        if response_model is not None and not isinstance(result, BaseModel):
+            body = response_model.model_validate(result, from_attributes=True)
+        self._complete(db, record_id, status_code, jsonable_encoder(body))
+        return body
+
+    def delete_expired(self, db: Session) -> int:
+        """Delete expired keys (caller commits)"""
+        return db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at < func.now())
+        ).rowcount
+
+    def run_scheduled_cleanup(self) -> None:
+        """Periodic job: drop expired keys"""
+        db = SessionLocal()
+        try:
+            deleted = self.delete_expired(db)
+            db.commit()
+            if deleted:
+                logger.info(f"Deleted {deleted} expired idempotency keys")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Idempotency key cleanup failed: {str(e)}")
+        finally:
+            db.close()
+
+
+# Create service instance
+idempotency_service = IdempotencyService()
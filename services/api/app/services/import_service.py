@@ -0,0 +1,436 @@
+"""Bulk import of legacy user and beneficiary records"""
+import csv
+import io
+import uuid
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.tracing import trace_methods
+from app.models.program import Program
+from app.models.user import User, UserRole
+from app.services.analytics_service import analytics_service
+from app.services.audit_service import audit_service
+from app.services.barangay_stats_service import barangay_stats_service
+from app.services.file_service import file_service
+from app.services.seat_service import seat_service
+from app.utils.formatters import format_phone_number
+from app.utils.validators import validate_barangay, validate_email, validate_phone, validate_tin
+
+IMPORT_KINDS = ("users", "beneficiaries")
+IMPORT_EXTENSIONS = (".csv", ".xlsx")
+IMPORT_ID_LENGTH = 32
+
+USER_COLUMNS = ["email", "name", "phone", "barangay", "address", "occupation", "tin"]
+BENEFICIARY_COLUMNS = [
+    "program_id",
+    "enrollment_date",
+    "emergency_contact_name",
+    "emergency_contact_phone",
+    "household_size",
+    "monthly_income",
+]
+STAGING_COLUMNS = ["row_number"] + USER_COLUMNS + BENEFICIARY_COLUMNS
+
+CREATE_STAGING_TABLE = """
+CREATE TEMP TABLE import_staging (
+    row_number integer NOT NULL,
+    email text NOT NULL,
+    name text NOT NULL,
+    phone text,
+    barangay text,
+    address text,
+    occupation text,
+    tin text,
+    program_id integer,
+    enrollment_date date,
+    emergency_contact_name text,
+    emergency_contact_phone text,
+    household_size integer,
+    monthly_income integer
+) ON COMMIT DROP
+"""
+
+# Later rows win for duplicate emails; existing users only get blank fields filled
+MERGE_USERS = """
+WITH merged AS (
+    INSERT INTO users (email, name, hashed_password, role, phone, barangay, address,
+                       occupation, tin, is_active, is_verified, permissions_version, created_at)
+    SELECT DISTINCT ON (email) email, name, '!', :role, phone, barangay, address,
+           occupation, tin, true, false, 0, now()
+    FROM import_staging
+    ORDER BY email, row_number DESC
+    ON CONFLICT (email) DO UPDATE SET
+        phone = COALESCE(users.phone, EXCLUDED.phone),
+        barangay = COALESCE(users.barangay, EXCLUDED.barangay),
+        address = COALESCE(users.address, EXCLUDED.address),
+        occupation = COALESCE(users.occupation, EXCLUDED.occupation),
+        tin = COALESCE(users.tin, EXCLUDED.tin)
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged
+"""
+
+# Legacy beneficiaries are enrolled through an approved application
+APPROVE_PENDING_APPLICATIONS = """
+UPDATE applications a
+SET status = 'approved', reviewed_by = :imported_by, reviewed_at = now(),
+    version = a.version + 1, updated_at = now()
+FROM import_staging s
+JOIN users u ON u.email = s.email
+WHERE s.program_id IS NOT NULL
+  AND a.user_id = u.id AND a.program_id = s.program_id
+  AND a.is_active AND a.status IN ('pending', 'waitlisted')
+"""
+
+CREATE_APPLICATIONS = """
+INSERT INTO applications (user_id, program_id, status, notes, applied_at, reviewed_at,
+                          reviewed_by, is_active, created_at)
+SELECT DISTINCT u.id, s.program_id, 'approved', 'Imported from legacy records', now(), now(),
+       CAST(:imported_by AS integer), true, now()
+FROM import_staging s
+JOIN users u ON u.email = s.email
+WHERE s.program_id IS NOT NULL
+  AND NOT EXISTS (
+      SELECT 1 FROM applications a
+      WHERE a.user_id = u.id AND a.program_id = s.program_id AND a.is_active
+  )
+"""
+
+IMPORTED_PROGRAM_IDS = "SELECT DISTINCT program_id FROM import_staging WHERE program_id IS NOT NULL"
+
+MERGE_BENEFICIARIES = """
+WITH inserted AS (
+    INSERT INTO beneficiaries (user_id, program_id, application_id, enrollment_date, status,
+                               emergency_contact_name, emergency_contact_phone, household_size,
+                               monthly_income, is_active, created_at)
+    SELECT DISTINCT ON (a.id) u.id, s.program_id, a.id, COALESCE(s.enrollment_date, CURRENT_DATE),
+           'active', s.emergency_contact_name, s.emergency_contact_phone, s.household_size,
+           s.monthly_income, true, now()
+    FROM import_staging s
+    JOIN users u ON u.email = s.email
+    JOIN applications a ON a.user_id = u.id AND a.program_id = s.program_id
+                       AND a.is_active AND a.status = 'approved'
+    WHERE s.program_id IS NOT NULL
+    ORDER BY a.id, s.row_number DESC
+    ON CONFLICT (application_id) WHERE is_active DO NOTHING
+    RETURNING program_id
+), counts AS (
+    SELECT program_id, count(*) AS enrolled FROM inserted GROUP BY program_id
+), updated AS (
+    UPDATE programs p
+    SET current_participants = COALESCE(p.current_participants, 0) + counts.enrolled
+    FROM counts
+    WHERE p.id = counts.program_id
+    RETURNING counts.enrolled
+)
+SELECT COALESCE(sum(enrolled), 0) FROM updated
+"""
+
+
+class ImportRowError(ValueError):
+    """A cell that failed validation"""
+
+    def __init__(self, field: str, message: str):
+        super().__init__(message)
+        self.field = field
+
+
+@trace_methods
+class ImportService:
+    """
+    Streaming import of legacy MSWD spreadsheets.
+
+    Rows are read one at a time (CSV, or XLSX in read-only mode), validated,
+    and copied in batches into a temporary staging table with ``COPY``. The
+    staging table is then merged into ``users`` and, for beneficiary imports,
+    ``applications``, ``beneficiaries`` and program participant counts with
+    set-based statements. Invalid rows are written to an error report as
+    they are found, so memory stays flat regardless of file size. Dry runs
+    perform the whole merge and roll it back.
+    """
+
+    def __init__(self):
+        self.import_dir = file_service.upload_dir / "imports"
+        self.batch_size = settings.IMPORT_BATCH_SIZE
+
+        # Create import directory if it doesn't exist
+        self.import_dir.mkdir(parents=True, exist_ok=True)
+
+    def new_import_path(self, filename: str) -> Tuple[str, Path]:
+        """Allocate an import ID and the path the source file should be saved to"""
+        extension = Path(filename).suffix.lower()
+        if extension not in IMPORT_EXTENSIONS:
+            raise ValueError(f"Unsupported file type. Use one of: {', '.join(IMPORT_EXTENSIONS)}")
+        import_id = uuid.uuid4().hex
+        return import_id, self.import_dir / f"{import_id}{extension}"
+
+    def error_report_path(self, import_id: str) -> Optional[Path]:
+        """Path of an import's error report, None if there is none"""
+        if len(import_id) != IMPORT_ID_LENGTH or not all(c in "0123456789abcdef" for c in import_id):
+            return None
+        path = self.import_dir / f"{import_id}-errors.csv"
+        return path if path.exists() else None
+
+    def _read_rows(self, path: Path) -> Iterator[Dict[str, Any]]:
+        """Yield rows as dicts keyed by normalised header names"""
+        if path.suffix.lower() == ".xlsx":
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(path, read_only=True, data_only=True)
+            try:
+                rows = workbook.active.iter_rows(values_only=True)
+                header = [self._normalise_header(cell) for cell in next(rows, [])]
+                for values in rows:
+                    if any(value not in (None, "") for value in values):
+                        yield dict(zip(header, values))
+            finally:
+                workbook.close()
+        else:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.reader(f)
+                header = [self._normalise_header(cell) for cell in next(reader, [])]
+                for values in reader:
+                    if any(value.strip() for value in values):
+                        yield dict(zip(header, values))
+
+    def _normalise_header(self, cell: Any) -> str:
+        return str(cell or "").strip().lower().replace(" ", "_")
+
+    def _text(self, row: Dict[str, Any], field: str) -> Optional[str]:
+        value = row.get(field)
+        if value is None:
+            return None
+        value = str(value).strip()
+        return value or None
+
+    def _int(self, row: Dict[str, Any], field: str, minimum: int = 0) -> Optional[int]:
+        value = self._text(row, field)
+        if value is None:
+            return None
+        try:
+            number = int(Decimal(value))
+        except InvalidOperation:
+            raise ImportRowError(field, "Must be a whole number")
+        if number < minimum:
+            raise ImportRowError(field, f"Must be at least {minimum}")
+        return number
+
+    def _date(self, row: Dict[str, Any], field: str) -> Optional[date]:
+        value = row.get(field)
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        value = self._text(row, field)
+        if value is None:
+            return None
+        for date_format in ("%Y-%m-%d", "%m/%d/%Y"):
+            try:
+                return datetime.strptime(value, date_format).date()
+            except ValueError:
+                continue
+        raise ImportRowError(field, "Must be a date (YYYY-MM-DD or MM/DD/YYYY)")
+
+    def _validate_row(self, row: Dict[str, Any], kind: str, program_ids: set) -> Dict[str, Any]:
+        """Validate and normalise one row, raising ImportRowError on the first bad cell"""
+        email = self._text(row, "email")
+        if not email or not validate_email(email):
+            raise ImportRowError("email", "Invalid email format")
+
+        name = self._text(row, "name")
+        if not name:
+            raise ImportRowError("name", "Name is required")
+
+        phone = self._text(row, "phone")
+        if phone:
+            if not validate_phone(phone):
+                raise ImportRowError("phone", "Invalid phone number format")
+            phone = format_phone_number(phone)
+
+        barangay = self._text(row, "barangay")
+        if barangay and not validate_barangay(barangay):
+            raise ImportRowError("barangay", "Invalid barangay name")
+
+        tin = self._text(row, "tin")
+        if tin and not validate_tin(tin):
+            raise ImportRowError("tin", "TIN must have 9 or 12 digits")
+
+        record = {
+            "email": email.lower(),
+            "name": name,
+            "phone": phone,
+            "barangay": barangay,
+            "address": self._text(row, "address"),
+            "occupation": self._text(row, "occupation"),
+            "tin": tin,
+        }
+
+        if kind == "beneficiaries":
+            program_id = self._int(row, "program_id", minimum=1)
+            if program_id is None or program_id not in program_ids:
+                raise ImportRowError("program_id", "Program not found or inactive")
+
+            emergency_phone = self._text(row, "emergency_contact_phone")
+            if emergency_phone:
+                if not validate_phone(emergency_phone):
+                    raise ImportRowError("emergency_contact_phone", "Invalid emergency contact phone number")
+                emergency_phone = format_phone_number(emergency_phone)
+
+            monthly_income = self._text(row, "monthly_income")
+            if monthly_income is not None:
+                try:
+                    monthly_income = int(Decimal(monthly_income.replace(",", "")) * 100)  # pesos to cents
+                except InvalidOperation:
+                    raise ImportRowError("monthly_income", "Must be an amount in pesos")
+                if monthly_income < 0:
+                    raise ImportRowError("monthly_income", "Must not be negative")
+
+            record.update({
+                "program_id": program_id,
+                "enrollment_date": self._date(row, "enrollment_date"),
+                "emergency_contact_name": self._text(row, "emergency_contact_name"),
+                "emergency_contact_phone": emergency_phone,
+                "household_size": self._int(row, "household_size", minimum=1),
+                "monthly_income": monthly_income,
+            })
+
+        return record
+
+    def _copy_batch(self, cursor, batch: List[Dict[str, Any]]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in batch:
+            writer.writerow([
+                "" if record.get(column) is None else record[column]
+                for column in STAGING_COLUMNS
+            ])
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+    def import_file(
+        self,
+        db: Session,
+        import_id: str,
+        path: Path,
+        kind: str,
+        imported_by: int,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """Import a saved CSV/XLSX file and return a summary"""
+        if kind not in IMPORT_KINDS:
+            raise ValueError(f"Invalid import type. Must be one of: {', '.join(IMPORT_KINDS)}")
+
+        program_ids = set()
+        if kind == "beneficiaries":
+            program_ids = {
+                program_id for (program_id,) in
+                db.query(Program.id).filter(Program.is_active == True).all()
+            }
+
+        summary = {
+            "import_id": import_id,
+            "kind": kind,
+            "dry_run": dry_run,
+            "total_rows": 0,
+            "valid_rows": 0,
+            "invalid_rows": 0,
+            "users_created": 0,
+            "users_updated": 0,
+            "applications_created": 0,
+            "beneficiaries_created": 0,
+            "has_error_report": False,
+        }
+        report_path = self.import_dir / f"{import_id}-errors.csv"
+
+        try:
+            db.execute(text(CREATE_STAGING_TABLE))
+            cursor = db.connection().connection.cursor()
+
+            with open(report_path, "w", newline="") as report:
+                report_writer = csv.writer(report)
+                report_writer.writerow(["row", "field", "value", "error"])
+                batch: List[Dict[str, Any]] = []
+
+                # Row 1 is the header
+                for row_number, row in enumerate(self._read_rows(path), start=2):
+                    summary["total_rows"] += 1
+                    try:
+                        record = self._validate_row(row, kind, program_ids)
+                    except ImportRowError as e:
+                        summary["invalid_rows"] += 1
+                        report_writer.writerow([row_number, e.field, row.get(e.field), str(e)])
+                        continue
+
+                    record["row_number"] = row_number
+                    batch.append(record)
+                    if len(batch) >= self.batch_size:
+                        self._copy_batch(cursor, batch)
+                        summary["valid_rows"] += len(batch)
+                        batch = []
+
+                if batch:
+                    self._copy_batch(cursor, batch)
+                    summary["valid_rows"] += len(batch)
+
+            db.execute(text("ANALYZE import_staging"))
+
+            created, updated = db.execute(
+                text(MERGE_USERS).bindparams(
+                    bindparam("role", value=UserRole.BENEFICIARY, type_=User.__table__.c.role.type)
+                )
+            ).one()
+            summary["users_created"] = created
+            summary["users_updated"] = updated
+
+            if kind == "beneficiaries":
+                db.execute(text(APPROVE_PENDING_APPLICATIONS), {"imported_by": imported_by})
+                summary["applications_created"] = db.execute(
+                    text(CREATE_APPLICATIONS), {"imported_by": imported_by}
+                ).rowcount
+                summary["beneficiaries_created"] = db.execute(text(MERGE_BENEFICIARIES)).scalar()
+                # Legacy applications bypass seat reservation; recount the programs they landed in
+                seat_service.reconcile(db, db.execute(text(IMPORTED_PROGRAM_IDS)).scalars().all())
+
+            # Merged users may have moved barangay; one recompute beats deltas for a bulk load
+            barangay_stats_service.rebuild(db)
+
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+                audit_service.log_action(
+                    db=db,
+                    user_id=imported_by,
+                    action="DATA_IMPORTED",
+                    resource_type=kind.capitalize(),
+                    new_values={k: v for k, v in summary.items() if k != "has_error_report"},
+                    description=f"Imported {summary['valid_rows']} of {summary['total_rows']} rows from {path.name}"
+                )
+                # Imported rows may land in trend buckets that are already cached
+                analytics_service.invalidate()
+        except Exception:
+            db.rollback()
+            report_path.unlink(missing_ok=True)
+            raise
+        finally:
+            path.unlink(missing_ok=True)
+
+        if summary["invalid_rows"]:
+            summary["has_error_report"] = True
+        else:
+            report_path.unlink(missing_ok=True)
+
+        return summary
+
+
+# Create service instance
+import_service = ImportService()
@@ -0,0 +1,199 @@
+"""Background Job Service - long-running jobs with progress and file artifacts"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.tracing import tracer
+from app.services.file_service import file_service
+
+logger = logging.getLogger(__name__)
+
+JOB_ID_LENGTH = 32
+SWEEP_INTERVAL_SECONDS = 15 * 60
+
+
+class JobContext:
+    """Handed to a job handler to report progress and place its artifact"""
+
+    def __init__(self, service: "JobService", job: Dict[str, Any]):
+        self._service = service
+        self.job = job
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return self.job["params"]
+
+    def progress(self, done: int, total: int, step: Optional[str] = None) -> None:
+        """Record that ``done`` of ``total`` steps have finished"""
+        self._service._update(self.job, progress=round(done / total * 100) if total else 0, step=step)
+
+    def artifact_path(self, extension: str) -> Path:
+        return self._service.job_dir / f"{self.job['job_id']}.{extension}"
+
+    @property
+    def section_executor(self) -> ThreadPoolExecutor:
+        """Pool for independent parts of a job, separate so jobs never wait on their own pool"""
+        return self._service.section_executor
+
+
+# Handler: (context) -> (artifact path, download file name)
+JobHandler = Callable[[JobContext], Tuple[Path, str]]
+
+
+class JobService:
+    """
+    Runs registered job types on a thread pool.
+
+    Job state is a JSON file in ``<UPLOAD_DIR>/jobs`` rewritten atomically
+    on every change, so any API worker can report status and serve the
+    artifact, not only the one running the job. Jobs and artifacts expire
+    after ``JOB_RETENTION_HOURS``.
+    """
+
+    def __init__(self):
+        self.job_dir = file_service.upload_dir / "jobs"
+        self.retention = timedelta(hours=settings.JOB_RETENTION_HOURS)
+        self.executor = ThreadPoolExecutor(max_workers=settings.JOB_WORKERS, thread_name_prefix="job")
+        self.section_executor = ThreadPoolExecutor(
+            max_workers=settings.JOB_SECTION_WORKERS, thread_name_prefix="job-section"
+        )
+        self._handlers: Dict[str, JobHandler] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+        # Create job directory if it doesn't exist
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        self._handlers[job_type] = handler
+
+    def _job_path(self, job_id: str) -> Path:
+        if len(job_id) != JOB_ID_LENGTH or not all(c in "0123456789abcdef" for c in job_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+        return self.job_dir / f"{job_id}.json"
+
+    def _write(self, job: Dict[str, Any]) -> None:
+        job_path = self._job_path(job["job_id"])
+        tmp_path = job_path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(job, f, default=str)
+        os.replace(tmp_path, job_path)
+
+    def _update(self, job: Dict[str, Any], **changes: Any) -> None:
+        with self._lock:
+            job.update(changes)
+            self._write(job)
+
+    def submit(self, job_type: str, params: Dict[str, Any], user_id: int) -> Dict[str, Any]:
+        """Queue a job and return its record"""
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        self._maybe_sweep()
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "job_type": job_type,
+            "params": params,
+            "status": "pending",
+            "progress": 0,
+            "step": None,
+            "file_name": None,
+            "download_name": None,
+            "error": None,
+            "user_id": user_id,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._write(job)
+        # The job's spans continue the trace of the request that submitted it
+        self.executor.submit(tracer.bind(self._run), job)
+        return job
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        self._update(job, status="running", started_at=datetime.utcnow().isoformat())
+        try:
+            path, download_name = self._handlers[job["job_type"]](JobContext(self, job))
+            self._update(
+                job,
+                status="completed",
+                progress=100,
+                step=None,
+                file_name=path.name,
+                download_name=download_name,
+                finished_at=datetime.utcnow().isoformat()
+            )
+        except Exception as e:
+            logger.exception(f"Job {job['job_id']} ({job['job_type']}) failed")
+            for artifact in self.job_dir.glob(f"{job['job_id']}.*"):
+                if artifact.suffix != ".json":
+                    artifact.unlink(missing_ok=True)
+            self._update(job, status="failed", error=str(e), finished_at=datetime.utcnow().isoformat())
+
+    def get_job(self, job_id: str, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Load a job, enforcing ownership"""
+        try:
+            with open(self._job_path(job_id), "r") as f:
+                job = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+
+        if user_id is not None and job["user_id"] != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+        return job
+
+    def get_artifact(self, job: Dict[str, Any]) -> Path:
+        """Get the artifact of a completed job"""
+        if job["status"] != "completed":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Job is {job['status']}"
+            )
+        return self.job_dir / job["file_name"]
+
+    def _maybe_sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sweep >= SWEEP_INTERVAL_SECONDS:
+            self._last_sweep = now
+            self.expire_old_jobs()
+
+    def expire_old_jobs(self) -> int:
+        """Delete jobs and artifacts older than the retention window"""
+        cutoff = time.time() - self.retention.total_seconds()
+        expired_count = 0
+
+        for job_path in self.job_dir.glob("*.json"):
+            if job_path.stat().st_mtime >= cutoff:
+                continue
+            for path in self.job_dir.glob(f"{job_path.stem}.*"):
+                path.unlink(missing_ok=True)
+            expired_count += 1
+
+        return expired_count
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.section_executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Create service instance
+job_service = JobService()
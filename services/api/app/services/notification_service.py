@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 import smtplib
 from email.mime.text import MIMEText
@@ -8,10 +8,12 @@ from email import encoders
 import firebase_admin
 from firebase_admin import messaging
 from app.core.config import settings
+from app.core.tracing import trace_methods
 import logging
 
 logger = logging.getLogger(__name__)
 
+@trace_methods
 class NotificationService:
     """Complete notification service for emails and push notifications"""
     
@@ -23,27 +25,37 @@ class NotificationService:
         self.from_email = settings.EMAILS_FROM_EMAIL
         self.from_name = settings.EMAILS_FROM_NAME or "MSWD Livelihood Program"
     
+    def _build_message(self, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None) -> MIMEMultipart:
+        """Build a multipart email message"""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = f"{self.from_name} <{self.from_email}>"
+        msg['To'] = to_email
+        
+        # Add text version if provided
+        if text_content:
+            text_part = MIMEText(text_content, 'plain')
+            msg.attach(text_part)
+        
+        # Add HTML version
+        html_part = MIMEText(html_content, 'html')
+        msg.attach(html_part)
+        
+        return msg
+    
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        server.starttls()
+        server.login(self.smtp_username, self.smtp_password)
+        return server
+    
     def _send_email(self, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None) -> bool:
         """Send email using SMTP"""
         try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"{self.from_name} <{self.from_email}>"
-            msg['To'] = to_email
-            
-            # Add text version if provided
-            if text_content:
-                text_part = MIMEText(text_content, 'plain')
-                msg.attach(text_part)
-            
-            # Add HTML version
-            html_part = MIMEText(html_content, 'html')
-            msg.attach(html_part)
+            msg = self._build_message(to_email, subject, html_content, text_content)
             
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
+            with self._connect() as server:
                 server.send_message(msg)
             
             logger.info(f"Email sent successfully to {to_email}")
@@ -53,6 +65,43 @@ class NotificationService:
             logger.error(f"Failed to send email to {to_email}: {str(e)}")
             return False
     
+    def send_emails(self, emails: List[Tuple[str, str, str]]) -> dict:
+        """
+        Send many ``(to_email, subject, html_content)`` emails over one SMTP
+        connection, reconnecting once if the server drops it mid-batch.
+        """
+        results = {"success": 0, "failed": 0, "errors": []}
+        server = None
+        
+        try:
+            for to_email, subject, html_content in emails:
+                msg = self._build_message(to_email, subject, html_content)
+                for attempt in range(2):
+                    try:
+                        if server is None:
+                            server = self._connect()
+                        server.send_message(msg)
+                        results["success"] += 1
+                        break
+                    except smtplib.SMTPServerDisconnected as e:
+                        server = None
+                        if attempt:
+                            results["failed"] += 1
+                            results["errors"].append(f"Error sending to {to_email}: {str(e)}")
+                    except Exception as e:
+                        results["failed"] += 1
+                        results["errors"].append(f"Error sending to {to_email}: {str(e)}")
+                        break
+        finally:
+            if server is not None:
+                try:
+                    server.quit()
+                except Exception:
+                    pass
+        
+        logger.info(f"Batch email sent: {results['success']} succeeded, {results['failed']} failed")
+        return results
+    
     def send_welcome_email(self, email: str, name: str) -> bool:
         """Send welcome email to new user"""
         subject = "Welcome to MSWD Livelihood Program"
@@ -100,8 +149,44 @@ class NotificationService:
         
         return self._send_email(email, subject, html_content)
     
-    def send_application_approved(self, email: str, name: str, program_name: str) -> bool:
-        """Send application approval email"""
+    def send_application_waitlisted(self, email: str, name: str, program_name: str, position: int) -> bool:
+        """Send waitlist confirmation email"""
+        subject = f"Application Waitlisted - {program_name}"
+        html_content = f"""
+        <html>
+        <body>
+            <h2>Application Waitlisted</h2>
+            <p>Dear {name},</p>
+            <p>We have received your application for the <strong>{program_name}</strong> program, but all of its slots are currently taken.</p>
+            <p>You are number <strong>{position}</strong> on the waitlist. Your application will move to review automatically as soon as a slot opens, and we will notify you when it does.</p>
+            <p>Best regards,<br>MSWD Livelihood Program Team</p>
+        </body>
+        </html>
+        """
+        
+        return self._send_email(email, subject, html_content)
+    
+    def send_waitlist_promotions(self, promotions: List[dict]) -> dict:
+        """Tell applicants promoted from a waitlist, over one SMTP connection"""
+        emails = []
+        for promotion in promotions:
+            subject = f"A Slot Opened Up - {promotion['program_name']}"
+            html_content = f"""
+        <html>
+        <body>
+            <h2>A Slot Opened Up</h2>
+            <p>Dear {promotion['name']},</p>
+            <p>A slot in the <strong>{promotion['program_name']}</strong> program has opened up and your application has moved from the waitlist to review.</p>
+            <p>We will notify you once a decision has been made.</p>
+            <p>Best regards,<br>MSWD Livelihood Program Team</p>
+        </body>
+        </html>
+        """
+            emails.append((promotion["email"], subject, html_content))
+        
+        return self.send_emails(emails)
+    
+    def _application_approved_email(self, name: str, program_name: str) -> Tuple[str, str]:
         subject = f"Application Approved - {program_name}"
         html_content = f"""
         <html>
@@ -120,11 +205,9 @@ class NotificationService:
         </body>
         </html>
         """
-        
-        return self._send_email(email, subject, html_content)
+        return subject, html_content
     
-    def send_application_rejected(self, email: str, name: str, program_name: str, reason: Optional[str] = None) -> bool:
-        """Send application rejection email"""
+    def _application_rejected_email(self, name: str, program_name: str, reason: Optional[str] = None) -> Tuple[str, str]:
         subject = f"Application Update - {program_name}"
         
         reason_text = f"<p>Reason: {reason}</p>" if reason else ""
@@ -148,9 +231,33 @@ class NotificationService:
         </body>
         </html>
         """
-        
+        return subject, html_content
+    
+    def send_application_approved(self, email: str, name: str, program_name: str) -> bool:
+        """Send application approval email"""
+        subject, html_content = self._application_approved_email(name, program_name)
+        return self._send_email(email, subject, html_content)
+    
+    def send_application_rejected(self, email: str, name: str, program_name: str, reason: Optional[str] = None) -> bool:
+        """Send application rejection email"""
+        subject, html_content = self._application_rejected_email(name, program_name, reason)
         return self._send_email(email, subject, html_content)
     
+    def send_application_decisions(self, decisions: List[dict], reason: Optional[str] = None) -> dict:
+        """
+        Send approval/rejection emails for a bulk review as one batch.
+        Each decision has ``email``, ``name``, ``program_name`` and ``status``.
+        """
+        emails = []
+        for decision in decisions:
+            if decision["status"] == "approved":
+                subject, html_content = self._application_approved_email(decision["name"], decision["program_name"])
+            else:
+                subject, html_content = self._application_rejected_email(decision["name"], decision["program_name"], reason)
+            emails.append((decision["email"], subject, html_content))
+        
+        return self.send_emails(emails)
+    
     def send_program_reminder(self, email: str, name: str, program_name: str, reminder_type: str, details: str) -> bool:
         """Send program-related reminders"""
         subject = f"Reminder: {program_name} - {reminder_type}"
@@ -227,8 +334,7 @@ class NotificationService:
         results = self.send_bulk_notification(admin_emails, subject, html_content)
         return results["success"] > 0
     
-    def send_enrollment_confirmation(self, email: str, name: str, program_name: str) -> bool:
-        """Send enrollment confirmation email"""
+    def _enrollment_confirmation_email(self, name: str, program_name: str) -> Tuple[str, str]:
         subject = f"Enrollment Confirmed - {program_name}"
         html_content = f"""
         <html>
@@ -248,9 +354,22 @@ class NotificationService:
         </body>
         </html>
         """
-        
+        return subject, html_content
+    
+    def send_enrollment_confirmation(self, email: str, name: str, program_name: str) -> bool:
+        """Send enrollment confirmation email"""
+        subject, html_content = self._enrollment_confirmation_email(name, program_name)
         return self._send_email(email, subject, html_content)
     
+    def send_enrollment_confirmations(self, enrollments: List[dict]) -> dict:
+        """Send enrollment confirmations for a batch enrollment over one SMTP connection"""
+        emails = []
+        for enrollment in enrollments:
+            subject, html_content = self._enrollment_confirmation_email(enrollment["name"], enrollment["program_name"])
+            emails.append((enrollment["email"], subject, html_content))
+        
+        return self.send_emails(emails)
+    
     def send_program_completion(self, email: str, name: str, program_name: str) -> bool:
         """Send program completion email"""
         subject = f"Program Completed - {program_name}"
@@ -0,0 +1,121 @@
+"""Profile Service - storage and admission of on-demand request profiles"""
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.profiler import SamplingProfiler
+from app.core.rate_limit import rate_limiter
+from app.services.file_service import file_service
+
+PROFILE_ID_LENGTH = 32
+
+
+class ProfileService:
+    """
+    Captured request profiles.
+
+    Each profile is a folded-stacks file plus a JSON record in
+    ``<UPLOAD_DIR>/profiles``, so any worker can list and serve them. At
+    most one request per worker is profiled at a time, and all workers
+    together stay within ``PROFILING_RATE``.
+    """
+
+    def __init__(self):
+        self.profile_dir = file_service.upload_dir / "profiles"
+        self._active = threading.Lock()
+
+        # Create profile directory if it doesn't exist
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, profile_id: str, suffix: str) -> Path:
+        if len(profile_id) != PROFILE_ID_LENGTH or not all(c in "0123456789abcdef" for c in profile_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Profile not found"
+            )
+        return self.profile_dir / f"{profile_id}.{suffix}"
+
+    def begin(self) -> Tuple[Optional[str], str]:
+        """
+        Try to start a profile. Returns ``(profile_id, "captured")`` or
+        ``(None, reason)`` when this worker is busy or the cap is reached.
+        """
+        if not self._active.acquire(blocking=False):
+            return None, "busy"
+        allowed, _ = rate_limiter.hit("profiling", "all", settings.PROFILING_RATE)
+        if not allowed:
+            self._active.release()
+            return None, "rate-limited"
+        return uuid.uuid4().hex, "captured"
+
+    def end(self) -> None:
+        self._active.release()
+
+    def new_profiler(self, target_codes) -> SamplingProfiler:
+        return SamplingProfiler(
+            interval=settings.PROFILING_INTERVAL_MS / 1000,
+            max_seconds=settings.PROFILING_MAX_SECONDS,
+            target_codes=target_codes
+        )
+
+    def save(self, profile_id: str, profiler: SamplingProfiler, details: Dict[str, Any]) -> Dict[str, Any]:
+        """Write the folded stacks and record of a finished profile"""
+        self._path(profile_id, "folded").write_text(profiler.folded())
+        record = {
+            "profile_id": profile_id,
+            **details,
+            "samples": profiler.samples,
+            "interval_ms": settings.PROFILING_INTERVAL_MS,
+            "truncated": profiler.truncated,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        record_path = self._path(profile_id, "json")
+        tmp_path = record_path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(record, f, default=str)
+        os.replace(tmp_path, record_path)
+
+        self._prune()
+        return record
+
+    def _prune(self) -> None:
+        records = sorted(self.profile_dir.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for record_path in records[settings.PROFILING_MAX_STORED:]:
+            for path in self.profile_dir.glob(f"{record_path.stem}.*"):
+                path.unlink(missing_ok=True)
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first"""
+        profiles = []
+        for record_path in self.profile_dir.glob("*.json"):
+            try:
+                with open(record_path, "r") as f:
+                    profiles.append(json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue  # pruned or being written
+        return sorted(profiles, key=lambda profile: profile["created_at"], reverse=True)
+
+    def get_profile(self, profile_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._path(profile_id, "json"), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Profile not found"
+            )
+
+    def get_folded_path(self, profile_id: str) -> Path:
+        self.get_profile(profile_id)
+        return self._path(profile_id, "folded")
+
+
+# Create service instance
+profile_service = ProfileService()
@@ -5,16 +5,21 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, or_, and_
 from fastapi import HTTPException, status
 
+from app.core.tracing import trace_methods
+from app.core.waiting_room import waiting_room
 from app.models.program import Program
 from app.models.application import Application
 from app.models.beneficiary import Beneficiary
 from app.schemas.program import ProgramCreate, ProgramUpdate
+from app.services.analytics_service import analytics_service
 from app.services.audit_service import audit_service
 from app.services.notification_service import notification_service
+from app.services.seat_service import seat_service
 from app.utils.validators import validate_program_title, validate_budget_amount
 from app.utils.formatters import format_currency, format_program_code
 from app.utils.helpers import generate_reference_number
 
+@trace_methods
 class ProgramService:
     """Complete program management service"""
     
@@ -182,8 +187,16 @@ class ProgramService:
         program.updated_at = datetime.utcnow()
         program.updated_by = updated_by
         
+        # Raised capacity goes to the waitlist first
+        promoted_ids = []
+        if "max_participants" in update_data:
+            db.flush()
+            promoted_ids = seat_service.fill_from_waitlist(db, program_id)
+        
         db.commit()
         db.refresh(program)
+        if promoted_ids:
+            notification_service.send_waitlist_promotions(seat_service.promotion_notifications(db, promoted_ids))
         
         # Log audit
         audit_service.log_action(
@@ -259,6 +272,7 @@ class ProgramService:
         program.updated_by = activated_by
         
         db.commit()
+        waiting_room.open(program_id)
         
         # Send notifications to interested users
         notification_service.send_program_activation_notice(program)
@@ -287,6 +301,7 @@ class ProgramService:
         program.updated_by = deactivated_by
         
         db.commit()
+        waiting_room.close(program_id)
         
         # Log audit
         audit_service.log_action(
@@ -378,58 +393,23 @@ class ProgramService:
     
     def get_program_statistics(self, db: Session, program_id: int) -> Dict[str, Any]:
         """Get program statistics"""
-        program = self.get_program(db, program_id)
-        if not program:
+        overview = analytics_service.get_program_overview(db, program_ids=[program_id])
+        if not overview["programs"]:
             return {}
         
-        # Application statistics
-        total_applications = db.query(func.count(Application.id)).filter(
-            Application.program_id == program_id
-        ).scalar()
-        
-        pending_applications = db.query(func.count(Application.id)).filter(
-            Application.program_id == program_id,
-            Application.status == "pending"
-        ).scalar()
-        
-        approved_applications = db.query(func.count(Application.id)).filter(
-            Application.program_id == program_id,
-            Application.status == "approved"
-        ).scalar()
-        
-        rejected_applications = db.query(func.count(Application.id)).filter(
-            Application.program_id == program_id,
-            Application.status == "rejected"
-        ).scalar()
-        
-        # Beneficiary statistics
-        total_beneficiaries = db.query(func.count(Beneficiary.id)).filter(
-            Beneficiary.program_id == program_id,
-            Beneficiary.is_active == True
-        ).scalar()
-        
-        # Budget utilization
-        budget_utilized = db.query(func.sum(Beneficiary.amount_received)).filter(
-            Beneficiary.program_id == program_id,
-            Beneficiary.is_active == True
-        ).scalar() or 0
-        
-        budget_utilization_percentage = 0
-        if program.budget_amount and program.budget_amount > 0:
-            budget_utilization_percentage = (budget_utilized / program.budget_amount) * 100
-        
+        stats = overview["programs"][0]
         return {
-            "program_id": program_id,
-            "program_name": program.name,
-            "total_applications": total_applications,
-            "pending_applications": pending_applications,
-            "approved_applications": approved_applications,
-            "rejected_applications": rejected_applications,
-            "total_beneficiaries": total_beneficiaries,
-            "budget_amount": program.budget_amount,
-            "budget_utilized": budget_utilized,
-            "budget_utilization_percentage": round(budget_utilization_percentage, 2),
-            "remaining_budget": (program.budget_amount or 0) - budget_utilized
+            **stats,
+            "program_name": stats["title"],
+            "total_applications": stats["applications_total"],
+            "pending_applications": stats["applications_pending"],
+            "approved_applications": stats["applications_approved"],
+            "rejected_applications": stats["applications_rejected"],
+            "total_beneficiaries": stats["beneficiaries_total"],
+            "budget_amount": stats["budget"],
+            "budget_utilized": stats["budget_committed"],
+            "budget_utilization_percentage": stats["budget_utilization"],
+            "remaining_budget": stats["budget_remaining"]
         }
     
     def get_all_programs_statistics(self, db: Session) -> Dict[str, Any]:
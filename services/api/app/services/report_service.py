@@ -0,0 +1,262 @@
+"""Report Service - quarterly accomplishment reports built as background jobs"""
+import csv
+from concurrent.futures import as_completed
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.core.tracing import trace_methods, tracer
+from app.services.analytics_service import analytics_service
+from app.services.audit_service import audit_service
+from app.services.barangay_stats_service import barangay_stats_service
+from app.services.beneficiary_service import beneficiary_service
+from app.services.cohort_service import cohort_service
+from app.services.job_service import JobContext, job_service
+
+REPORT_FORMATS = ("xlsx", "csv", "pdf")
+
+# A section renders as one or more (title, headers, rows) tables
+Table = Tuple[str, List[str], List[Sequence[Any]]]
+
+
+class Period:
+    """One calendar quarter, ``end`` exclusive, reported on ``generated_on``"""
+
+    def __init__(self, year: int, quarter: int):
+        self.year = year
+        self.quarter = quarter
+        self.start = date(year, 3 * (quarter - 1) + 1, 1)
+        self.end = date(year + 1, 1, 1) if quarter == 4 else date(year, 3 * quarter + 1, 1)
+        self.generated_on = date.today()
+
+    @property
+    def last_day(self) -> date:
+        return self.end - timedelta(days=1)
+
+    def as_of(self, title: str) -> str:
+        """Title of a table holding current totals rather than the quarter's"""
+        return f"{title} (as of {self.generated_on.isoformat()})"
+
+    def __str__(self) -> str:
+        return f"Q{self.quarter} {self.year}"
+
+
+def _programs_section(db: Session, period: Period) -> List[Table]:
+    overview = analytics_service.get_program_overview(db, sort_by="title", descending=False)
+    totals = overview["totals"]
+    return [
+        (period.as_of("Program Budget and Utilization"), [
+            "Program", "Category", "Status", "Seats", "Applications", "Approved", "Beneficiaries",
+            "Completed", "Budget", "Committed", "Remaining", "Utilization %", "Fill Rate %"
+        ], [
+            [
+                p["title"], p["category"], p["status"], p["max_participants"], p["applications_total"],
+                p["applications_approved"], p["beneficiaries_total"], p["beneficiaries_completed"], p["budget"],
+                p["budget_committed"], p["budget_remaining"], p["budget_utilization"], p["fill_rate"]
+            ]
+            for p in overview["programs"]
+        ]),
+        (period.as_of("Totals"), ["Figure", "Value"], [[key.replace("_", " ").title(), value] for key, value in totals.items()]),
+    ]
+
+
+def _beneficiaries_section(db: Session, period: Period) -> List[Table]:
+    stats = beneficiary_service.get_beneficiary_statistics(db)
+    return [
+        (period.as_of("Beneficiary Summary"), ["Figure", "Count"], [
+            [key.replace("_", " ").title(), value] for key, value in stats.items() if key != "by_program"
+        ]),
+        (period.as_of("Beneficiaries by Program"), ["Program", "Beneficiaries"], [
+            [row["program_name"], row["count"]] for row in stats["by_program"]
+        ]),
+    ]
+
+
+def _barangays_section(db: Session, period: Period) -> List[Table]:
+    return [
+        (period.as_of("Barangay Statistics"), [
+            "Barangay", "Applications", "Approved", "Rejected", "Approval Rate %", "Beneficiaries",
+            "Avg Household Size", "Avg Monthly Income"
+        ], [
+            [
+                s["barangay"], s["applications"]["total"], s["applications"]["approved"],
+                s["applications"]["rejected"], s["applications"]["approval_rate"], s["beneficiaries"]["total"],
+                s["beneficiaries"]["average_household_size"], s["beneficiaries"]["average_monthly_income"]
+            ]
+            for s in barangay_stats_service.get_all_stats(db)
+        ]),
+    ]
+
+
+def _trend_table(db: Session, period: Period, metric: str, dimension: str, title: str) -> Table:
+    trends = analytics_service.get_trends(
+        db, metric, bucket="month", start=period.start, end=period.last_day, dimension=dimension
+    )
+    values = trends["dimension_values"]
+    return (title, ["Month", *values, "Total"], [
+        [point["bucket"], *[point["breakdown"][value] for value in values], point["total"]]
+        for point in trends["series"]
+    ])
+
+
+def _activity_section(db: Session, period: Period) -> List[Table]:
+    return [
+        _trend_table(db, period, "applications", "status", "Applications by Status"),
+        _trend_table(db, period, "enrollments", "program", "Enrollments by Program"),
+    ]
+
+
+def _cohorts_section(db: Session, period: Period) -> List[Table]:
+    return [
+        ("Application Cohorts", [
+            "Cohort", "Program", "Applications", "Approved", "Enrolled", "Completed", "Dropped",
+            "Approval Rate %", "Completion Rate %", "Median Review Days", "Median Days to Complete"
+        ], [
+            [
+                c["cohort_month"], c["program_title"], c["funnel"]["applications"], c["funnel"]["approved"],
+                c["funnel"]["enrolled"], c["funnel"]["completed"], c["funnel"]["dropped"],
+                c["rates"]["approval_rate"], c["rates"]["completion_rate"],
+                c["durations"]["review_days_median"], c["durations"]["completion_days_median"]
+            ]
+            for c in cohort_service.get_cohorts(db, start=period.start, end=period.last_day)
+        ]),
+    ]
+
+
+def _audit_section(db: Session, period: Period) -> List[Table]:
+    counts = audit_service.count_actions(
+        db, datetime.combine(period.start, datetime.min.time()), datetime.combine(period.end, datetime.min.time())
+    )
+    return [("Recorded Activity", ["Action", "Count"], [[action, count] for action, count in counts.items()])]
+
+
+REPORT_SECTIONS: List[Tuple[str, Callable[[Session, Period], List[Table]]]] = [
+    ("Programs", _programs_section),
+    ("Beneficiaries", _beneficiaries_section),
+    ("Barangays", _barangays_section),
+    ("Activity", _activity_section),
+    ("Cohorts", _cohorts_section),
+    ("Audit", _audit_section),
+]
+
+
+@trace_methods
+class ReportService:
+    """
+    Quarterly accomplishment reports.
+
+    Sections are independent, so each runs on the job section pool with its
+    own database session, reusing the cached analytics aggregates. The
+    rendered report is the job's artifact.
+    """
+
+    def _run_section(self, build: Callable[[Session, Period], List[Table]], period: Period) -> List[Table]:
+        db = SessionLocal()
+        try:
+            return build(db, period)
+        finally:
+            db.close()
+
+    def build_quarterly_report(self, context: JobContext) -> Tuple[Path, str]:
+        """Job handler for ``quarterly_report``"""
+        period = Period(context.params["year"], context.params["quarter"])
+        report_format = context.params["format"]
+        total_steps = len(REPORT_SECTIONS) + 1
+
+        futures = {
+            context.section_executor.submit(tracer.bind(self._run_section), build, period): name
+            for name, build in REPORT_SECTIONS
+        }
+        results: Dict[str, List[Table]] = {}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            context.progress(len(results), total_steps, step=f"Built {futures[future]}")
+
+        sections = [(name, results[name]) for name, _ in REPORT_SECTIONS]
+        path = context.artifact_path(report_format)
+        title = f"MSWD Livelihood Accomplishment Report, {period}"
+        {"xlsx": self._write_xlsx, "csv": self._write_csv, "pdf": self._write_pdf}[report_format](path, title, sections)
+
+        return path, f"accomplishment-report-{period.year}-q{period.quarter}.{report_format}"
+
+    def _write_xlsx(self, path: Path, title: str, sections: List[Tuple[str, List[Table]]]) -> None:
+        import xlsxwriter
+
+        workbook = xlsxwriter.Workbook(str(path), {"constant_memory": True, "strings_to_formulas": False})
+        try:
+            bold = workbook.add_format({"bold": True})
+            heading = workbook.add_format({"bold": True, "font_size": 13})
+            for name, tables in sections:
+                worksheet = workbook.add_worksheet(name[:31])
+                worksheet.write(0, 0, title, heading)
+                row = 2
+                for table_title, headers, rows in tables:
+                    worksheet.write(row, 0, table_title, heading)
+                    worksheet.write_row(row + 1, 0, headers, bold)
+                    row += 2
+                    for values in rows:
+                        worksheet.write_row(row, 0, ["" if v is None else v for v in values])
+                        row += 1
+                    row += 1
+        finally:
+            workbook.close()
+
+    def _write_csv(self, path: Path, title: str, sections: List[Tuple[str, List[Table]]]) -> None:
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([title])
+            for name, tables in sections:
+                for table_title, headers, rows in tables:
+                    writer.writerow([])
+                    writer.writerow([f"{name}: {table_title}"])
+                    writer.writerow(headers)
+                    writer.writerows(["" if v is None else v for v in values] for values in rows)
+
+    def _write_pdf(self, path: Path, title: str, sections: List[Tuple[str, List[Table]]]) -> None:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
+        from reportlab.platypus import Table as PdfTable
+        from reportlab.platypus import TableStyle
+
+        styles = getSampleStyleSheet()
+        table_style = TableStyle([
+            ("FONTSIZE", (0, 0), (-1, -1), 7),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ])
+
+        story = [Paragraph(title, styles["Title"])]
+        for index, (name, tables) in enumerate(sections):
+            if index:
+                story.append(PageBreak())
+            story.append(Paragraph(name, styles["Heading1"]))
+            for table_title, headers, rows in tables:
+                story.append(Paragraph(table_title, styles["Heading3"]))
+                data = [headers, *[["" if v is None else str(v) for v in values] for values in rows]]
+                story.append(PdfTable(data, repeatRows=1, style=table_style))
+                story.append(Spacer(1, 12))
+
+        SimpleDocTemplate(str(path), pagesize=landscape(A4), title=title).build(story)
+
+    def submit_quarterly_report(self, year: int, quarter: int, report_format: str, user_id: int) -> Dict[str, Any]:
+        """Queue a quarterly report job"""
+        if quarter not in (1, 2, 3, 4):
+            raise ValueError("Quarter must be between 1 and 4")
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"Invalid report format. Must be one of: {', '.join(REPORT_FORMATS)}")
+        return job_service.submit(
+            "quarterly_report",
+            {"year": year, "quarter": quarter, "format": report_format},
+            user_id
+        )
+
+
+# Create service instance
+report_service = ReportService()
+job_service.register("quarterly_report", report_service.build_quarterly_report)
@@ -0,0 +1,199 @@
+"""Seat Reservation Service - atomic program capacity and waitlists"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.tracing import trace_methods
+from app.models.application import Application
+from app.models.program import Program
+from app.models.user import User
+from app.services.audit_service import audit_service
+from app.services.barangay_stats_service import barangay_stats_service
+
+# Application statuses that hold one of the program's seats
+SEAT_HOLDING_STATUSES = ("pending", "approved")
+WAITLISTED = "waitlisted"
+
+
+@trace_methods
+class SeatService:
+    """
+    Program seats are reserved when an application is submitted.
+
+    ``Program.seats_reserved`` counts active pending and approved
+    applications and never exceeds ``max_participants``. A reservation is a
+    single conditional UPDATE: concurrent applicants queue on the program row
+    and Postgres re-checks the condition after each one commits, so the last
+    seat goes to exactly one of them without locks held across requests.
+    Applicants who find the program full are waitlisted and promoted in
+    application order whenever a seat is released. ``current_participants``
+    stays the count of enrolled beneficiaries.
+    """
+
+    def holds_seat(self, status: Optional[str]) -> bool:
+        return status in SEAT_HOLDING_STATUSES
+
+    def reserve(self, db: Session, program_id: int) -> bool:
+        """Take a seat if one is free (caller commits)"""
+        return db.execute(
+            update(Program)
+            .where(
+                Program.id == program_id,
+                func.coalesce(Program.seats_reserved, 0) < Program.max_participants
+            )
+            .values(seats_reserved=func.coalesce(Program.seats_reserved, 0) + 1)
+            .returning(Program.id),
+            execution_options={"synchronize_session": False}
+        ).first() is not None
+
+    def release(self, db: Session, program_id: int, count: int = 1) -> List[int]:
+        """
+        Give back ``count`` seats and hand them to the head of the waitlist
+        (caller commits). Returns the promoted application IDs.
+        """
+        if count <= 0:
+            return []
+        db.execute(
+            update(Program)
+            .where(Program.id == program_id)
+            .values(seats_reserved=func.greatest(func.coalesce(Program.seats_reserved, 0) - count, 0)),
+            execution_options={"synchronize_session": False}
+        )
+        return self.fill_from_waitlist(db, program_id)
+
+    def fill_from_waitlist(self, db: Session, program_id: int) -> List[int]:
+        """
+        Promote waitlisted applications into the free seats, oldest first
+        (caller commits). Also used when a program's capacity grows.
+        """
+        free_seats = db.execute(
+            select(Program.max_participants - func.coalesce(Program.seats_reserved, 0))
+            .where(Program.id == program_id, Program.is_active == True)
+            .with_for_update()
+        ).scalar()
+        if not free_seats or free_seats <= 0:
+            return []
+
+        head = (
+            select(Application.id)
+            .where(
+                Application.program_id == program_id,
+                Application.status == WAITLISTED,
+                Application.is_active == True
+            )
+            .order_by(Application.applied_at, Application.id)
+            .limit(free_seats)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        promoted_ids = [
+            row.id for row in db.execute(
+                update(Application)
+                .where(Application.id.in_(head))
+                .values(status="pending", updated_at=func.now(), version=Application.version + 1)
+                .returning(Application.id),
+                execution_options={"synchronize_session": False}
+            )
+        ]
+        if not promoted_ids:
+            return []
+
+        db.execute(
+            update(Program)
+            .where(Program.id == program_id)
+            .values(seats_reserved=func.coalesce(Program.seats_reserved, 0) + len(promoted_ids)),
+            execution_options={"synchronize_session": False}
+        )
+        barangay_stats_service.record_applications(db, promoted_ids, WAITLISTED, "pending")
+        audit_service.log_actions_bulk(db, [
+            {
+                "user_id": None,
+                "action": "APPLICATION_PROMOTED",
+                "resource_type": "Application",
+                "resource_id": application_id,
+                "old_values": {"status": WAITLISTED},
+                "new_values": {"status": "pending"},
+                "description": "Application promoted from the waitlist"
+            }
+            for application_id in promoted_ids
+        ], commit=False)
+        return promoted_ids
+
+    def reconcile(self, db: Session, program_ids: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Recount reservations from the applications table and fill any seats
+        that opened up (caller commits), e.g. after imports that bypass
+        reservation. Returns the promoted application IDs.
+        """
+        held = (
+            select(func.count(Application.id))
+            .where(
+                Application.program_id == Program.id,
+                Application.status.in_(SEAT_HOLDING_STATUSES),
+                Application.is_active == True
+            )
+            .scalar_subquery()
+        )
+        stmt = update(Program).values(seats_reserved=held).returning(Program.id)
+        if program_ids is not None:
+            stmt = stmt.where(Program.id.in_(list(program_ids)))
+        reconciled = [row.id for row in db.execute(stmt, execution_options={"synchronize_session": False})]
+
+        promoted_ids = []
+        for program_id in reconciled:
+            promoted_ids.extend(self.fill_from_waitlist(db, program_id))
+        return promoted_ids
+
+    def waitlist_position(self, db: Session, application: Application) -> Optional[int]:
+        """1-based position of a waitlisted application, None if it is not waitlisted"""
+        if application.status != WAITLISTED or not application.is_active:
+            return None
+        ahead = db.query(func.count(Application.id)).filter(
+            Application.program_id == application.program_id,
+            Application.status == WAITLISTED,
+            Application.is_active == True,
+            tuple_(Application.applied_at, Application.id) < tuple_(application.applied_at, application.id)
+        ).scalar()
+        return ahead + 1
+
+    def get_seats(self, db: Session, program_id: int) -> Optional[Dict[str, Any]]:
+        """Capacity, reservations and waitlist length of a program"""
+        row = db.query(
+            Program.max_participants,
+            func.coalesce(Program.seats_reserved, 0),
+            func.coalesce(Program.current_participants, 0)
+        ).filter(Program.id == program_id).first()
+        if not row:
+            return None
+
+        capacity, reserved, enrolled = row
+        waitlisted = db.query(func.count(Application.id)).filter(
+            Application.program_id == program_id,
+            Application.status == WAITLISTED,
+            Application.is_active == True
+        ).scalar()
+        return {
+            "program_id": program_id,
+            "capacity": capacity,
+            "reserved": reserved,
+            "available": max(capacity - reserved, 0),
+            "enrolled": enrolled,
+            "waitlisted": waitlisted,
+        }
+
+    def promotion_notifications(self, db: Session, application_ids: List[int]) -> List[Dict[str, str]]:
+        """Recipients for ``notification_service.send_waitlist_promotions``"""
+        if not application_ids:
+            return []
+        return [
+            {"email": email, "name": name, "program_name": program_name}
+            for email, name, program_name in db.query(User.email, User.name, Program.title)
+            .join(Application, and_(Application.user_id == User.id, Application.id.in_(application_ids)))
+            .join(Program, Program.id == Application.program_id)
+            .all()
+        ]
+
+
+# Create service instance
+seat_service = SeatService()
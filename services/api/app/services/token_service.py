@@ -0,0 +1,140 @@
+"""Token Service - access token issuing and refresh token rotation"""
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.permissions import permission_claims
+from app.core.security import create_access_token
+from app.core.token_store import token_store
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+class TokenService:
+    """
+    Short-lived access tokens paired with rotating refresh tokens.
+
+    Refresh tokens are opaque random strings; only their SHA-256 digest is
+    stored. Every refresh revokes the presented token and issues a new one in
+    the same family. Presenting an already rotated token means it was copied,
+    so the whole family and the user's access tokens are revoked and the
+    user has to log in again.
+    """
+
+    def _hash(self, raw_token: str) -> str:
+        return hashlib.sha256(raw_token.encode()).hexdigest()
+
+    def _create_refresh_token(self, db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+        raw_token = secrets.token_urlsafe(48)
+        db.add(RefreshToken(
+            user_id=user_id,
+            token_hash=self._hash(raw_token),
+            family_id=family_id or uuid.uuid4().hex,
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        ))
+        return raw_token
+
+    def create_access_token(self, user: User) -> str:
+        """Create an access token carrying the user's role and permission claims"""
+        return create_access_token(user.email, claims=permission_claims(user))
+
+    def issue_tokens(self, db: Session, user: User, family_id: Optional[str] = None) -> Dict[str, Any]:
+        """Issue an access/refresh token pair in the shape of the Token schema"""
+        refresh_token = self._create_refresh_token(db, user.id, family_id)
+        db.commit()
+
+        return {
+            "access_token": self.create_access_token(user),
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            "user": {
+                "id": user.id,
+                "email": user.email,
+                "name": user.name,
+                "role": user.role,
+                "is_active": user.is_active
+            }
+        }
+
+    def rotate_refresh_token(self, db: Session, raw_token: str) -> Tuple[User, Dict[str, Any]]:
+        """Exchange a refresh token for a new token pair"""
+        invalid = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+        record = db.query(RefreshToken).filter(
+            RefreshToken.token_hash == self._hash(raw_token)
+        ).with_for_update().first()
+        if not record:
+            raise invalid
+
+        now = datetime.utcnow()
+        if record.revoked_at is not None:
+            # Reuse of a rotated token, assume it leaked and end the session,
+            # including access tokens the thief may already hold
+            self.revoke_family(db, record.family_id)
+            token_store.revoke_user(record.user_id)
+            raise invalid
+
+        if record.expires_at <= now:
+            raise invalid
+
+        user = db.query(User).filter(User.id == record.user_id).first()
+        if not user or not user.is_active:
+            raise invalid
+
+        record.revoked_at = now
+        return user, self.issue_tokens(db, user, family_id=record.family_id)
+
+    def revoke_family(self, db: Session, family_id: str) -> int:
+        """Revoke every refresh token from one login"""
+        revoked = db.query(RefreshToken).filter(
+            RefreshToken.family_id == family_id,
+            RefreshToken.revoked_at.is_(None)
+        ).update({RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return revoked
+
+    def revoke_refresh_token(self, db: Session, raw_token: str, user_id: int) -> bool:
+        """Revoke the login a refresh token belongs to"""
+        record = db.query(RefreshToken).filter(
+            RefreshToken.token_hash == self._hash(raw_token),
+            RefreshToken.user_id == user_id
+        ).first()
+        if not record:
+            return False
+        self.revoke_family(db, record.family_id)
+        return True
+
+    def revoke_access_token(self, payload: Dict[str, Any]) -> None:
+        """Revoke a decoded access token until it expires"""
+        token_store.revoke(payload["jti"], payload.get("exp"))
+
+    def revoke_all_for_user(self, db: Session, user_id: int) -> int:
+        """End every session of a user, e.g. after a password change"""
+        revoked = db.query(RefreshToken).filter(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None)
+        ).update({RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        token_store.revoke_user(user_id)
+        return revoked
+
+    def purge_expired(self, db: Session) -> int:
+        """Delete refresh tokens that can no longer be used"""
+        deleted = db.query(RefreshToken).filter(
+            RefreshToken.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+# Create service instance
+token_service = TokenService()
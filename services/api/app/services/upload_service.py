@@ -0,0 +1,287 @@
+"""Resumable Upload Service for field offices with unreliable connectivity"""
+import asyncio
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.services.file_service import file_service
+
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+SWEEP_INTERVAL_SECONDS = 15 * 60
+
+
+class ResumableUploadService:
+    """
+    Chunked upload sessions that survive dropped connections.
+
+    Each session lives in its own directory under ``<UPLOAD_DIR>/.partial``
+    holding ``state.json`` and the bytes received so far in ``data.part``.
+    The size of ``data.part`` is the authoritative offset, so a session can
+    be resumed after a worker restart. Finalised uploads are handed to
+    ``FileService`` for validation and metadata.
+
+    Writes, finalising and cancelling take the session's lock, so a session
+    is never moved or removed while a chunk is being written, and their file
+    I/O runs in worker threads off the event loop.
+    """
+
+    def __init__(self):
+        self.partial_dir = file_service.upload_dir / ".partial"
+        self.expire_after = timedelta(hours=settings.RESUMABLE_UPLOAD_EXPIRE_HOURS)
+        self.max_chunk_size = settings.RESUMABLE_UPLOAD_MAX_CHUNK_SIZE
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._last_sweep = 0.0
+
+        # Create partial upload directory if it doesn't exist
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+
+    def _session_dir(self, upload_id: str) -> Path:
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found"
+            )
+        return self.partial_dir / upload_id
+
+    def _read_state(self, upload_id: str) -> Dict[str, Any]:
+        state_path = self._session_dir(upload_id) / "state.json"
+        try:
+            with open(state_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found"
+            )
+
+    def _write_state(self, upload_id: str, state: Dict[str, Any]) -> None:
+        session_dir = self._session_dir(upload_id)
+        tmp_path = session_dir / "state.json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, session_dir / "state.json")
+
+    def _current_offset(self, upload_id: str) -> int:
+        data_path = self._session_dir(upload_id) / "data.part"
+        return data_path.stat().st_size if data_path.exists() else 0
+
+    def _is_expired(self, state: Dict[str, Any]) -> bool:
+        updated_at = datetime.fromisoformat(state["updated_at"])
+        return datetime.utcnow() - updated_at > self.expire_after
+
+    def _status(self, state: Dict[str, Any], offset: int) -> Dict[str, Any]:
+        updated_at = datetime.fromisoformat(state["updated_at"])
+        return {
+            "upload_id": state["upload_id"],
+            "filename": state["filename"],
+            "offset": offset,
+            "total_size": state["total_size"],
+            "is_complete": offset == state["total_size"],
+            "expires_at": (updated_at + self.expire_after).isoformat()
+        }
+
+    def _lock_for(self, upload_id: str) -> asyncio.Lock:
+        lock = self._locks.get(upload_id)
+        if lock is None:
+            lock = self._locks[upload_id] = asyncio.Lock()
+        return lock
+
+    def get_upload(self, upload_id: str, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Load an upload session, enforcing ownership and expiry"""
+        state = self._read_state(upload_id)
+
+        if user_id is not None and state.get("user_id") not in (None, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+
+        if self._is_expired(state):
+            self._discard(upload_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found"
+            )
+
+        return state
+
+    def create_upload(
+        self,
+        filename: str,
+        total_size: int,
+        content_type: Optional[str] = None,
+        subfolder: str = "general",
+        user_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Start a new resumable upload session"""
+        # Reject bad files before any bytes are sent
+        file_service.validate_upload(filename, total_size)
+
+        self._maybe_sweep()
+
+        upload_id = uuid.uuid4().hex
+        now = datetime.utcnow().isoformat()
+        state = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "total_size": total_size,
+            "content_type": content_type,
+            "subfolder": subfolder,
+            "user_id": user_id,
+            "created_at": now,
+            "updated_at": now
+        }
+
+        session_dir = self._session_dir(upload_id)
+        session_dir.mkdir(parents=True)
+        (session_dir / "data.part").touch()
+        self._write_state(upload_id, state)
+
+        return self._status(state, 0)
+
+    def get_status(self, upload_id: str, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Get the progress of an upload session"""
+        state = self.get_upload(upload_id, user_id)
+        return self._status(state, self._current_offset(upload_id))
+
+    async def append_chunk(
+        self,
+        upload_id: str,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        user_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Append a chunk at the given offset.
+
+        Bytes are flushed to disk as they arrive, so a connection that drops
+        mid-chunk still advances the offset by whatever was received.
+        """
+        async with self._lock_for(upload_id):
+            state = await asyncio.to_thread(self.get_upload, upload_id, user_id)
+            current_offset = await asyncio.to_thread(self._current_offset, upload_id)
+
+            if offset != current_offset:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Upload offset mismatch",
+                    headers={"Upload-Offset": str(current_offset)}
+                )
+
+            remaining = state["total_size"] - current_offset
+            received = 0
+            data_path = self._session_dir(upload_id) / "data.part"
+
+            try:
+                # Finalised or cancelled by another worker since it was read
+                f = await asyncio.to_thread(open, data_path, "ab")
+            except FileNotFoundError:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Upload not found"
+                )
+
+            try:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    received += len(chunk)
+                    if received > remaining or received > self.max_chunk_size:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Chunk exceeds the declared upload size or the maximum chunk size"
+                        )
+                    await asyncio.to_thread(self._write_chunk, f, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+                state["updated_at"] = datetime.utcnow().isoformat()
+                await asyncio.to_thread(self._write_state, upload_id, state)
+
+            return self._status(state, await asyncio.to_thread(self._current_offset, upload_id))
+
+    @staticmethod
+    def _write_chunk(f, chunk: bytes) -> None:
+        f.write(chunk)
+        f.flush()
+
+    async def finalize(self, upload_id: str, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Move a fully received upload into storage and return its file info"""
+        async with self._lock_for(upload_id):
+            return await asyncio.to_thread(self._finalize, upload_id, user_id)
+
+    def _finalize(self, upload_id: str, user_id: Optional[int]) -> Dict[str, Any]:
+        state = self.get_upload(upload_id, user_id)
+        offset = self._current_offset(upload_id)
+
+        if offset != state["total_size"]:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload is incomplete",
+                headers={"Upload-Offset": str(offset)}
+            )
+
+        file_service.validate_upload(state["filename"], offset)
+
+        file_path = file_service.allocate_path(state["filename"], state["subfolder"])
+        shutil.move(str(self._session_dir(upload_id) / "data.part"), str(file_path))
+        self._discard(upload_id)
+
+        return file_service.build_file_info(
+            file_path,
+            state["filename"],
+            state["content_type"],
+            state["subfolder"],
+            state["user_id"]
+        )
+
+    async def cancel(self, upload_id: str, user_id: Optional[int] = None) -> bool:
+        """Abort an upload session and discard received bytes"""
+        async with self._lock_for(upload_id):
+            await asyncio.to_thread(self.get_upload, upload_id, user_id)
+            await asyncio.to_thread(self._discard, upload_id)
+        return True
+
+    def _discard(self, upload_id: str) -> None:
+        shutil.rmtree(self._session_dir(upload_id), ignore_errors=True)
+        self._locks.pop(upload_id, None)
+
+    def _maybe_sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sweep >= SWEEP_INTERVAL_SECONDS:
+            self._last_sweep = now
+            self.expire_stale_uploads()
+
+    def expire_stale_uploads(self) -> int:
+        """Remove partial uploads that have not been touched within the expiry window"""
+        expired_count = 0
+
+        for session_dir in self.partial_dir.iterdir():
+            if not session_dir.is_dir() or not UPLOAD_ID_PATTERN.match(session_dir.name):
+                continue
+            try:
+                with open(session_dir / "state.json", "r") as f:
+                    state = json.load(f)
+                expired = self._is_expired(state)
+            except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
+                # Orphaned session directory, fall back to its modification time
+                age = time.time() - session_dir.stat().st_mtime
+                expired = age > self.expire_after.total_seconds()
+
+            if expired:
+                self._discard(session_dir.name)
+                expired_count += 1
+
+        return expired_count
+
+
+# Create service instance
+upload_service = ResumableUploadService()
@@ -10,9 +10,12 @@ from app.schemas.user import UserCreate, UserUpdate
 from app.services.audit_service import audit_service
 from app.services.notification_service import notification_service
 from app.core.security import get_password_hash
+from app.core.permissions import commit_permission_change
+from app.core.tracing import trace_methods
 from app.utils.validators import validate_email, validate_phone, validate_name
 from app.utils.formatters import format_name, format_phone_number
 
+@trace_methods
 class UserService:
     """Complete user management service"""
     
@@ -180,7 +183,11 @@ class UserService:
         user.updated_at = datetime.utcnow()
         user.updated_by = updated_by
         
-        db.commit()
+        if {"role", "is_active", "email"} & update_data.keys():
+            # Claims in already issued tokens no longer match
+            commit_permission_change(db, user)
+        else:
+            db.commit()
         db.refresh(user)
         
         # Log audit
@@ -205,7 +212,7 @@ class UserService:
         user.updated_at = datetime.utcnow()
         user.updated_by = deactivated_by
         
-        db.commit()
+        commit_permission_change(db, user)
         
         # Send notification
         notification_service.send_account_deactivation_notice(user.email, user.full_name)
@@ -232,7 +239,7 @@ class UserService:
         user.updated_at = datetime.utcnow()
         user.updated_by = activated_by
         
-        db.commit()
+        commit_permission_change(db, user)
         
         # Send notification
         notification_service.send_account_activation_notice(user.email, user.full_name)
@@ -287,7 +294,7 @@ class UserService:
         user.deleted_at = datetime.utcnow()
         user.deleted_by = deleted_by
         
-        db.commit()
+        commit_permission_change(db, user)
         
         # Log audit
         audit_service.log_action(
@@ -319,7 +326,7 @@ class UserService:
         user.updated_at = datetime.utcnow()
         user.updated_by = updated_by
         
-        db.commit()
+        commit_permission_change(db, user)
         
         # Send notification
         notification_service.send_role_change_notice(user.email, user.full_name, old_role, new_role)
@@ -336,4 +336,7 @@ def format_search_highlight(text: str, search_term: str, highlight_class: str =
     def replace_func(match):
         return f'<span class="{highlight_class}">{match.group()}</span>'
     
-    return pattern.sub(replace_func, text)
\ No newline at end of file
+    return pattern.sub(replace_func, text)
+def format_etag(version: int) -> str:
+    """Format a row version as a strong ETag, the value clients echo in If-Match"""
+    return f'"{version}"'
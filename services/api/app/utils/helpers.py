@@ -43,6 +43,16 @@ def generate_reference_number(prefix: str = "REF") -> str:
     random_suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
     return f"{prefix}{timestamp}{random_suffix}"
 
+def parse_budget_amount(budget: Optional[str]) -> Optional[float]:
+    """Parse a budget string such as "₱1,500,000.00" into a number"""
+    if not budget:
+        return None
+    
+    try:
+        return float(re.sub(r'[₱$,\s]', '', budget))
+    except ValueError:
+        return None
+
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe storage"""
     # Remove or replace unsafe characters
@@ -0,0 +1 @@
+"""Load and throughput benchmarks for the API backend"""
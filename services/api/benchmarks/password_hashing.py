@@ -0,0 +1,59 @@
+"""
+Password hashing throughput benchmark.
+
+Measures how many logins (bcrypt verifications) per second the hashing
+worker pool sustains, and normalises the result per core so different
+machines and BCRYPT_ROUNDS settings can be compared.
+
+Usage (from services/api):
+    python -m benchmarks.password_hashing --logins 200 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.core.config import settings
+from app.core import security
+
+
+async def _run_logins(hashed: str, password: str, logins: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login() -> None:
+        async with semaphore:
+            verified, _ = await security.averify_and_update_password(password, hashed)
+            assert verified
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="Number of login verifications to run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent in-flight logins")
+    args = parser.parse_args()
+
+    password = "BenchmarkPassw0rd!"
+    hashed = security.get_password_hash(password)
+
+    # Warm up the worker processes so spawn cost is not measured
+    asyncio.run(_run_logins(hashed, password, settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_WORKERS))
+
+    elapsed = asyncio.run(_run_logins(hashed, password, args.logins, args.concurrency))
+    logins_per_second = args.logins / elapsed
+    cores = min(settings.PASSWORD_HASH_WORKERS, os.cpu_count() or 1)
+
+    print(f"bcrypt rounds:        {settings.BCRYPT_ROUNDS}")
+    print(f"hash workers:         {settings.PASSWORD_HASH_WORKERS} (cores used: {cores})")
+    print(f"logins:               {args.logins} in {elapsed:.2f}s")
+    print(f"logins/second:        {logins_per_second:.1f}")
+    print(f"logins/second/core:   {logins_per_second / cores:.1f}")
+
+    security.shutdown_password_hashing()
+
+
+if __name__ == "__main__":
+    main()
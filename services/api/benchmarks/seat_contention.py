@@ -0,0 +1,119 @@
+"""
+Seat reservation contention benchmark.
+
+Simulates a popular program opening: many applicants race for a few seats
+at the same moment, each in its own transaction. Reports how many seats
+were granted, whether the program was oversold, and reservation latency.
+``--strategy naive`` runs the read-then-write check the API used before
+reservations, for comparison; expect it to oversell.
+
+Needs a reachable DATABASE_URL. The benchmark program is deleted afterwards.
+
+Usage (from services/api):
+    python -m benchmarks.seat_contention --seats 50 --applicants 1000 --concurrency 64
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.program import Program, ProgramCategory, ProgramStatus
+from app.services.seat_service import seat_service
+
+
+def _reserve_naive(db, program_id: int) -> bool:
+    reserved, capacity = db.execute(
+        select(Program.seats_reserved, Program.max_participants).where(Program.id == program_id)
+    ).one()
+    if reserved >= capacity:
+        return False
+    db.query(Program).filter(Program.id == program_id).update(
+        {"seats_reserved": reserved + 1}, synchronize_session=False
+    )
+    return True
+
+
+STRATEGIES = {
+    "conditional": seat_service.reserve,
+    "naive": _reserve_naive,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seats", type=int, default=50, help="Program capacity")
+    parser.add_argument("--applicants", type=int, default=1000, help="Reservation attempts")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent transactions")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="conditional")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL, pool_size=args.concurrency, max_overflow=0)
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    reserve = STRATEGIES[args.strategy]
+
+    with Session() as db:
+        program = Program(
+            title="Seat contention benchmark",
+            category=ProgramCategory.SKILLS_TRAINING,
+            status=ProgramStatus.ACTIVE,
+            max_participants=args.seats,
+            seats_reserved=0,
+            start_date=datetime.utcnow(),
+            end_date=datetime.utcnow() + timedelta(days=30),
+            is_active=True
+        )
+        db.add(program)
+        db.commit()
+        program_id = program.id
+
+    # Hold every applicant at the gate so they hit the row together
+    first_wave = min(args.concurrency, args.applicants)
+    gate = threading.Barrier(first_wave)
+
+    def apply(index: int):
+        if index < first_wave:
+            gate.wait()
+        with Session() as db:
+            started = time.perf_counter()
+            granted = reserve(db, program_id)
+            db.commit()
+            return granted, time.perf_counter() - started
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(executor.map(apply, range(args.applicants)))
+        elapsed = time.perf_counter() - started
+
+        with Session() as db:
+            final_count = db.execute(select(Program.seats_reserved).where(Program.id == program_id)).scalar()
+    finally:
+        with Session() as db:
+            db.execute(delete(Program).where(Program.id == program_id))
+            db.commit()
+        engine.dispose()
+
+    granted = sum(1 for ok, _ in results if ok)
+    latencies = sorted(latency * 1000 for _, latency in results)
+    percentiles = statistics.quantiles(latencies, n=100)
+
+    print(f"strategy:             {args.strategy}")
+    print(f"seats:                {args.seats}")
+    print(f"applicants:           {args.applicants} ({args.concurrency} concurrent)")
+    print(f"granted:              {granted}")
+    print(f"waitlisted:           {args.applicants - granted}")
+    print(f"seats_reserved:       {final_count}")
+    print(f"oversold:             {max(granted - args.seats, 0)}")
+    print(f"lost updates:         {granted - final_count}")
+    print(f"attempts/second:      {args.applicants / elapsed:.1f}")
+    print(f"latency p50/p95/p99:  {percentiles[49]:.1f} / {percentiles[94]:.1f} / {percentiles[98]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Shared fixtures. Endpoint tests need a PostgreSQL database named by
+TEST_DATABASE_URL (its tables are created and dropped); they are skipped
+when it is not set.
+"""
+import os
+import tempfile
+
+# Settings are read at import, so configure them before the app is loaded
+if os.environ.get("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="mswd-test-uploads-"))
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app():
+    if not os.environ.get("TEST_DATABASE_URL"):
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from app.core.database import Base, sync_engine
+    from app.main import app
+
+    Base.metadata.create_all(sync_engine)
+    yield app
+    Base.metadata.drop_all(sync_engine)
+
+
+@pytest.fixture
+def db(app):
+    from app.core.database import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client_as(app):
+    """
+    ``client_as(user)`` gives a TestClient whose requests are made by
+    ``user``, each on its own sync session as the endpoints expect.
+    Endpoints taking the user itself load it once per request, as they do
+    with a real token.
+    """
+    from fastapi import Depends
+    from fastapi.testclient import TestClient
+
+    from app.api import deps
+    from app.core.database import SessionLocal
+    from app.core.permissions import Principal
+    from app.models.user import User
+
+    def get_db():
+        session = SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def client_as(user):
+        principal = Principal.from_user(user)
+
+        def get_current_user(db=Depends(deps.get_db)):
+            return db.get(User, principal.id)
+
+        app.dependency_overrides[deps.get_db] = get_db
+        app.dependency_overrides[deps.get_current_principal] = lambda: principal
+        app.dependency_overrides[deps.get_current_user] = get_current_user
+        return TestClient(app)
+
+    yield client_as
+    app.dependency_overrides.clear()
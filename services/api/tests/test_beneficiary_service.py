@@ -0,0 +1,69 @@
+"""Enrolled participant counts kept by beneficiary writes"""
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models.application import Application
+from app.models.audit import AuditLog
+from app.models.barangay_stats import BarangayStats
+from app.models.beneficiary import Beneficiary
+from app.models.program import Program, ProgramCategory
+from app.models.user import User
+from app.schemas.beneficiary import BeneficiaryCreate
+from app.services.beneficiary_service import beneficiary_service
+
+
+@pytest.fixture
+def approved(db):
+    suffix = uuid.uuid4().hex[:8]
+    user = User(email=f"enrollee-{suffix}@example.ph", name="Enrollee", hashed_password="x", barangay=f"Test {suffix}")
+    program = Program(
+        title=f"Program {suffix}",
+        category=ProgramCategory.BUSINESS,
+        max_participants=5,
+        current_participants=0,
+        start_date=datetime.utcnow(),
+        end_date=datetime.utcnow() + timedelta(days=90),
+    )
+    db.add_all([user, program])
+    db.flush()
+    application = Application(user_id=user.id, program_id=program.id, status="approved")
+    db.add(application)
+    db.commit()
+
+    yield application
+
+    db.query(AuditLog).filter(AuditLog.user_id == user.id).delete()
+    db.query(Beneficiary).filter(Beneficiary.program_id == program.id).delete()
+    db.query(Application).filter(Application.program_id == program.id).delete()
+    db.query(Program).filter(Program.id == program.id).delete()
+    db.query(User).filter(User.id == user.id).delete()
+    db.query(BarangayStats).filter(BarangayStats.barangay == f"Test {suffix}").delete()
+    db.commit()
+
+
+def _participants(db, program_id):
+    db.expire_all()
+    return db.get(Program, program_id).current_participants
+
+
+def test_single_enrollment_and_delete_move_participants(db, approved):
+    created = beneficiary_service.create_beneficiary(
+        db,
+        BeneficiaryCreate(
+            application_id=approved.id,
+            program_id=approved.program_id,
+            user_id=approved.user_id,
+            enrollment_date=date.today()
+        ),
+        created_by=approved.user_id
+    )
+    assert _participants(db, approved.program_id) == 1
+
+    assert beneficiary_service.delete_beneficiary(db, created.id, deleted_by=approved.user_id)
+    assert _participants(db, approved.program_id) == 0
+
+    # A deleted beneficiary is not found again, so it is not counted twice
+    assert not beneficiary_service.delete_beneficiary(db, created.id, deleted_by=approved.user_id)
+    assert _participants(db, approved.program_id) == 0
@@ -0,0 +1,78 @@
+"""Cohort funnel counts over applications with re-created beneficiaries"""
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models.application import Application
+from app.models.beneficiary import Beneficiary
+from app.models.cohort_stats import CohortStats
+from app.models.program import Program, ProgramCategory
+from app.models.user import User
+from app.services.cohort_service import cohort_service
+
+
+@pytest.fixture
+def program(db):
+    suffix = uuid.uuid4().hex[:8]
+    program = Program(
+        title=f"Program {suffix}",
+        category=ProgramCategory.HANDICRAFTS,
+        max_participants=10,
+        start_date=datetime.utcnow(),
+        end_date=datetime.utcnow() + timedelta(days=90),
+    )
+    users = [User(email=f"cohort-{i}-{suffix}@example.ph", name=f"Cohort {i}", hashed_password="x") for i in range(3)]
+    db.add_all([program, *users])
+    db.commit()
+
+    yield program, users
+
+    db.query(CohortStats).filter(CohortStats.program_id == program.id).delete()
+    db.query(Beneficiary).filter(Beneficiary.program_id == program.id).delete()
+    db.query(Application).filter(Application.program_id == program.id).delete()
+    db.query(Program).filter(Program.id == program.id).delete()
+    db.query(User).filter(User.id.in_([user.id for user in users])).delete(synchronize_session=False)
+    db.commit()
+
+
+def _enroll(db, application, **values):
+    beneficiary = Beneficiary(
+        user_id=application.user_id,
+        program_id=application.program_id,
+        application_id=application.id,
+        enrollment_date=date.today() - timedelta(days=30),
+        **values
+    )
+    db.add(beneficiary)
+    db.flush()
+    return beneficiary
+
+
+def test_refresh_counts_one_beneficiary_per_application(db, program):
+    program, users = program
+    applications = [
+        Application(user_id=user.id, program_id=program.id, status="approved", reviewed_at=datetime.utcnow())
+        for user in users
+    ]
+    db.add_all(applications)
+    db.flush()
+
+    # Enrolled, deleted and enrolled again, then completed without a date
+    _enroll(db, applications[0], status="active", is_active=False)
+    _enroll(db, applications[0], status="active", is_active=False)
+    _enroll(db, applications[0], status="completed")
+    # Still enrolled
+    _enroll(db, applications[1], status="active")
+    # Completed after 10 days
+    _enroll(db, applications[2], status="completed", completion_date=date.today() - timedelta(days=20))
+    db.commit()
+
+    cohort_service.refresh(db, full=True)
+    db.commit()
+
+    stats = db.query(CohortStats).filter(CohortStats.program_id == program.id).one()
+    assert (stats.applications, stats.approved, stats.enrolled) == (3, 3, 3)
+    assert (stats.completed, stats.dropped) == (2, 0)
+    # The undated completion is left out of the curve, not counted as running
+    assert stats.completion_rate_90_days == 0.5
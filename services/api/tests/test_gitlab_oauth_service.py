@@ -0,0 +1,145 @@
+"""GitLab client behaviour against a local stand-in for the GitLab API"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import pytest_asyncio
+
+from app.services.gitlab_oauth_service import GitLabOAuthService, RetryBudget
+
+USER = {"id": 7, "username": "ana", "email": "ana@example.ph", "name": "Ana Cruz"}
+
+
+class StandInGitLab(ThreadingHTTPServer):
+    """Serves /api/v4/user, recording each request and the connection it came on"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.requests = []
+        self.status_code = 200
+        self.etag = '"v1"'
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def connections(self) -> int:
+        return len({request["client"] for request in self.requests})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append({
+            "client": self.client_address,
+            "path": self.path,
+            "if_none_match": self.headers.get("If-None-Match"),
+        })
+        if server.status_code != 200:
+            self._respond(server.status_code, b"")
+        elif self.headers.get("If-None-Match") == server.etag:
+            self._respond(304, b"")
+        else:
+            self._respond(200, json.dumps(USER).encode(), {"ETag": server.etag, "Content-Type": "application/json"})
+
+    def _respond(self, status_code, body, headers=None):
+        self.send_response(status_code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status_code != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def gitlab():
+    server = StandInGitLab()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest_asyncio.fixture
+async def service(gitlab):
+    service = GitLabOAuthService()
+    service.base_url = gitlab.url
+    await service.startup()
+    yield service
+    await service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_one_connection(gitlab, service):
+    for token in ("a", "b", "c", "d"):
+        assert await service.get_user_info(token) == USER
+
+    assert len(gitlab.requests) == 4
+    assert gitlab.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_when_budget_is_spent(gitlab, service):
+    gitlab.status_code = 503
+    service.max_retries = 2
+    service.retry_budget = RetryBudget(ratio=0.0, max_tokens=1.0)
+
+    response = await service._request("GET", "/api/v4/user")
+    assert response.status_code == 503
+    assert len(gitlab.requests) == 2  # one retry, then the budget is empty
+
+    response = await service._request("GET", "/api/v4/user")
+    assert response.status_code == 503
+    assert len(gitlab.requests) == 3  # no retry at all
+
+
+@pytest.mark.asyncio
+async def test_retries_are_limited_by_max_retries(gitlab, service):
+    gitlab.status_code = 503
+    service.max_retries = 2
+    service.retry_budget = RetryBudget(ratio=0.0, max_tokens=10.0)
+
+    response = await service._request("GET", "/api/v4/user")
+    assert response.status_code == 503
+    assert len(gitlab.requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_fresh_entries_are_served_from_cache(gitlab, service):
+    assert await service.get_user_info("token") == USER
+    assert await service.get_user_info("token") == USER
+
+    assert len(gitlab.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_revalidated_with_etag(gitlab, service):
+    service.cache_ttl = 0
+
+    assert await service.get_user_info("token") == USER
+    assert await service.get_user_info("token") == USER
+
+    assert [request["if_none_match"] for request in gitlab.requests] == [None, '"v1"']
+
+
+@pytest.mark.asyncio
+async def test_changed_resource_replaces_cached_body(gitlab, service):
+    service.cache_ttl = 0
+    await service.get_user_info("token")
+
+    gitlab.etag = '"v2"'
+    assert await service.get_user_info("token") == USER
+    assert await service.get_user_info("token") == USER
+
+    assert [request["if_none_match"] for request in gitlab.requests] == [None, '"v1"', '"v2"']
@@ -0,0 +1,106 @@
+"""
+Statement counts of read endpoints, pinned so an N+1 (a query per row)
+fails here rather than in production. Every page holds more rows than
+the pinned count.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.query_counter import assert_max_queries
+from app.models.application import Application
+from app.models.audit import AuditLog
+from app.models.program import Program, ProgramCategory
+from app.models.user import User, UserRole
+
+ROWS = 12
+
+
+@pytest.fixture
+def records(db):
+    suffix = uuid.uuid4().hex[:8]
+    admin = User(email=f"admin-{suffix}@mswd.gov.ph", name="Admin", hashed_password="x", role=UserRole.ADMIN)
+    applicants = [
+        User(email=f"applicant-{i}-{suffix}@example.ph", name=f"Applicant {i}", hashed_password="x")
+        for i in range(ROWS)
+    ]
+    program = Program(
+        title=f"Program {suffix}",
+        category=ProgramCategory.AGRICULTURE,
+        max_participants=ROWS,
+        start_date=datetime.utcnow(),
+        end_date=datetime.utcnow() + timedelta(days=90),
+    )
+    db.add_all([admin, program, *applicants])
+    db.flush()
+
+    applications = [Application(user_id=user.id, program_id=program.id) for user in applicants]
+    db.add_all(applications)
+    db.add_all([
+        AuditLog(user_id=user.id, action=f"TEST_{suffix}", resource_type="User", resource_id=user.id)
+        for user in applicants
+    ])
+    db.commit()
+
+    yield {"admin": admin, "program": program, "applicants": applicants, "applications": applications, "action": f"TEST_{suffix}"}
+
+    db.query(AuditLog).filter(AuditLog.action == f"TEST_{suffix}").delete()
+    db.query(Application).filter(Application.program_id == program.id).delete()
+    db.query(Program).filter(Program.id == program.id).delete()
+    db.query(User).filter(User.email.contains(suffix)).delete(synchronize_session=False)
+    db.commit()
+
+
+def test_audit_logs_join_their_users(client_as, records):
+    client = client_as(records["admin"])
+
+    with assert_max_queries(1):
+        response = client.get("/api/v1/admin/audit-logs", params={"action": records["action"]})
+
+    assert response.status_code == 200
+    logs = response.json()
+    assert len(logs) == ROWS
+    assert all(log["user"]["email"].startswith("applicant-") for log in logs)
+
+
+def test_application_list(client_as, records):
+    client = client_as(records["admin"])
+
+    with assert_max_queries(2):  # count and page
+        response = client.get("/api/v1/applications/", params={"program_id": records["program"].id})
+
+    assert response.status_code == 200
+    assert response.json()["total"] == ROWS
+
+
+def test_program_applications(client_as, records):
+    client = client_as(records["admin"])
+
+    with assert_max_queries(2):  # program and its applications
+        response = client.get(f"/api/v1/applications/program/{records['program'].id}")
+
+    assert response.status_code == 200
+    assert len(response.json()) == ROWS
+
+
+def test_user_applications(client_as, records):
+    applicant = records["applicants"][0]
+    client = client_as(applicant)
+
+    with assert_max_queries(2):  # caller and applications
+        response = client.get(f"/api/v1/applications/user/{applicant.id}")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+
+def test_application_read(client_as, records):
+    application = records["applications"][0]
+    client = client_as(records["admin"])
+
+    with assert_max_queries(2):  # caller and application
+        response = client.get(f"/api/v1/applications/{application.id}")
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{application.version}"'
@@ -0,0 +1,146 @@
+"""Program seats: capacity, waitlist promotion and recounts"""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.application import Application
+from app.models.audit import AuditLog
+from app.models.barangay_stats import BarangayStats
+from app.models.program import Program, ProgramCategory
+from app.models.user import User
+from app.services.seat_service import SEAT_HOLDING_STATUSES, WAITLISTED, seat_service
+
+CAPACITY = 2
+
+
+@pytest.fixture
+def program(db):
+    suffix = uuid.uuid4().hex[:8]
+    program = Program(
+        title=f"Program {suffix}",
+        category=ProgramCategory.SKILLS_TRAINING,
+        max_participants=CAPACITY,
+        seats_reserved=0,
+        start_date=datetime.utcnow(),
+        end_date=datetime.utcnow() + timedelta(days=90),
+    )
+    users = [
+        User(email=f"seat-{i}-{suffix}@example.ph", name=f"Applicant {i}", hashed_password="x", barangay=f"Test {suffix}")
+        for i in range(5)
+    ]
+    db.add_all([program, *users])
+    db.commit()
+
+    yield program, users
+
+    application_ids = [
+        row.id for row in db.query(Application.id).filter(Application.program_id == program.id)
+    ]
+    db.query(AuditLog).filter(
+        AuditLog.resource_type == "Application", AuditLog.resource_id.in_(application_ids)
+    ).delete(synchronize_session=False)
+    db.query(Application).filter(Application.program_id == program.id).delete()
+    db.query(Program).filter(Program.id == program.id).delete()
+    db.query(User).filter(User.id.in_([user.id for user in users])).delete(synchronize_session=False)
+    db.query(BarangayStats).filter(BarangayStats.barangay == f"Test {suffix}").delete()
+    db.commit()
+
+
+def _apply(db, program, user, applied_at):
+    """Take a seat or join the waitlist, as application_service does"""
+    seated = seat_service.reserve(db, program.id)
+    application = Application(
+        user_id=user.id,
+        program_id=program.id,
+        status="pending" if seated else WAITLISTED,
+        applied_at=applied_at
+    )
+    db.add(application)
+    db.commit()
+    return application
+
+
+def _withdraw(db, *applications):
+    for application in applications:
+        application.status = "withdrawn"
+    db.commit()
+
+
+def _assert_within_capacity(db, program_id):
+    db.expire_all()
+    seats = seat_service.get_seats(db, program_id)
+    held = db.query(Application).filter(
+        Application.program_id == program_id,
+        Application.status.in_(SEAT_HOLDING_STATUSES),
+        Application.is_active == True
+    ).count()
+    assert seats["reserved"] == held <= seats["capacity"]
+    return seats
+
+
+def test_reserve_stops_at_capacity(db, program):
+    program, _ = program
+
+    assert [seat_service.reserve(db, program.id) for _ in range(CAPACITY + 2)] == [True] * CAPACITY + [False] * 2
+    db.commit()
+
+    assert seat_service.get_seats(db, program.id)["reserved"] == CAPACITY
+
+
+def test_release_promotes_the_waitlist_in_application_order(db, program):
+    program, users = program
+    start = datetime.utcnow() - timedelta(hours=1)
+    seated = [_apply(db, program, user, start + timedelta(minutes=i)) for i, user in enumerate(users[:CAPACITY])]
+    # Submitted newest first, so IDs run against application order
+    waitlisted = [
+        _apply(db, program, users[i], start + timedelta(minutes=10 + i))
+        for i in range(len(users) - 1, CAPACITY - 1, -1)
+    ]
+    waitlisted.reverse()
+    assert [application.status for application in waitlisted] == [WAITLISTED] * 3
+    assert [seat_service.waitlist_position(db, application) for application in waitlisted] == [1, 2, 3]
+    _assert_within_capacity(db, program.id)
+
+    _withdraw(db, seated[0])
+    assert seat_service.release(db, program.id) == [waitlisted[0].id]
+    db.commit()
+    assert _assert_within_capacity(db, program.id)["waitlisted"] == 2
+
+    _withdraw(db, seated[1], waitlisted[0])
+    assert sorted(seat_service.release(db, program.id, count=2)) == sorted([waitlisted[1].id, waitlisted[2].id])
+    db.commit()
+    seats = _assert_within_capacity(db, program.id)
+    assert (seats["reserved"], seats["waitlisted"]) == (CAPACITY, 0)
+
+
+def test_release_without_a_waitlist_frees_the_seat(db, program):
+    program, users = program
+    application = _apply(db, program, users[0], datetime.utcnow())
+
+    _withdraw(db, application)
+    assert seat_service.release(db, program.id) == []
+    db.commit()
+
+    assert _assert_within_capacity(db, program.id)["available"] == CAPACITY
+
+
+def test_reconcile_recounts_and_fills_open_seats(db, program):
+    program, users = program
+    start = datetime.utcnow() - timedelta(hours=1)
+    # Imported rows that never reserved a seat, and a count that drifted
+    db.add_all([
+        Application(user_id=users[0].id, program_id=program.id, status="approved", applied_at=start),
+        Application(user_id=users[1].id, program_id=program.id, status="rejected", applied_at=start),
+        Application(user_id=users[2].id, program_id=program.id, status=WAITLISTED, applied_at=start + timedelta(minutes=2)),
+        Application(user_id=users[3].id, program_id=program.id, status=WAITLISTED, applied_at=start + timedelta(minutes=1)),
+    ])
+    program.seats_reserved = CAPACITY + 3
+    db.commit()
+    first_in_line = db.query(Application.id).filter(Application.user_id == users[3].id).scalar()
+
+    assert seat_service.reconcile(db, [program.id]) == [first_in_line]
+    db.commit()
+
+    seats = _assert_within_capacity(db, program.id)
+    assert (seats["reserved"], seats["waitlisted"]) == (CAPACITY, 1)
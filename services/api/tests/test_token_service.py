@@ -0,0 +1,56 @@
+"""Refresh token rotation and reuse detection"""
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.token_store import token_store
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.services.token_service import token_service
+
+
+@pytest.fixture
+def user(db):
+    user = User(email=f"tokens-{uuid.uuid4().hex[:8]}@example.ph", name="Token User", hashed_password="x")
+    db.add(user)
+    db.commit()
+
+    yield user
+
+    db.query(RefreshToken).filter(RefreshToken.user_id == user.id).delete()
+    db.query(User).filter(User.id == user.id).delete()
+    db.commit()
+
+
+def _revoked(access_token):
+    return token_store.is_revoked(security.decode_access_token(access_token))
+
+
+def test_rotation_issues_a_new_pair(db, user):
+    first = token_service.issue_tokens(db, user)
+
+    _, second = token_service.rotate_refresh_token(db, first["refresh_token"])
+
+    assert second["refresh_token"] != first["refresh_token"]
+    assert not _revoked(second["access_token"])
+
+
+def test_reused_refresh_token_revokes_family_and_access_tokens(db, user):
+    first = token_service.issue_tokens(db, user)
+    _, second = token_service.rotate_refresh_token(db, first["refresh_token"])
+    # Not-before timestamps have one-second resolution
+    time.sleep(1)
+
+    with pytest.raises(HTTPException) as reused:
+        token_service.rotate_refresh_token(db, first["refresh_token"])
+    assert reused.value.status_code == 401
+
+    with pytest.raises(HTTPException) as rotated:
+        token_service.rotate_refresh_token(db, second["refresh_token"])
+    assert rotated.value.status_code == 401
+
+    assert _revoked(first["access_token"])
+    assert _revoked(second["access_token"])
@@ -0,0 +1,53 @@
+"""Size-based rotation of the JSON span file"""
+import json
+
+from app.core.tracing import JsonFileExporter, Span
+
+
+def _spans(count):
+    spans = []
+    for i in range(count):
+        span = Span(f"span-{i}", trace_id="0" * 32, parent_id=None, start_ns=1)
+        span.end_ns = 2
+        spans.append(span)
+    return spans
+
+
+def _names(path):
+    return [json.loads(line)["name"] for line in path.read_text().splitlines()]
+
+
+def test_file_rolls_over_past_max_bytes(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = JsonFileExporter(path, max_bytes=1, backup_count=2)
+
+    for batch in range(4):
+        exporter.export(_spans(batch + 1))
+
+    # Each batch starts a new file, the oldest one is gone
+    assert _names(path) == ["span-0", "span-1", "span-2", "span-3"]
+    assert _names(tmp_path / "spans.jsonl.1") == ["span-0", "span-1", "span-2"]
+    assert _names(tmp_path / "spans.jsonl.2") == ["span-0", "span-1"]
+    assert not (tmp_path / "spans.jsonl.3").exists()
+
+
+def test_file_below_max_bytes_is_appended_to(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = JsonFileExporter(path, max_bytes=1024 * 1024, backup_count=2)
+
+    exporter.export(_spans(1))
+    exporter.export(_spans(2))
+
+    assert _names(path) == ["span-0", "span-0", "span-1"]
+    assert not (tmp_path / "spans.jsonl.1").exists()
+
+
+def test_without_backups_the_file_starts_over(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = JsonFileExporter(path, max_bytes=1, backup_count=0)
+
+    exporter.export(_spans(1))
+    exporter.export(_spans(2))
+
+    assert _names(path) == ["span-0", "span-1"]
+    assert list(tmp_path.iterdir()) == [path]
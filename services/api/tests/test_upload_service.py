@@ -0,0 +1,75 @@
+"""Resumable uploads finalised or cancelled while a chunk is still arriving"""
+import asyncio
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.upload_service import ResumableUploadService
+
+
+class SlowBody:
+    """Request body that sends its first part, then waits to be released"""
+
+    def __init__(self, first: bytes, rest: bytes):
+        self.first = first
+        self.rest = rest
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __aiter__(self):
+        yield self.first
+        self.started.set()
+        await self.release.wait()
+        yield self.rest
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+@pytest.fixture
+def uploads():
+    return ResumableUploadService()
+
+
+@pytest.mark.asyncio
+async def test_finalize_waits_for_the_chunk_in_flight(uploads):
+    upload_id = uploads.create_upload("report.pdf", 6)["upload_id"]
+    body = SlowBody(b"abc", b"def")
+
+    patch = asyncio.create_task(uploads.append_chunk(upload_id, 0, body.__aiter__()))
+    await body.started.wait()
+    finalize = asyncio.create_task(uploads.finalize(upload_id))
+    await asyncio.sleep(0.05)
+    assert not finalize.done()
+
+    body.release.set()
+    assert (await patch)["offset"] == 6
+    info = await finalize
+    assert Path(info["file_path"]).read_bytes() == b"abcdef"
+
+    with pytest.raises(HTTPException) as late:
+        await uploads.append_chunk(upload_id, 6, _chunks(b"x"))
+    assert late.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_cancel_waits_for_the_chunk_in_flight(uploads):
+    upload_id = uploads.create_upload("report.pdf", 6)["upload_id"]
+    body = SlowBody(b"abc", b"def")
+
+    patch = asyncio.create_task(uploads.append_chunk(upload_id, 0, body.__aiter__()))
+    await body.started.wait()
+    cancel = asyncio.create_task(uploads.cancel(upload_id))
+    await asyncio.sleep(0.05)
+    assert not cancel.done()
+
+    body.release.set()
+    assert (await patch)["offset"] == 6
+    assert await cancel
+
+    with pytest.raises(HTTPException) as late:
+        await uploads.append_chunk(upload_id, 6, _chunks(b"x"))
+    assert late.value.status_code == 404